@@ -0,0 +1,341 @@
+"""
+주소 정규화 및 오프라인 지오코딩
+- 도로명/지번 주소를 시도·시군구·읍면동·도로명·건물번호(지번)로 분해
+- 주소 참조 CSV로 미리 만든 로컬 인덱스에서 좌표·코드 조회 (외부 API 호출 없음)
+- 조회 결과는 메모리 LRU 캐시로 재사용
+
+주소 참조 CSV 컬럼 (UTF-8, 헤더 포함. 도로명주소 DB 등을 이 형식으로 변환해 사용):
+    시도,시군구,읍면동,리,도로명,건물본번,건물부번,지번본번,지번부번,산여부,
+    법정동코드,도로명코드,우편번호,위도,경도
+"""
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import time
+from collections import namedtuple
+from functools import lru_cache
+from typing import Optional, Iterator, List
+
+from config import ADDRESS_CONFIG
+from utils import create_output_directory
+
+SIDO_ALIASES = {
+    "서울": "서울특별시", "서울시": "서울특별시", "서울특별시": "서울특별시",
+    "부산": "부산광역시", "부산시": "부산광역시", "부산광역시": "부산광역시",
+    "대구": "대구광역시", "대구시": "대구광역시", "대구광역시": "대구광역시",
+    "인천": "인천광역시", "인천시": "인천광역시", "인천광역시": "인천광역시",
+    "광주": "광주광역시", "광주광역시": "광주광역시",
+    "대전": "대전광역시", "대전시": "대전광역시", "대전광역시": "대전광역시",
+    "울산": "울산광역시", "울산시": "울산광역시", "울산광역시": "울산광역시",
+    "세종": "세종특별자치시", "세종시": "세종특별자치시", "세종특별자치시": "세종특별자치시",
+    "경기": "경기도", "경기도": "경기도",
+    "강원": "강원특별자치도", "강원도": "강원특별자치도", "강원특별자치도": "강원특별자치도",
+    "충북": "충청북도", "충청북도": "충청북도",
+    "충남": "충청남도", "충청남도": "충청남도",
+    "전북": "전북특별자치도", "전라북도": "전북특별자치도", "전북특별자치도": "전북특별자치도",
+    "전남": "전라남도", "전라남도": "전라남도",
+    "경북": "경상북도", "경상북도": "경상북도",
+    "경남": "경상남도", "경상남도": "경상남도",
+    "제주": "제주특별자치도", "제주도": "제주특별자치도", "제주특별자치도": "제주특별자치도",
+}
+
+ROAD_RE = re.compile(r'^(?P<road>[가-힣A-Za-z0-9·.]+?(?:로|길))(?P<num>\d+(?:-\d+)?)?$')
+ROAD_BRANCH_RE = re.compile(r'^\d+번?길$')
+NUMBER_RE = re.compile(r'^(?P<san>산)?(?P<main>\d+)(?:-(?P<sub>\d+))?(?:번지)?$')
+PAREN_RE = re.compile(r'\(([^)]*)\)')
+SIGUNGU_RE = re.compile(r'[가-힣](시|군|구)$')
+DONG_RE = re.compile(r'[가-힣0-9](읍|면|동|가)$')
+RI_RE = re.compile(r'[가-힣0-9]리$')
+PAREN_DONG_RE = re.compile(r'(동|가|리)$')
+
+ParsedAddress = namedtuple("ParsedAddress", [
+    "sido", "sigungu", "dong", "ri", "road", "building_main", "building_sub",
+    "jibun_main", "jibun_sub", "san", "detail"
+])
+
+GeocodeResult = namedtuple("GeocodeResult", [
+    "match", "sido", "sigungu", "dong", "road", "building_no", "jibun",
+    "lat", "lng", "bjd_code", "road_code", "zipcode"
+])
+
+
+def _split_number(text: Optional[str]):
+    if not text:
+        return None, 0
+    main, _, sub = text.partition('-')
+    return int(main), int(sub or 0)
+
+
+def parse_address(address: str) -> Optional[ParsedAddress]:
+    """주소 문자열을 구성요소로 분해 (도로명/지번 모두 지원)"""
+    if not address:
+        return None
+
+    # 괄호 안 참고항목: "(역북동)" 또는 "(역북동, OO아파트)"
+    paren_dong = None
+    for note in PAREN_RE.findall(address):
+        first = note.split(',')[0].strip()
+        if PAREN_DONG_RE.search(first):
+            paren_dong = first
+    tokens = PAREN_RE.sub(' ', address).replace(',', ' ').split()
+
+    sido, sigungu_parts, dong, ri, road = None, [], None, None, None
+    building, jibun, san = None, None, False
+    detail = []
+
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token == "산" and i + 1 < len(tokens) and tokens[i + 1][:1].isdigit():
+            # "산 12" 처럼 띄어 쓴 산 지번
+            token = "산" + tokens[i + 1]
+            i += 1
+
+        if sido is None and not sigungu_parts and token in SIDO_ALIASES:
+            sido = SIDO_ALIASES[token]
+        elif road is None and dong is None and SIGUNGU_RE.search(token) and len(sigungu_parts) < 2:
+            sigungu_parts.append(token)
+        elif road is None and dong is None and DONG_RE.search(token) and not ROAD_RE.match(token):
+            dong = token
+        elif road is None and dong is not None and ri is None and RI_RE.search(token):
+            ri = token
+        elif road is None and building is None and jibun is None and ROAD_RE.match(token):
+            match = ROAD_RE.match(token)
+            road = match.group("road")
+            if match.group("num"):
+                # "중부대로1199번길" 처럼 붙여 쓴 경우는 도로명의 일부
+                if i + 1 < len(tokens) and tokens[i + 1] in ("번길", "길"):
+                    road = f"{road}{match.group('num')}{tokens[i + 1]}"
+                    i += 1
+                else:
+                    building = match.group("num")
+            if i + 1 < len(tokens) and ROAD_BRANCH_RE.match(tokens[i + 1]):
+                road = f"{road}{tokens[i + 1]}"
+                i += 1
+        elif NUMBER_RE.match(token) and building is None and jibun is None and (road or dong):
+            number = NUMBER_RE.match(token)
+            text = number.group("main") + (f"-{number.group('sub')}" if number.group("sub") else "")
+            if road:
+                building = text
+            else:
+                jibun, san = text, bool(number.group("san"))
+        else:
+            detail.append(token)
+        i += 1
+
+    if not sigungu_parts and not road and not dong:
+        return None
+
+    building_main, building_sub = _split_number(building)
+    jibun_main, jibun_sub = _split_number(jibun)
+    return ParsedAddress(
+        sido=sido,
+        sigungu=" ".join(sigungu_parts) or None,
+        dong=dong or paren_dong,
+        ri=ri,
+        road=road,
+        building_main=building_main,
+        building_sub=building_sub,
+        jibun_main=jibun_main,
+        jibun_sub=jibun_sub,
+        san=san,
+        detail=" ".join(detail) or None
+    )
+
+
+def road_key(sido: Optional[str], sigungu: str, road: str, main: int, sub: int) -> str:
+    return f"R|{sido or ''}|{sigungu}|{road}|{main}|{sub}"
+
+
+def jibun_key(sido: Optional[str], sigungu: str, dong: str, ri: Optional[str], san: bool, main: int, sub: int) -> str:
+    return f"J|{sido or ''}|{sigungu}|{dong}|{ri or ''}|{int(san)}|{main}|{sub}"
+
+
+def sigungu_variants(sigungu: str) -> List[str]:
+    """시군구 전체와 마지막 단위 ('용인시 처인구' → ['용인시 처인구', '처인구'])"""
+    parts = sigungu.split()
+    return [sigungu, parts[-1]] if len(parts) > 1 else [sigungu]
+
+
+def lookup_keys(parsed: ParsedAddress) -> Iterator[str]:
+    """조회 시도할 키 (시도 포함 → 시도 생략, 시군구 전체 → 마지막 단위 순)"""
+    if not parsed.sigungu:
+        return
+    for sigungu in sigungu_variants(parsed.sigungu):
+        for sido in ([parsed.sido, None] if parsed.sido else [None]):
+            if parsed.road and parsed.building_main is not None:
+                yield road_key(sido, sigungu, parsed.road, parsed.building_main, parsed.building_sub)
+            if parsed.dong and parsed.jibun_main is not None:
+                yield jibun_key(sido, sigungu, parsed.dong, parsed.ri, parsed.san,
+                                parsed.jibun_main, parsed.jibun_sub)
+
+
+def _int(value: str) -> int:
+    return int(value) if value and value.strip() else 0
+
+
+def build_index(reference_file: Optional[str] = None, index_file: Optional[str] = None) -> int:
+    """주소 참조 CSV로 조회 인덱스 생성. 생성된 키 개수 반환"""
+    reference_file = reference_file or ADDRESS_CONFIG["reference_file"]
+    index_file = index_file or ADDRESS_CONFIG["index_file"]
+    directory = os.path.dirname(index_file)
+    if directory:
+        create_output_directory(directory)
+
+    tmp_file = f"{index_file}.tmp"
+    if os.path.exists(tmp_file):
+        os.remove(tmp_file)
+
+    conn = sqlite3.connect(tmp_file)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("""
+        CREATE TABLE addresses (
+            key TEXT NOT NULL,
+            sido TEXT, sigungu TEXT, dong TEXT, road TEXT, building_no TEXT, jibun TEXT,
+            lat REAL, lng REAL, bjd_code TEXT, road_code TEXT, zipcode TEXT
+        )
+    """)
+
+    def rows():
+        with open(reference_file, encoding='utf-8-sig', newline='') as f:
+            for record in csv.DictReader(f):
+                sido = SIDO_ALIASES.get(record["시도"].strip(), record["시도"].strip())
+                sigungu = record["시군구"].strip()
+                dong = record["읍면동"].strip()
+                ri = record.get("리", "").strip() or None
+                road = record["도로명"].strip()
+                b_main, b_sub = _int(record["건물본번"]), _int(record["건물부번"])
+                j_main, j_sub = _int(record["지번본번"]), _int(record["지번부번"])
+                san = record.get("산여부", "").strip() in ("1", "Y", "산")
+
+                building_no = f"{b_main}-{b_sub}" if b_sub else str(b_main)
+                jibun = ("산" if san else "") + (f"{j_main}-{j_sub}" if j_sub else str(j_main))
+                values = (sido, sigungu, dong, road, building_no, jibun,
+                          float(record["위도"]), float(record["경도"]),
+                          record["법정동코드"].strip(), record["도로명코드"].strip(), record["우편번호"].strip())
+
+                # '처인구 금령로 20'처럼 시를 생략한 주소도 찾도록 시군구 마지막 단위로도 색인
+                keys = []
+                for name in sigungu_variants(sigungu):
+                    if road and b_main:
+                        keys += [road_key(sido, name, road, b_main, b_sub), road_key(None, name, road, b_main, b_sub)]
+                    if dong and j_main:
+                        keys += [jibun_key(sido, name, dong, ri, san, j_main, j_sub),
+                                 jibun_key(None, name, dong, ri, san, j_main, j_sub)]
+                for key in keys:
+                    yield (key,) + values
+
+    conn.executemany("INSERT INTO addresses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows())
+
+    # 시도/시를 생략한 키가 여러 시군구에 걸치면(예: '중구') 모호하므로 제거
+    conn.execute("""
+        DELETE FROM addresses WHERE key IN (
+            SELECT key FROM addresses GROUP BY key HAVING COUNT(DISTINCT sido || '|' || sigungu) > 1
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE address_index (
+            key TEXT PRIMARY KEY,
+            sido TEXT, sigungu TEXT, dong TEXT, road TEXT, building_no TEXT, jibun TEXT,
+            lat REAL, lng REAL, bjd_code TEXT, road_code TEXT, zipcode TEXT
+        ) WITHOUT ROWID
+    """)
+    conn.execute("INSERT OR IGNORE INTO address_index SELECT * FROM addresses ORDER BY key")
+    conn.execute("DROP TABLE addresses")
+    count = conn.execute("SELECT COUNT(*) FROM address_index").fetchone()[0]
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+
+    os.replace(tmp_file, index_file)
+    return count
+
+
+class AddressIndex:
+    """로컬 주소 인덱스 조회기 (LRU 캐시 적용)"""
+
+    def __init__(self, index_file: Optional[str] = None, cache_size: Optional[int] = None):
+        self.index_file = index_file or ADDRESS_CONFIG["index_file"]
+        if not os.path.exists(self.index_file):
+            raise FileNotFoundError(f"주소 인덱스가 없습니다. 먼저 build_index()를 실행하세요: {self.index_file}")
+
+        self.conn = sqlite3.connect(f"file:{self.index_file}?mode=ro", uri=True, check_same_thread=False)
+        self.conn.execute("PRAGMA cache_size = -131072")  # 128MB
+        self.conn.execute("PRAGMA mmap_size = 1073741824")
+        self.geocode = lru_cache(maxsize=cache_size or ADDRESS_CONFIG["cache_size"])(self._geocode)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def _geocode(self, address: str) -> Optional[GeocodeResult]:
+        parsed = parse_address(address)
+        if parsed is None:
+            return None
+
+        for key in lookup_keys(parsed):
+            row = self.conn.execute(
+                "SELECT sido, sigungu, dong, road, building_no, jibun, lat, lng, bjd_code, road_code, zipcode "
+                "FROM address_index WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                return GeocodeResult("road" if key[0] == "R" else "jibun", *row)
+        return None
+
+    def geocode_many(self, addresses: List[str]) -> List[Optional[GeocodeResult]]:
+        return [self.geocode(address) for address in addresses]
+
+    def cache_info(self):
+        return self.geocode.cache_info()
+
+    def close(self):
+        self.conn.close()
+
+
+def benchmark(index: AddressIndex, addresses: List[str], rounds: int = 5):
+    """조회 처리량 측정 (첫 회는 캐시 예열)"""
+    for round_no in range(rounds):
+        start = time.perf_counter()
+        results = index.geocode_many(addresses)
+        elapsed = time.perf_counter() - start
+        hits = sum(result is not None for result in results)
+        label = "예열" if round_no == 0 else f"{round_no}회차"
+        print(f"{label}: {len(addresses) / elapsed:,.0f} 건/초 (매칭 {hits}/{len(addresses)})")
+    print(f"캐시: {index.cache_info()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="주소 정규화/지오코딩 인덱스")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="주소 참조 CSV로 인덱스 생성")
+    build.add_argument("--reference", help="주소 참조 CSV 경로")
+
+    lookup = sub.add_parser("lookup", help="주소 조회")
+    lookup.add_argument("address")
+
+    bench = sub.add_parser("bench", help="크롤링 결과 주소로 조회 처리량 측정")
+    bench.add_argument("file", help="주소가 한 줄에 하나씩 있는 텍스트 파일")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build_index(args.reference)
+        print(f"✅ 주소 인덱스 생성 완료: {count:,}개 키")
+    elif args.command == "lookup":
+        with AddressIndex() as index:
+            print(parse_address(args.address))
+            print(index.geocode(args.address))
+    else:
+        with open(args.file, encoding='utf-8') as f:
+            addresses = [line.strip() for line in f if line.strip()]
+        with AddressIndex() as index:
+            benchmark(index, addresses)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+"""
+동네 편의시설 집계 (부동산 매물 점수용)
+크롤링 결과를 동/격자 셀 단위로 묶어 업종 구성, 평점 분포를 집계하고
+매물 좌표별 가장 가까운 편의시설까지의 거리를 NumPy로 일괄 계산한다.
+집계는 SQLite에 저장해 두고 변경분(신규/변경/폐업·누락)이 들어올 때마다 증분 갱신
+"""
+import argparse
+import os
+import sqlite3
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import ANALYTICS_CONFIG, OUTPUT_DIR
+from utils import create_output_directory, generate_filename, read_result_excel
+from change_detection import make_place_id, CHANGE_CLOSED, CHANGE_UNCHANGED
+from address import AddressIndex, parse_address
+
+EARTH_RADIUS_M = 6_371_000
+LEVELS = ("dong", "cell")
+UNRATED_BIN = -1
+UNKNOWN_CATEGORY = "기타"
+EXPORT_FILENAME_FORMAT = "amenity_analytics_{date}.xlsx"
+
+PLACE_COLUMNS = ["place_id", "name", "address", "category", "dong", "cell", "lat", "lng", "rating", "rating_bin"]
+
+
+def project(lat, lng, origin=None):
+    """위경도 -> 기준점 기준 평면 좌표 (미터, 도시 규모에서는 등장방형 근사로 충분)"""
+    lat0, lng0 = origin or ANALYTICS_CONFIG["grid_origin"]
+    lat = np.asarray(lat, dtype=float)
+    lng = np.asarray(lng, dtype=float)
+    x = np.radians(lng - lng0) * EARTH_RADIUS_M * np.cos(np.radians(lat0))
+    y = np.radians(lat - lat0) * EARTH_RADIUS_M
+    return x, y
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    """두 좌표 배열 사이의 대원 거리 (미터)"""
+    lat1, lng1, lat2, lng2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lng1, lat2, lng2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def grid_cells(lat, lng, size_m: Optional[float] = None, origin=None) -> np.ndarray:
+    """좌표별 격자 셀 ID ("행_열"), 좌표가 없으면 None"""
+    size_m = size_m or ANALYTICS_CONFIG["grid_size_m"]
+    x, y = project(lat, lng, origin)
+    valid = np.isfinite(x) & np.isfinite(y)
+
+    cells = np.full(len(x), None, dtype=object)
+    if valid.any():
+        rows = np.floor(y[valid] / size_m).astype(np.int64).astype(str)
+        cols = np.floor(x[valid] / size_m).astype(np.int64).astype(str)
+        cells[valid] = np.char.add(np.char.add(rows, "_"), cols)
+    return cells
+
+
+def cell_centers(cells: pd.Series, size_m: Optional[float] = None, origin=None) -> pd.DataFrame:
+    """격자 셀 ID -> 셀 중심 위경도"""
+    size_m = size_m or ANALYTICS_CONFIG["grid_size_m"]
+    lat0, lng0 = origin or ANALYTICS_CONFIG["grid_origin"]
+    parts = cells.str.split("_", expand=True).astype(float)
+    y = (parts[0] + 0.5) * size_m
+    x = (parts[1] + 0.5) * size_m
+    return pd.DataFrame({
+        "lat": lat0 + np.degrees(y / EARTH_RADIUS_M),
+        "lng": lng0 + np.degrees(x / (EARTH_RADIUS_M * np.cos(np.radians(lat0))))
+    }, index=cells.index)
+
+
+def rating_bins(ratings: pd.Series, bins: Optional[List[float]] = None) -> np.ndarray:
+    """평점 -> 구간 번호 (평점 없으면 UNRATED_BIN)"""
+    bins = np.asarray(bins or ANALYTICS_CONFIG["rating_bins"])
+    values = ratings.to_numpy(dtype=float)
+    result = np.digitize(values, bins) - 1
+    result[~np.isfinite(values) | (result < 0) | (result >= len(bins) - 1)] = UNRATED_BIN
+    return result
+
+
+def rating_bin_labels(bins: Optional[List[float]] = None) -> Dict[int, str]:
+    bins = bins or ANALYTICS_CONFIG["rating_bins"]
+    labels = {i: f"{bins[i]:.1f}~{min(bins[i + 1], 5.0):.1f}" for i in range(len(bins) - 1)}
+    labels[UNRATED_BIN] = "평점없음"
+    return labels
+
+
+def normalize_category(categories: pd.Series) -> pd.Series:
+    """'한식>육류,고기요리' 같은 카테고리에서 대분류만 사용"""
+    top = categories.fillna("").astype(str).str.split(r"[>,]", regex=True).str[0].str.strip()
+    return top.mask(top == "", UNKNOWN_CATEGORY)
+
+
+def open_geocoder() -> Optional[AddressIndex]:
+    """주소 인덱스가 있으면 열고, 없으면 None (동 단위 집계만 가능)"""
+    try:
+        return AddressIndex()
+    except FileNotFoundError:
+        return None
+
+
+def locate_addresses(addresses: pd.Series, geocoder: Optional[AddressIndex] = None) -> pd.DataFrame:
+    """주소 -> 동 라벨('시군구 동'), 위경도. 중복 주소는 한 번만 조회"""
+    located = {}
+    for address in addresses.unique():
+        result = geocoder.geocode(address) if geocoder else None
+        if result:
+            located[address] = (f"{result.sigungu} {result.dong}", result.lat, result.lng)
+            continue
+
+        parsed = parse_address(address)
+        dong = f"{parsed.sigungu} {parsed.dong}" if parsed and parsed.sigungu and parsed.dong else None
+        located[address] = (dong, np.nan, np.nan)
+
+    frame = pd.DataFrame.from_dict(located, orient="index", columns=["dong", "lat", "lng"])
+    return frame.reindex(addresses.to_numpy()).set_index(addresses.index)
+
+
+def compute_place_ids(df: pd.DataFrame) -> List[str]:
+    """가게명/주소로 place_id 계산 (빈 셀이 'nan'으로 해시되지 않도록 빈 문자열 처리)"""
+    return [make_place_id(row) for row in df[["가게명", "주소"]].fillna("").to_dict("records")]
+
+
+def prepare_places(df: pd.DataFrame, geocoder: Optional[AddressIndex] = None,
+                   config: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+    """크롤링 결과 행 -> 집계용 장소 테이블 (place_id 기준 중복 제거)"""
+    config = dict(ANALYTICS_CONFIG, **(config or {}))
+    if df.empty:
+        return pd.DataFrame(columns=PLACE_COLUMNS)
+
+    addresses = df["주소"].fillna("").astype(str)
+    places = pd.DataFrame({
+        "place_id": compute_place_ids(df),
+        "name": df["가게명"].fillna("").astype(str),
+        "address": addresses,
+        "category": normalize_category(df["카테고리"]),
+        "rating": pd.to_numeric(
+            df["평점"].astype(str).str.extract(r"(\d+(?:\.\d+)?)", expand=False), errors="coerce"
+        )
+    }, index=df.index)
+
+    location = locate_addresses(addresses, geocoder)
+    places["dong"] = location["dong"]
+    places["lat"] = location["lat"]
+    places["lng"] = location["lng"]
+    places["cell"] = grid_cells(places["lat"], places["lng"], config["grid_size_m"], config["grid_origin"])
+    places["rating_bin"] = rating_bins(places["rating"], config["rating_bins"])
+
+    # 같은 장소가 여러 키워드에서 나오면 마지막 관측만 사용
+    return places.drop_duplicates("place_id", keep="last")[PLACE_COLUMNS].reset_index(drop=True)
+
+
+def contributions(places: pd.DataFrame, sign: int = 1) -> pd.DataFrame:
+    """장소들이 집계 테이블에 기여하는 값 (sign=-1이면 제거분)"""
+    frames = []
+    rated = places.assign(rating_value=places["rating"].fillna(0.0))
+    for level in LEVELS:
+        part = rated[rated[level].notna()]
+        if part.empty:
+            continue
+        grouped = part.groupby([level, "category", "rating_bin"], sort=False).agg(
+            count=("place_id", "size"), rating_sum=("rating_value", "sum")
+        ).reset_index().rename(columns={level: "area"})
+        grouped.insert(0, "level", level)
+        frames.append(grouped)
+
+    if not frames:
+        return pd.DataFrame(columns=["level", "area", "category", "rating_bin", "count", "rating_sum"])
+
+    result = pd.concat(frames, ignore_index=True)
+    result["count"] *= sign
+    result["rating_sum"] *= sign
+    return result
+
+
+class AmenityAnalytics:
+    """장소 테이블과 집계 테이블을 SQLite에 유지하며 증분 갱신"""
+
+    def __init__(self, db_path: Optional[str] = None, geocoder: Optional[AddressIndex] = None,
+                 config: Optional[Dict[str, Any]] = None):
+        self.config = dict(ANALYTICS_CONFIG, **(config or {}))
+        self.db_path = db_path or self.config["db_path"]
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            create_output_directory(directory)
+
+        self.geocoder = geocoder
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS amenity_places (
+                place_id TEXT PRIMARY KEY,
+                name TEXT, address TEXT, category TEXT,
+                dong TEXT, cell TEXT, lat REAL, lng REAL,
+                rating REAL, rating_bin INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS amenity_aggregates (
+                level TEXT NOT NULL,
+                area TEXT NOT NULL,
+                category TEXT NOT NULL,
+                rating_bin INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                rating_sum REAL NOT NULL,
+                PRIMARY KEY (level, area, category, rating_bin)
+            ) WITHOUT ROWID;
+        """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def load_places(self, place_ids: Optional[List[str]] = None) -> pd.DataFrame:
+        """저장된 장소 테이블 (place_ids가 주어지면 해당 장소만)"""
+        if place_ids is None:
+            return pd.read_sql_query(f"SELECT {', '.join(PLACE_COLUMNS)} FROM amenity_places", self.conn)
+
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS wanted_ids (place_id TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM wanted_ids")
+        self.conn.executemany("INSERT OR IGNORE INTO wanted_ids VALUES (?)", ((pid,) for pid in place_ids))
+        columns = ", ".join(f"p.{column}" for column in PLACE_COLUMNS)
+        return pd.read_sql_query(
+            f"SELECT {columns} FROM amenity_places p JOIN wanted_ids USING (place_id)", self.conn
+        )
+
+    def apply(self, df: pd.DataFrame, replace: bool = False) -> Dict[str, int]:
+        """크롤링 결과(전체 또는 변경_구분 포함 변경분)를 반영
+
+        replace=True면 df를 전체 스냅샷으로 보고 df에 없는 장소는 제거
+        """
+        if "변경_구분" in df.columns:
+            kinds = df["변경_구분"].fillna("")
+            removed_ids = compute_place_ids(df[kinds == CHANGE_CLOSED])
+            upserts = df[(kinds != CHANGE_CLOSED) & (kinds != CHANGE_UNCHANGED)]
+        else:
+            removed_ids = []
+            upserts = df
+
+        new_places = prepare_places(upserts, self.geocoder, self.config)
+
+        if replace:
+            existing = {row[0] for row in self.conn.execute("SELECT place_id FROM amenity_places")}
+            removed_ids = list(existing - set(new_places["place_id"]))
+
+        removed_ids = list(set(removed_ids) - set(new_places["place_id"]))
+        old_places = self.load_places(list(new_places["place_id"]) + removed_ids)
+
+        # 기존 기여분을 빼고 새 기여분을 더한 순변화만 반영
+        delta = pd.concat([contributions(old_places, -1), contributions(new_places, 1)], ignore_index=True)
+        if not delta.empty:
+            delta = delta.groupby(["level", "area", "category", "rating_bin"], sort=False, as_index=False)[
+                ["count", "rating_sum"]
+            ].sum()
+            delta = delta[(delta["count"] != 0) | (delta["rating_sum"].abs() > 1e-9)]
+
+        with self.conn:
+            self.conn.executemany(
+                "DELETE FROM amenity_places WHERE place_id = ?", ((pid,) for pid in removed_ids)
+            )
+            self.conn.executemany(
+                f"INSERT OR REPLACE INTO amenity_places ({', '.join(PLACE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(PLACE_COLUMNS))})",
+                new_places.astype(object).where(new_places.notna(), None).itertuples(index=False, name=None)
+            )
+            self._merge_aggregates(delta)
+
+        return {
+            "upserted": len(new_places),
+            "new": len(new_places) - int(old_places["place_id"].isin(new_places["place_id"]).sum()),
+            "removed": int(old_places["place_id"].isin(removed_ids).sum()),
+            "aggregate_rows_touched": len(delta)
+        }
+
+    def _merge_aggregates(self, delta: pd.DataFrame):
+        if delta.empty:
+            return
+        self.conn.executemany("""
+            INSERT INTO amenity_aggregates (level, area, category, rating_bin, count, rating_sum)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(level, area, category, rating_bin) DO UPDATE SET
+                count = count + excluded.count,
+                rating_sum = rating_sum + excluded.rating_sum
+        """, (
+            (level, area, category, int(rating_bin), int(count), float(rating_sum))
+            for level, area, category, rating_bin, count, rating_sum in delta.itertuples(index=False, name=None)
+        ))
+        self.conn.execute("DELETE FROM amenity_aggregates WHERE count <= 0")
+
+    def rebuild(self):
+        """저장된 장소 테이블로 집계를 처음부터 다시 계산 (격자 크기/평점 구간 변경 시)"""
+        places = self.load_places()
+        places["cell"] = grid_cells(places["lat"], places["lng"], self.config["grid_size_m"], self.config["grid_origin"])
+        places["rating_bin"] = rating_bins(places["rating"], self.config["rating_bins"])
+
+        with self.conn:
+            self.conn.execute("DELETE FROM amenity_aggregates")
+            self.conn.executemany(
+                "UPDATE amenity_places SET cell = ?, rating_bin = ? WHERE place_id = ?",
+                ((cell, int(rating_bin), place_id) for place_id, cell, rating_bin
+                 in places[["place_id", "cell", "rating_bin"]].itertuples(index=False, name=None))
+            )
+            self._merge_aggregates(contributions(places, 1))
+
+    def aggregates(self, level: str = "dong") -> pd.DataFrame:
+        if level not in LEVELS:
+            raise ValueError(f"알 수 없는 집계 단위: {level}")
+        return pd.read_sql_query(
+            "SELECT area, category, rating_bin, count, rating_sum FROM amenity_aggregates WHERE level = ?",
+            self.conn, params=(level,)
+        )
+
+    def counts(self, level: str = "dong") -> pd.DataFrame:
+        """지역 x 업종 장소 수"""
+        return self.aggregates(level).pivot_table(
+            index="area", columns="category", values="count", aggfunc="sum", fill_value=0
+        )
+
+    def category_mix(self, level: str = "dong") -> pd.DataFrame:
+        """지역별 업종 구성비"""
+        counts = self.counts(level)
+        return counts.div(counts.sum(axis=1).replace(0, np.nan), axis=0).fillna(0.0)
+
+    def rating_distribution(self, level: str = "dong") -> pd.DataFrame:
+        """지역 x 평점 구간 장소 수"""
+        distribution = self.aggregates(level).pivot_table(
+            index="area", columns="rating_bin", values="count", aggfunc="sum", fill_value=0
+        )
+        return distribution.rename(columns=rating_bin_labels(self.config["rating_bins"]))
+
+    def summary(self, level: str = "dong") -> pd.DataFrame:
+        """지역별 장소 수, 평점 있는 장소 수, 평균 평점, 최다 업종"""
+        data = self.aggregates(level)
+        if data.empty:
+            return pd.DataFrame(columns=["total", "rated", "mean_rating", "top_category"])
+
+        rated = data[data["rating_bin"] != UNRATED_BIN]
+        by_area = data.groupby("area")
+        summary = pd.DataFrame({"total": by_area["count"].sum()})
+        summary["rated"] = rated.groupby("area")["count"].sum().reindex(summary.index, fill_value=0)
+        summary["mean_rating"] = (
+            rated.groupby("area")["rating_sum"].sum().reindex(summary.index) / summary["rated"].replace(0, np.nan)
+        ).round(2)
+        summary["top_category"] = self.counts(level).idxmax(axis=1)
+
+        if level == "cell":
+            summary = summary.join(cell_centers(summary.index.to_series(), self.config["grid_size_m"],
+                                                self.config["grid_origin"]))
+        return summary.sort_values("total", ascending=False)
+
+    def nearest(self, properties: pd.DataFrame, categories: Optional[List[str]] = None,
+                radius_m: Optional[float] = None) -> pd.DataFrame:
+        """매물 좌표(lat, lng 컬럼)별 가장 가까운 편의시설 거리와 반경 내 개수
+
+        categories를 주면 업종별 최근접 거리 컬럼도 추가
+        """
+        radius_m = radius_m or self.config["radius_m"]
+        amenities = self.load_places().dropna(subset=["lat", "lng"]).reset_index(drop=True)
+        result = properties.copy()
+
+        groups = [(None, amenities)]
+        groups += [(category, amenities[amenities["category"] == category]) for category in categories or []]
+
+        for category, group in groups:
+            prefix = "" if category is None else f"{category}_"
+            index, distance, within = self._nearest(properties["lat"], properties["lng"], group, radius_m)
+            result[f"{prefix}nearest_m"] = distance
+            result[f"{prefix}within_{int(radius_m)}m"] = within
+            if category is None:
+                names = group["name"].to_numpy(dtype=object)
+                kinds = group["category"].to_numpy(dtype=object)
+                found = index >= 0
+                result["nearest_name"] = np.where(found, names[np.clip(index, 0, None)] if len(names) else None, None)
+                result["nearest_category"] = np.where(found, kinds[np.clip(index, 0, None)] if len(kinds) else None, None)
+        return result
+
+    def _nearest(self, lat, lng, amenities: pd.DataFrame, radius_m: float):
+        """블록 단위 거리 행렬로 최근접 인덱스, 거리(미터), 반경 내 개수 계산"""
+        n = len(lat)
+        index = np.full(n, -1, dtype=np.int64)
+        distance = np.full(n, np.nan)
+        within = np.zeros(n, dtype=np.int64)
+        if n == 0 or amenities.empty:
+            return index, distance, within
+
+        lat = np.asarray(lat, dtype=float)
+        lng = np.asarray(lng, dtype=float)
+        origin = (float(np.nanmean(lat)), float(np.nanmean(lng)))
+        px, py = project(lat, lng, origin)
+        ax, ay = project(amenities["lat"], amenities["lng"], origin)
+        radius_sq = radius_m * radius_m
+
+        block = max(1, self.config["block_elements"] // len(ax))
+        for start in range(0, n, block):
+            end = min(start + block, n)
+            d2 = (px[start:end, None] - ax[None, :]) ** 2 + (py[start:end, None] - ay[None, :]) ** 2
+            index[start:end] = np.argmin(d2, axis=1)
+            within[start:end] = (d2 <= radius_sq).sum(axis=1)
+
+        valid = np.isfinite(px) & np.isfinite(py)
+        index[~valid] = -1
+        within[~valid] = 0
+        # 평면 근사로 고른 최근접 쌍은 대원 거리로 다시 계산
+        distance[valid] = haversine_m(lat[valid], lng[valid],
+                                      amenities["lat"].to_numpy()[index[valid]],
+                                      amenities["lng"].to_numpy()[index[valid]])
+        return index, distance, within
+
+    def export(self, filepath: Optional[str] = None) -> str:
+        """집계 결과를 엑셀 시트별로 저장"""
+        if filepath is None:
+            create_output_directory(OUTPUT_DIR)
+            filepath = os.path.join(OUTPUT_DIR, generate_filename(EXPORT_FILENAME_FORMAT))
+
+        with pd.ExcelWriter(filepath, engine="openpyxl") as writer:
+            for level, label in (("dong", "동"), ("cell", "격자")):
+                self.summary(level).to_excel(writer, sheet_name=f"{label}_요약")
+                self.counts(level).to_excel(writer, sheet_name=f"{label}_업종별")
+                self.category_mix(level).round(4).to_excel(writer, sheet_name=f"{label}_업종구성")
+                self.rating_distribution(level).to_excel(writer, sheet_name=f"{label}_평점분포")
+        return filepath
+
+    def close(self):
+        self.conn.close()
+
+
+def update_from_rows(rows: List[Dict[str, Any]], logger, db_path: Optional[str] = None) -> Optional[Dict[str, int]]:
+    """크롤링 변경분 행으로 집계 증분 갱신 (save_crawl_output에서 호출)"""
+    if not rows:
+        return None
+    geocoder = open_geocoder()
+    try:
+        with AmenityAnalytics(db_path, geocoder) as analytics:
+            stats = analytics.apply(pd.DataFrame(rows))
+        logger.info(f"편의시설 집계 갱신: {stats}")
+        return stats
+    finally:
+        if geocoder:
+            geocoder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="동네 편의시설 집계")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    apply_cmd = sub.add_parser("apply", help="크롤링 결과 엑셀(전체 또는 delta)을 집계에 반영")
+    apply_cmd.add_argument("files", nargs="+")
+    apply_cmd.add_argument("--replace", action="store_true", help="파일을 전체 스냅샷으로 보고 없는 장소 제거")
+
+    sub.add_parser("rebuild", help="장소 테이블로 집계 재계산")
+    sub.add_parser("export", help="집계 결과 엑셀 저장")
+
+    nearest_cmd = sub.add_parser("nearest", help="매물 좌표 CSV(lat, lng 컬럼)별 최근접 편의시설")
+    nearest_cmd.add_argument("file")
+    nearest_cmd.add_argument("--category", action="append", help="업종별 최근접 거리 (여러 번 지정 가능)")
+    nearest_cmd.add_argument("--radius", type=float, help="반경 내 개수 기준 (미터)")
+    args = parser.parse_args()
+
+    geocoder = open_geocoder() if args.command == "apply" else None
+    if args.command == "apply" and geocoder is None:
+        print("⚠️ 주소 인덱스가 없어 좌표 없이 동 단위로만 집계합니다. (python address.py build)")
+
+    with AmenityAnalytics(geocoder=geocoder) as analytics:
+        if args.command == "apply":
+            for path in args.files:
+                print(f"{path}: {analytics.apply(read_result_excel(path), replace=args.replace)}")
+        elif args.command == "rebuild":
+            analytics.rebuild()
+            print("✅ 집계 재계산 완료")
+        elif args.command == "export":
+            print(f"✅ 집계 저장: {analytics.export()}")
+        else:
+            result = analytics.nearest(pd.read_csv(args.file), args.category, args.radius)
+            output = os.path.splitext(args.file)[0] + "_amenities.csv"
+            result.to_csv(output, index=False, encoding="utf-8-sig")
+            print(f"✅ {len(result)}개 매물 처리: {output}")
+
+    if geocoder:
+        geocoder.close()
+
+
+if __name__ == "__main__":
+    main()
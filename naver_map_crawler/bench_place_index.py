@@ -0,0 +1,119 @@
+"""
+장소 검색 인덱스 벤치마크
+합성 데이터(기본 100만 건)를 임시 DB에 적재한 뒤 쿼리 유형별 응답 시간을 측정
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from place_index import connect, build_indexes, query_places
+
+# server.js와 동일한 스키마
+PLACES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS places (
+      id INTEGER PRIMARY KEY AUTOINCREMENT,
+      search_id INTEGER,
+      name TEXT NOT NULL,
+      address TEXT,
+      phone TEXT,
+      category TEXT,
+      rating REAL,
+      url TEXT,
+      notes TEXT,
+      created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+BRANDS = ["스타벅스", "투썸플레이스", "이디야커피", "메가커피", "김밥천국", "교촌치킨", "본죽", "홍콩반점", "백다방", "버거킹"]
+BRANCHES = ["기흥구청", "처인구청", "동백", "보정", "구갈", "신갈", "김량장", "역북", "마평", "영덕"]
+ROADS = ["중부대로", "용구대로", "금령로", "동백죽전대로", "기흥로", "백옥대로"]
+DISTRICTS = ["용인시 처인구", "용인시 기흥구", "용인시 수지구"]
+CATEGORIES = ["카페", "한식", "중식", "치킨", "분식", "패스트푸드", "베이커리"]
+
+
+def generate_rows(count: int, seed: int = 42):
+    """합성 장소 데이터 생성"""
+    rng = random.Random(seed)
+    for i in range(count):
+        brand = rng.choice(BRANDS)
+        yield (
+            rng.randint(1, 500),
+            f"{brand} {rng.choice(BRANCHES)}점 {i}",
+            f"경기 {rng.choice(DISTRICTS)} {rng.choice(ROADS)} {rng.randint(1, 999)}",
+            f"031-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+            rng.choice(CATEGORIES),
+            round(rng.uniform(3.0, 5.0), 1),
+            f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} {rng.randint(0, 23):02d}:00:00",
+            37.15 + rng.random() * 0.2,
+            127.05 + rng.random() * 0.25,
+        )
+
+
+def populate(db_path: str, count: int):
+    """임시 DB에 합성 데이터 적재"""
+    conn = sqlite3.connect(db_path)
+    conn.execute(PLACES_SCHEMA)
+    conn.execute("ALTER TABLE places ADD COLUMN lat REAL")
+    conn.execute("ALTER TABLE places ADD COLUMN lng REAL")
+    with conn:
+        conn.executemany(
+            "INSERT INTO places (search_id, name, address, phone, category, rating, created_at, lat, lng) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            generate_rows(count)
+        )
+    conn.close()
+
+
+def measure(label: str, func, repeat: int):
+    """쿼리 반복 실행 후 중앙값/p95 출력"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{label:<28} median {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms   rows {len(result['places'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="장소 검색 인덱스 벤치마크")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+
+        start = time.perf_counter()
+        populate(db_path, args.rows)
+        print(f"데이터 적재: {args.rows:,}건 {time.perf_counter() - start:.1f}s")
+
+        conn = connect(db_path)
+        start = time.perf_counter()
+        build_indexes(conn)
+        print(f"인덱스 생성: {time.perf_counter() - start:.1f}s")
+
+        first_page = query_places(conn)
+        measure("최신순 첫 페이지", lambda: query_places(conn), args.repeat)
+        measure("최신순 다음 페이지", lambda: query_places(conn, cursor=first_page["next_cursor"]), args.repeat)
+        measure("카테고리 필터", lambda: query_places(conn, category="카페"), args.repeat)
+        measure("검색(지역) 필터", lambda: query_places(conn, search_id=123), args.repeat)
+        measure("가게명 검색 (trigram)", lambda: query_places(conn, text="점 123456"), args.repeat)
+        measure("주소 검색 (trigram)", lambda: query_places(conn, text="동백죽전대로 77"), args.repeat)
+        measure("넓은 주소 검색 (trigram)", lambda: query_places(conn, text="용인시 기흥구"), args.repeat)
+        measure("짧은 검색어 (LIKE)", lambda: query_places(conn, text="본죽"), args.repeat)
+        measure("바운딩 박스", lambda: query_places(conn, bbox=(37.25, 127.15, 37.26, 127.16)), args.repeat)
+        measure("시 전체 바운딩 박스", lambda: query_places(conn, bbox=(37.15, 127.05, 37.35, 127.30)), args.repeat)
+        measure("넓은 검색어 + 넓은 박스", lambda: query_places(conn, text="스타벅스", bbox=(37.15, 127.05, 37.35, 127.30)), args.repeat)
+        measure("바운딩 박스 + 카테고리", lambda: query_places(conn, bbox=(37.2, 127.1, 37.22, 127.12), category="카페"), args.repeat)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
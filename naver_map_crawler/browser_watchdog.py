@@ -0,0 +1,186 @@
+"""
+브라우저 리소스 감시
+- N회 이동 또는 메모리(RSS) 상한 초과 시 페이지/컨텍스트 재생성
+- 마감 시간을 넘긴(멈춘) 렌더러 강제 종료 후 교체
+- 브라우저별 메모리 사용량과 재시작 횟수 제공
+"""
+import asyncio
+import os
+import signal
+from typing import Dict, Any, Optional, List
+
+from config import WATCHDOG_CONFIG
+
+
+class RendererHungError(Exception):
+    """검색이 마감 시간 안에 끝나지 않아 렌더러를 교체한 경우"""
+
+
+def _read_proc_children() -> Dict[int, List[int]]:
+    """/proc 에서 부모 pid -> 자식 pid 목록 구성 (Linux 전용)"""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # comm 필드에 공백/괄호가 있을 수 있으므로 마지막 ')' 이후를 파싱
+                fields = f.read().rsplit(')', 1)[1].split()
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    return children
+
+
+def process_tree_pids(root_pid: int) -> List[int]:
+    """루트 프로세스와 모든 하위 프로세스 pid"""
+    if not os.path.isdir('/proc'):
+        return [root_pid]
+    children = _read_proc_children()
+    pids, stack = [], [root_pid]
+    while stack:
+        pid = stack.pop()
+        pids.append(pid)
+        stack.extend(children.get(pid, []))
+    return pids
+
+
+def process_rss_mb(pids: List[int]) -> Optional[float]:
+    """프로세스 목록의 RSS 합계 (MB). /proc 가 없으면 None"""
+    if not os.path.isdir('/proc'):
+        return None
+    total_kb = 0
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except OSError:
+            continue
+    return total_kb / 1024
+
+
+def kill_process_tree(root_pid: int):
+    """멈춘 브라우저 프로세스 트리 강제 종료"""
+    for pid in reversed(process_tree_pids(root_pid)):
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except (OSError, AttributeError):
+            continue
+
+
+async def browser_process_pid(browser) -> Optional[int]:
+    """Playwright 브라우저 프로세스 pid (CDP SystemInfo 조회, 실패하면 None)
+
+    브라우저가 멈춘 뒤에는 CDP로 물어볼 수 없으므로 실행 직후에 기록해 둔다
+    """
+    try:
+        cdp = await browser.new_browser_cdp_session()
+        try:
+            info = await cdp.send("SystemInfo.getProcessInfo")
+        finally:
+            await cdp.detach()
+    except Exception:
+        return None
+    return next((process["id"] for process in info["processInfo"] if process.get("type") == "browser"), None)
+
+
+class PageWatchdog:
+    """Playwright 페이지/컨텍스트 수명 관리자 (OptimizedNaverCrawler 용)"""
+
+    def __init__(self, crawler, config: Optional[Dict[str, Any]] = None):
+        self.crawler = crawler
+        self.logger = crawler.logger
+        self.config = dict(WATCHDOG_CONFIG, **(config or {}))
+        self._cdp = None
+
+        self.navigations = 0
+        self.total_navigations = 0
+        self.recycles = 0
+        self.restarts = 0
+        self.hangs = 0
+        self.last_memory_mb: Optional[float] = None
+        self.peak_memory_mb = 0.0
+
+    async def start(self):
+        """새 컨텍스트와 페이지를 만들어 크롤러에 연결"""
+        self.crawler.page = await self.crawler.new_page()
+        self.navigations = 0
+
+    async def memory_mb(self) -> Optional[float]:
+        """브라우저 프로세스 전체 RSS (MB), 불가능하면 페이지 JS 힙 크기"""
+        try:
+            if self._cdp is None:
+                self._cdp = await self.crawler.browser.new_browser_cdp_session()
+            info = await self._cdp.send("SystemInfo.getProcessInfo")
+            rss = process_rss_mb([process["id"] for process in info["processInfo"]])
+            if rss is not None:
+                return rss
+
+            page_cdp = await self.crawler.page.context.new_cdp_session(self.crawler.page)
+            try:
+                await page_cdp.send("Performance.enable")
+                metrics = await page_cdp.send("Performance.getMetrics")
+            finally:
+                await page_cdp.detach()
+            heap = {m["name"]: m["value"] for m in metrics["metrics"]}.get("JSHeapTotalSize")
+            return heap / (1024 * 1024) if heap is not None else None
+        except Exception as e:
+            self._cdp = None
+            self.logger.debug(f"메모리 측정 실패: {e}")
+            return None
+
+    async def maybe_recycle(self):
+        """이동 횟수/메모리 기준을 넘으면 페이지 재생성"""
+        if self.navigations >= self.config["max_navigations"]:
+            await self.recycle(f"이동 {self.navigations}회")
+            return
+
+        memory = await self.memory_mb()
+        if memory is not None:
+            self.last_memory_mb = memory
+            self.peak_memory_mb = max(self.peak_memory_mb, memory)
+            if memory > self.config["max_memory_mb"]:
+                await self.recycle(f"메모리 {memory:.0f}MB")
+
+    async def recycle(self, reason: str):
+        """현재 컨텍스트를 닫고 새 페이지로 교체 (닫기가 멈추면 브라우저 재시작)"""
+        self.logger.info(f"페이지 재생성: {reason}")
+        old_page = self.crawler.page
+        try:
+            if old_page:
+                await asyncio.wait_for(old_page.context.close(), self.config["close_timeout"])
+        except Exception as e:
+            self.logger.warning(f"컨텍스트 정리 실패, 브라우저 재시작: {e}")
+            self._cdp = None
+            await self.crawler.restart_browser()
+            self.restarts += 1
+
+        await self.start()
+        self.recycles += 1
+
+    async def run(self, func, *args):
+        """마감 시간 안에 검색 실행. 초과하면 렌더러를 교체하고 RendererHungError 발생"""
+        await self.maybe_recycle()
+        self.navigations += 1
+        self.total_navigations += 1
+
+        try:
+            return await asyncio.wait_for(func(*args), self.config["job_deadline"])
+        except asyncio.TimeoutError:
+            self.hangs += 1
+            await self.recycle("렌더러 응답 없음")
+            raise RendererHungError(f"{self.config['job_deadline']}초 내에 완료되지 않음: {args}")
+
+    def stats(self) -> Dict[str, Any]:
+        """브라우저 메모리 및 재시작 통계"""
+        return {
+            "navigations": self.total_navigations,
+            "recycles": self.recycles,
+            "restarts": self.restarts,
+            "hangs": self.hangs,
+            "memory_mb": self.last_memory_mb,
+            "peak_memory_mb": self.peak_memory_mb
+        }
@@ -0,0 +1,238 @@
+"""
+네이버 지도 크롤링 결과 변경 감지
+정규화한 장소 레코드의 해시를 저장해 두고 이전 실행과 비교하여
+신규/변경/폐업·누락 장소만 골라낸다
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+from config import OUTPUT_DIR, OUTPUT_FILENAME_FORMAT, DELTA_CONFIG, ANALYTICS_CONFIG, HISTORY_CONFIG, RATING_SERIES_CONFIG
+from utils import generate_filename, save_to_excel, create_output_directory
+
+# 해시 대상 필드 (지역/키워드/크롤링_시간은 매 실행마다 달라질 수 있으므로 제외,
+# 리뷰수는 거의 매번 바뀌므로 rating_series.py에서 따로 추적)
+CONTENT_FIELDS = ['가게명', '주소', '평점', '전화번호', '카테고리']
+
+CHANGE_NEW = "신규"
+CHANGE_CHANGED = "변경"
+CHANGE_CLOSED = "폐업/누락"
+CHANGE_UNCHANGED = "유지"
+
+OUTPUT_MODES = ("full", "changed", "new", "closed", "delta")
+
+
+def normalize_text(value: Any) -> str:
+    """공백 정리 및 문자열 변환"""
+    if value is None:
+        return ""
+    return re.sub(r'\s+', ' ', str(value)).strip()
+
+
+def normalize_record(row: Dict[str, Any]) -> Dict[str, str]:
+    """해시 비교용 장소 레코드 정규화"""
+    return {field: normalize_text(row.get(field)) for field in CONTENT_FIELDS}
+
+
+def make_place_id(row: Dict[str, Any]) -> str:
+    """가게명+주소 기반 장소 식별자"""
+    name = normalize_text(row.get('가게명')).replace(' ', '').lower()
+    address = normalize_text(row.get('주소')).replace(' ', '')
+    return hashlib.sha1(f"{name}|{address}".encode('utf-8')).hexdigest()[:16]
+
+
+def content_hash(row: Dict[str, Any]) -> str:
+    """정규화된 레코드의 내용 해시"""
+    payload = json.dumps(normalize_record(row), ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class SnapshotStore:
+    """장소별 마지막 관측 해시 저장소 (SQLite)"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or DELTA_CONFIG["state_db"]
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            create_output_directory(directory)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS place_snapshots (
+                place_id TEXT PRIMARY KEY,
+                location TEXT,
+                keyword TEXT,
+                content_hash TEXT NOT NULL,
+                record TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                missing_since TEXT
+            )
+        """)
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_place_snapshots_scope ON place_snapshots (location, keyword)"
+        )
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def load_hashes(self) -> Dict[str, Tuple[str, Optional[str]]]:
+        """place_id -> (content_hash, missing_since)"""
+        rows = self.conn.execute("SELECT place_id, content_hash, missing_since FROM place_snapshots")
+        return {place_id: (digest, missing) for place_id, digest, missing in rows}
+
+    def diff(self, data: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """이번 실행 결과를 저장된 해시와 비교해 신규/변경/유지/폐업·누락으로 분류"""
+        known = self.load_hashes()
+        result = {CHANGE_NEW: [], CHANGE_CHANGED: [], CHANGE_UNCHANGED: [], CHANGE_CLOSED: []}
+
+        seen = set()
+        for row in data:
+            place_id = make_place_id(row)
+            if place_id in seen:
+                continue  # 같은 장소가 여러 키워드에서 나온 경우 한 번만 판정
+            seen.add(place_id)
+
+            previous = known.get(place_id)
+            if previous is None:
+                result[CHANGE_NEW].append(row)
+            elif previous[0] != content_hash(row) or previous[1] is not None:
+                result[CHANGE_CHANGED].append(row)
+            else:
+                result[CHANGE_UNCHANGED].append(row)
+
+        # 이번에 크롤링한 범위(지역, 키워드)에 있었는데 보이지 않는 장소
+        for row in self.missing_in_scopes(scopes_of(data), seen):
+            result[CHANGE_CLOSED].append(row)
+
+        return result
+
+    def missing_in_scopes(self, scopes: Iterable[Tuple[str, str]], seen: set) -> List[Dict[str, Any]]:
+        """주어진 범위에서 이번 실행에 관측되지 않은 장소 레코드"""
+        missing = []
+        for location, keyword in scopes:
+            rows = self.conn.execute(
+                "SELECT place_id, record FROM place_snapshots "
+                "WHERE location = ? AND keyword = ? AND missing_since IS NULL",
+                (location, keyword)
+            )
+            for place_id, record in rows:
+                if place_id not in seen:
+                    row = json.loads(record)
+                    row.update({'지역': location, '키워드': keyword})
+                    missing.append(row)
+        return missing
+
+    def commit(self, data: List[Dict[str, Any]], closed: Iterable[Dict[str, Any]] = ()):
+        """이번 실행 결과를 마지막 관측 상태로 저장"""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO place_snapshots
+                    (place_id, location, keyword, content_hash, record, first_seen, last_seen, missing_since)
+                VALUES (?, ?, ?, ?, ?, ?, ?, NULL)
+                ON CONFLICT(place_id) DO UPDATE SET
+                    location = excluded.location,
+                    keyword = excluded.keyword,
+                    content_hash = excluded.content_hash,
+                    record = excluded.record,
+                    last_seen = excluded.last_seen,
+                    missing_since = NULL
+            """, [
+                (make_place_id(row), row.get('지역'), row.get('키워드'), content_hash(row),
+                 json.dumps(normalize_record(row), ensure_ascii=False), now, now)
+                for row in data
+            ])
+            self.conn.executemany(
+                "UPDATE place_snapshots SET missing_since = ? WHERE place_id = ? AND missing_since IS NULL",
+                [(now, make_place_id(row)) for row in closed]
+            )
+
+    def close(self):
+        self.conn.close()
+
+
+def scopes_of(data: List[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """결과에 포함된 (지역, 키워드) 범위 목록"""
+    return sorted({(row.get('지역'), row.get('키워드')) for row in data})
+
+
+def select_rows(delta: Dict[str, List[Dict[str, Any]]], data: List[Dict[str, Any]], mode: str) -> List[Dict[str, Any]]:
+    """출력 모드에 맞는 행 선택 (변경_구분 컬럼 포함)"""
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"알 수 없는 출력 모드: {mode}")
+
+    if mode == "full":
+        return data
+
+    kinds = {
+        "changed": [CHANGE_CHANGED],
+        "new": [CHANGE_NEW],
+        "closed": [CHANGE_CLOSED],
+        "delta": [CHANGE_NEW, CHANGE_CHANGED, CHANGE_CLOSED]
+    }[mode]
+
+    rows = []
+    for kind in kinds:
+        rows.extend(dict(row, 변경_구분=kind) for row in delta[kind])
+    return rows
+
+
+def save_crawl_output(data: List[Dict[str, Any]], logger, mode: Optional[str] = None,
+                      db_path: Optional[str] = None) -> Optional[str]:
+    """출력 모드에 따라 전체 또는 변경분만 엑셀로 저장하고 해시 저장소 갱신"""
+    mode = mode or DELTA_CONFIG["mode"]
+
+    with SnapshotStore(db_path) as store:
+        delta = store.diff(data)
+        rows = select_rows(delta, data, mode)
+
+        logger.info(
+            f"변경 감지: 신규 {len(delta[CHANGE_NEW])}, 변경 {len(delta[CHANGE_CHANGED])}, "
+            f"폐업/누락 {len(delta[CHANGE_CLOSED])}, 유지 {len(delta[CHANGE_UNCHANGED])}"
+        )
+
+        filepath = None
+        if rows:
+            if mode == "full":
+                filename = generate_filename(OUTPUT_FILENAME_FORMAT)
+            else:
+                filename = generate_filename(DELTA_CONFIG["filename_format"].format(mode=mode, date="{date}"))
+            filepath = save_to_excel(rows, filename, OUTPUT_DIR)
+        else:
+            logger.info(f"출력 모드 '{mode}'에 해당하는 변경 사항이 없습니다.")
+
+        # 파일 저장이 끝난 뒤에 상태를 갱신해야 실패 시 다음 실행에서 다시 감지됨
+        store.commit(data, closed=delta[CHANGE_CLOSED])
+
+    if HISTORY_CONFIG["enabled"]:
+        # 출력 모드와 관계없이 전체 결과를 이력으로 보관
+        from history_store import append_run
+        try:
+            append_run(data, logger)
+        except Exception as e:
+            logger.warning(f"이력 저장 실패: {e}")
+
+    if RATING_SERIES_CONFIG["enabled"]:
+        from rating_series import record_run
+        try:
+            record_run(data, logger)
+        except Exception as e:
+            logger.warning(f"평점/리뷰 수 시계열 저장 실패: {e}")
+
+    if ANALYTICS_CONFIG["update_on_crawl"]:
+        # amenity_analytics/history_store가 이 모듈을 import하므로 순환 참조를 피해 지연 import
+        from amenity_analytics import update_from_rows
+        try:
+            update_from_rows(select_rows(delta, data, "delta"), logger)
+        except Exception as e:
+            logger.warning(f"편의시설 집계 갱신 실패: {e}")
+
+    return filepath
@@ -0,0 +1,153 @@
+"""
+네이버 지도 크롤러 적응형 동시성 제어
+검색 지연(p95), 오류율, 차단율을 보고 동시에 실행할 검색 수를 AIMD 방식으로 조절
+- 지표가 양호하고 현재 한도를 다 쓰고 있으면 increase_step만큼 증가
+- 지표가 나빠지면 decrease_factor를 곱해 감소 (차단은 즉시 반영)
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional
+
+from config import CONCURRENCY_CONFIG, LOGGING_CONFIG
+from utils import setup_logging
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+class AdaptiveConcurrency:
+    """AIMD 동시성 한도 (검색을 보내기 전에 acquire, 끝나면 release + record)"""
+
+    def __init__(self, initial: Optional[int] = None, maximum: Optional[int] = None,
+                 config: Optional[Dict[str, Any]] = None):
+        self.config = dict(CONCURRENCY_CONFIG, **(config or {}))
+        self.logger = setup_logging(LOGGING_CONFIG)
+        self.minimum = self.config["min"]
+        self.maximum = max(self.minimum, maximum if maximum is not None else self.config["max"])
+        self.target = min(self.maximum, max(self.minimum, initial or self.config["initial"]))
+
+        self.in_flight = 0
+        self._waiters: deque = deque()
+        self._saturated = False  # 마지막 판단 이후 한도까지 사용한 적이 있는지
+        self._samples: deque = deque(maxlen=max(self.config["min_samples"] * 5, 50))
+        self._stale = 0  # 감소 직전에 이미 실행 중이던 검색 수 (그 결과는 새 창에 넣지 않음)
+        self._last_adjusted = time.monotonic()
+        self.history: deque = deque(maxlen=self.config["history"])
+        self._log_change(self.target, "초기값", {})
+
+    # ---- 슬롯 ------------------------------------------------------------
+
+    async def acquire(self):
+        """현재 목표값 미만이 될 때까지 대기 후 슬롯 확보"""
+        while self.in_flight >= self.target:
+            self._saturated = True
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        self.in_flight += 1
+        if self.in_flight >= self.target:
+            self._saturated = True
+
+    def release(self):
+        self.in_flight = max(0, self.in_flight - 1)
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _wake(self):
+        free = self.target - self.in_flight
+        while free > 0 and self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                free -= 1
+
+    # ---- 지표 기록 및 조절 -------------------------------------------------
+
+    def record(self, latency: float, error: bool = False, blocked: bool = False):
+        """검색 1건 결과 기록 후 필요하면 목표값 조절 (슬롯을 반납하기 전에 호출)"""
+        if self._stale > 0:
+            self._stale -= 1
+            return
+        self._samples.append((latency, error, blocked))
+        self._evaluate(force=blocked)
+
+    def metrics(self) -> Dict[str, float]:
+        samples = list(self._samples)
+        count = len(samples)
+        return {
+            "samples": count,
+            "latency_p95": round(percentile([s[0] for s in samples if not s[1]], 0.95), 3),
+            "error_rate": round(sum(s[1] for s in samples) / count, 3) if count else 0.0,
+            "block_rate": round(sum(s[2] for s in samples) / count, 3) if count else 0.0
+        }
+
+    def _evaluate(self, force: bool = False):
+        metrics = self.metrics()
+        if metrics["samples"] < self.config["min_samples"] and not force:
+            return
+
+        reasons = []
+        if metrics["block_rate"] > self.config["max_block_rate"]:
+            reasons.append(f"차단율 {metrics['block_rate']:.0%}")
+        if metrics["error_rate"] > self.config["max_error_rate"]:
+            reasons.append(f"오류율 {metrics['error_rate']:.0%}")
+        if metrics["latency_p95"] > self.config["latency_p95_target"]:
+            reasons.append(f"p95 {metrics['latency_p95']:.1f}s")
+
+        if reasons:
+            decreased = max(self.minimum, math.floor(self.target * self.config["decrease_factor"]))
+            self._set_target(decreased, "감소: " + ", ".join(reasons), metrics)
+            # 같은 표본으로 연속 감소하지 않도록 새 창에서 다시 측정
+            self._samples.clear()
+            # record는 슬롯을 반납하기 전에 호출되므로 지금 기록 중인 검색은 제외
+            self._stale = max(0, self.in_flight - 1)
+            return
+
+        if force or time.monotonic() - self._last_adjusted < self.config["increase_interval"]:
+            return
+        if self._saturated and self.target < self.maximum:
+            self._set_target(min(self.maximum, self.target + self.config["increase_step"]), "증가", metrics)
+        else:
+            self._last_adjusted = time.monotonic()
+        self._saturated = False
+
+    def _set_target(self, target: int, reason: str, metrics: Dict[str, float]):
+        self._last_adjusted = time.monotonic()
+        if target == self.target:
+            return
+        self.logger.info(f"동시성 목표 {self.target} -> {target} ({reason}, {metrics})")
+        self.target = target
+        self._log_change(target, reason, metrics)
+        self._wake()
+
+    def _log_change(self, target: int, reason: str, metrics: Dict[str, float]):
+        self.history.append({"time": time.time(), "target": target, "reason": reason, **metrics})
+
+    def report(self) -> Dict[str, Any]:
+        """현재 목표값, 실행 중 수, 지표, 변경 이력"""
+        return {
+            "target": self.target,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "range": (self.minimum, self.maximum),
+            **self.metrics(),
+            "history": list(self.history)
+        }
@@ -30,16 +30,6 @@ BROWSER_CONFIG = {
 LOCATIONS = ["용인시 처인구", "용인시 기흥구"]
 KEYWORDS = ["음식점", "카페"]
 
-# DOM 셀렉터
-SELECTORS = {
-    "search_results": ".place_bluelink .moreview",
-    "place_name": ".place_bluelink .TYaxT",
-    "address": ".place_bluelink .LDgIH",
-    "rating": ".place_bluelink .PXMot",
-    "phone": ".place_bluelink .dry01",
-    "category": ".place_bluelink .KCMnt"
-}
-
 # 출력 설정
 OUTPUT_DIR = "data"
 OUTPUT_FILENAME_FORMAT = "naver_map_data_{date}.xlsx"
@@ -55,4 +45,177 @@ LOGGING_CONFIG = {
 RATE_LIMIT = {
     "requests_per_minute": 30,
     "concurrent_requests": 2
-}
\ No newline at end of file
+}
+
+# Selenium 드라이버 풀 설정
+SELENIUM_POOL_CONFIG = {
+    "drivers": 2,               # 동시에 띄울 uc.Chrome 개수
+    "page_settle_range": (3, 6), # 페이지 이동 후 비동기 대기 (초)
+    "stream_buffer": 100        # crawl_iter 이벤트 큐 크기 (가득 차면 워커가 소비자를 기다림)
+}
+
+# 크롤링 스케줄러 설정
+SCHEDULER_CONFIG = {
+    "workers": RATE_LIMIT["concurrent_requests"],
+    "nightly_interval": 24 * 60 * 60,  # 야간 반복 주기 (초)
+    "staleness_cap_hours": 72,         # 오래된 쿼리 가산점 상한
+    "wait_history": 1000,              # 대기 시간 통계 보관 개수
+    "rescore_interval": 60,            # 준비 큐 우선순위 재계산 간격 (초)
+    "engine": "selenium",              # 서비스 모드 공유 브라우저 (selenium 드라이버 풀 | playwright)
+    "host": "127.0.0.1",
+    "port": 8765,                      # server.js의 SCHEDULER_URL과 맞춤
+    "interactive_timeout": 120         # 즉시 조회 마감 시간 (초)
+}
+
+# 변경 감지(델타 출력) 설정
+DELTA_CONFIG = {
+    "mode": "full",  # full | changed | new | closed | delta(new+changed+closed)
+    "state_db": os.path.join(OUTPUT_DIR, "crawl_state.db"),
+    "filename_format": "naver_map_{mode}_{date}.xlsx"
+}
+
+# 웹 앱 장소 DB (server.js와 공유) 및 검색 인덱스 설정
+PLACE_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "database.db")
+PLACE_QUERY_CONFIG = {
+    "page_size": 50,
+    "max_page_size": 500,
+    "probe_limit": 2000   # FTS/R*Tree 매칭이 이 이상이면 조인 대신 최신순 인덱스 + EXISTS
+}
+
+# 브라우저 리소스 감시 설정
+WATCHDOG_CONFIG = {
+    "max_navigations": 50,   # 페이지/컨텍스트(드라이버) 재생성 주기
+    "max_memory_mb": 1500,   # 브라우저 프로세스 트리 RSS 상한
+    "job_deadline": 90,      # 검색 1건 최대 소요 시간 (초), 초과 시 렌더러 교체
+    "close_timeout": 10      # 멈춘 페이지/드라이버 정리 대기 시간 (초)
+}
+
+# 프록시 풀 설정 (proxies가 비어 있으면 프록시 없이 직접 연결)
+# 예: {"server": "http://10.0.0.2:3128", "username": "user", "password": "pass"}
+# Chrome(--proxy-server)은 인증을 지원하지 않으므로 Selenium 백엔드는 IP 허용 방식 프록시 사용
+PROXY_CONFIG = {
+    "proxies": [],
+    "requests_per_minute": RATE_LIMIT["requests_per_minute"],  # 프록시별 요청 예산
+    "ewma_alpha": 0.2,            # 지연/오류/차단율 지수 이동 평균 가중치
+    "latency_target": 5.0,        # 이 지연(초) 이하면 지연 감점 없음
+    "min_samples": 5,             # 격리 판정 전 최소 요청 수
+    "quarantine_threshold": 0.4,  # 건강 점수가 이 값 미만이면 격리
+    "quarantine_seconds": 300     # 격리 시간 (반복 격리 시 2배씩 증가)
+}
+
+# 차단(캡차 등) 페이지 판별 문구
+BLOCK_MARKERS = ["captcha", "자동입력 방지", "비정상적인 접근", "일시적으로 제한"]
+
+# 쿼리 목록 파일 (없으면 위의 LOCATIONS/KEYWORDS 사용)
+QUERY_FILES = {
+    "locations": os.path.join(os.path.dirname(os.path.abspath(__file__)), "queries", "locations.txt"),
+    "keywords": os.path.join(os.path.dirname(os.path.abspath(__file__)), "queries", "keywords.txt"),
+    "tiles": os.path.join(os.path.dirname(os.path.abspath(__file__)), "queries", "tiles.txt")  # 분산 크롤링용 "지역|세부지역"
+}
+
+# 쿼리 계획 설정
+PLANNER_CONFIG = {
+    "enabled": False,          # True면 이력 기반으로 중복·저수확 쿼리 제외
+    "budget": None,            # 실행할 최대 쿼리 수 (None이면 제한 없음)
+    "min_marginal_yield": 1,   # 예상 신규 장소가 이보다 적은 쿼리는 제외
+    "unknown_query_yield": 20, # 이력이 없는 쿼리의 예상 신규 장소 수 (탐색용)
+    "overlap_threshold": 0.8,  # 이 비율 이상 겹치는 쿼리 쌍을 중복으로 보고
+    "explore_share": 0.1,      # 제외된 쿼리 중 다시 실행해 이력을 갱신할 비율 (오래된 순, 예산과 별도)
+    "history_days": 90         # 이 기간 동안 다시 관측되지 않은 쿼리별 장소/실행 기록 삭제
+}
+
+# 원본 페이지 아카이브 설정 (셀렉터 변경 시 재크롤링 없이 재추출)
+ARCHIVE_CONFIG = {
+    "enabled": True,
+    "dir": os.path.join(OUTPUT_DIR, "archive"),
+    "compression_level": 6,
+    "retention_days": 180,  # 이보다 오래된 페이지 기록 삭제 (None이면 제한 없음)
+    "max_size_mb": 2048     # 압축 저장 용량 상한, 넘으면 오래된 페이지부터 삭제 (None이면 제한 없음)
+}
+
+# 장소 목록 DOM 셀렉터 (크롤러 추출과 재추출 공용, 항목 내부 필드는 item 기준 상대 셀렉터)
+EXTRACT_SELECTORS = {
+    "item": ".place_bluelink",
+    "name": ".TYaxT",
+    "address": ".LDgIH",
+    "rating": ".PXMot .place_score .average",
+    "reviews": ".PXMot .h69bs",  # "리뷰 1,234" / "리뷰 999+"
+    "phone": ".dry01",
+    "category": ".KCMnt"
+}
+
+# 쿼리별 트레이스 설정 (Chrome trace-event JSON, chrome://tracing / Perfetto에서 열기)
+TRACE_CONFIG = {
+    "enabled": False,
+    "sample_rate": 0.05,  # 트레이스를 남길 쿼리 비율 (0~1)
+    "output_dir": os.path.join(OUTPUT_DIR, "traces")
+}
+
+# 주소 정규화/지오코딩 인덱스 설정
+ADDRESS_CONFIG = {
+    "reference_file": os.path.join("reference", "address_reference.csv"),  # 주소 참조 CSV (UTF-8)
+    "index_file": os.path.join(OUTPUT_DIR, "address_index.db"),
+    "cache_size": 200_000  # LRU 캐시 항목 수
+}
+
+# 동네 편의시설 집계 설정 (부동산 매물 점수용)
+ANALYTICS_CONFIG = {
+    "db_path": os.path.join(OUTPUT_DIR, "amenity_analytics.db"),
+    "update_on_crawl": False,  # True면 크롤링 후 변경분으로 집계를 증분 갱신
+    "grid_size_m": 500,  # 격자 셀 한 변 길이 (미터)
+    "grid_origin": (37.0, 127.0),  # 격자 기준점 (위도, 경도)
+    "rating_bins": [0.0, 3.0, 3.5, 4.0, 4.5, 5.01],  # 평점 구간 경계
+    "radius_m": 500,  # 매물 반경 내 편의시설 수 집계 기준
+    "block_elements": 8_000_000  # 거리 계산 시 한 번에 만드는 행렬 원소 수 상한
+}
+
+# 장소 엔티티 통합(퍼지 중복 제거) 설정
+ENTITY_CONFIG = {
+    "db_path": os.path.join(OUTPUT_DIR, "entities.db"),  # 장소 레코드 -> 엔티티 ID 매핑 (ID 유지용)
+    "geohash_precision": 6,  # 블로킹 셀 크기 (6자리 ≈ 1.2km x 0.6km, 인접 8셀까지 비교)
+    "max_postings": 300,  # 블록 안에서 이보다 흔한 글자 n-gram은 후보 생성에 사용하지 않음
+    "min_name_similarity": 0.5,  # 상호명 n-gram을 이 비율 이상 공유해야 후보로 비교
+    "match_threshold": 0.75,  # 이 점수 이상이면 같은 장소로 판단
+    "near_distance_m": 150  # 이 거리 이내면 위치 일치로 판단
+}
+
+# 크롤링 이력 저장소 설정 (Parquet, 크롤링 날짜/지역/키워드 파티션)
+HISTORY_CONFIG = {
+    "enabled": True,  # 크롤링 실행마다 전체 결과를 이력 저장소에 추가
+    "dir": os.path.join(OUTPUT_DIR, "history"),
+    "date_partition": "%Y-%m",  # crawl_date 파티션 단위 (월별 디렉토리, 행에는 정확한 크롤링 시각 저장)
+    "compact_min_files": 4,  # 파티션의 파일 수가 이 이상이면 압축 대상
+    "row_group_size": 65536
+}
+
+# 장소별 평점/리뷰 수 시계열 (값이 바뀐 경우만 기록)
+RATING_SERIES_CONFIG = {
+    "enabled": True,  # 크롤링 실행마다 변경분 기록
+    "db_path": os.path.join(OUTPUT_DIR, "rating_series.db"),
+    "chunk_points": 256  # 청크 하나에 묶는 변경 시점 수 (추가 시 마지막 청크만 다시 인코딩)
+}
+
+# 적응형 동시성 제어 (AIMD: 지표가 양호하면 1씩 늘리고 나빠지면 절반으로)
+CONCURRENCY_CONFIG = {
+    "initial": RATE_LIMIT["concurrent_requests"],
+    "min": 1,
+    "max": 8,  # 드라이버 풀은 드라이버 수가 상한
+    "increase_step": 1,
+    "decrease_factor": 0.5,
+    "latency_p95_target": 20.0,  # 검색 1건 p95 지연 상한 (초)
+    "max_error_rate": 0.1,
+    "max_block_rate": 0.05,
+    "min_samples": 10,  # 판단에 필요한 최소 표본 수
+    "increase_interval": 60,  # 증가 판단 최소 간격 (초)
+    "history": 500  # 보관할 목표값 변경 이력 수
+}
+
+# 분산 크롤링 설정 (코디네이터 1개 + 워커 노드 여러 개가 같은 브로커를 공유)
+DISTRIBUTED_CONFIG = {
+    "broker_url": "sqlite:///" + os.path.join(OUTPUT_DIR, "broker.db"),  # SQLite는 한 머신 전용, 여러 노드면 네트워크 브로커 등록
+    "lease_seconds": 120,  # 작업 임대 시간. 하트비트가 끊기면 만료 후 다른 노드에 재배정
+    "heartbeat_interval": 30,
+    "max_attempts": 3,  # 임대 횟수 상한 (초과하면 실패 처리)
+    "requests_per_minute": RATE_LIMIT["requests_per_minute"],  # 전체 노드 합산 요청 예산
+    "poll_interval": 2  # 작업이 없을 때 재확인 간격 (초)
+}
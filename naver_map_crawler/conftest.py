@@ -0,0 +1,2 @@
+# 실제 브라우저를 띄우는 수동 실행 스크립트는 pytest 수집에서 제외 (python test_crawler.py로 실행)
+collect_ignore = ["test_crawler.py", "test_selenium.py"]
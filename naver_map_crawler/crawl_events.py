@@ -0,0 +1,37 @@
+"""
+크롤링 스트리밍 이벤트
+crawl_iter()가 검색이 끝날 때마다 내보내는 결과 행 / 진행 상황 이벤트
+"""
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional
+
+
+@dataclass
+class RowEvent:
+    """포맷팅된 결과 행 하나"""
+    index: int      # 쿼리 순번 (입력 순서)
+    location: str
+    keyword: str
+    row: Dict[str, Any]
+
+    kind = "row"
+
+
+@dataclass
+class ProgressEvent:
+    """쿼리 하나의 검색 완료 (해당 쿼리의 RowEvent들 뒤에 옴)"""
+    index: int
+    location: str
+    keyword: str
+    found: int          # 이 쿼리에서 나온 행 수
+    completed: int      # 지금까지 끝난 쿼리 수
+    total: int          # 전체 쿼리 수
+    elapsed: float      # 시작 후 경과 시간 (초)
+    error: Optional[str] = None  # 재시도까지 실패한 경우 마지막 오류
+
+    kind = "progress"
+
+
+def event_to_dict(event) -> Dict[str, Any]:
+    """웹 앱(SSE/WebSocket) 전송용 직렬화"""
+    return {"type": event.kind, **asdict(event)}
@@ -4,20 +4,31 @@ Playwright를 사용한 최적화된 웹 크롤링 구현
 """
 import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, Union
 from playwright.async_api import async_playwright, Browser, Page
 from urllib.parse import quote
 
 from config import (
     BASE_URL, DELAY_RANGE, MAX_RETRIES, BROWSER_CONFIG,
-    LOCATIONS, KEYWORDS, SELECTORS, OUTPUT_DIR,
-    OUTPUT_FILENAME_FORMAT, LOGGING_CONFIG, RATE_LIMIT
+    EXTRACT_SELECTORS, OUTPUT_DIR,
+    LOGGING_CONFIG, RATE_LIMIT, WATCHDOG_CONFIG, BLOCK_MARKERS,
+    ARCHIVE_CONFIG
 )
 from utils import (
     setup_logging, random_delay, validate_search_params,
-    extract_text_content, format_crawling_result,
-    create_output_directory, generate_filename, save_to_excel
+    extract_text_content, format_crawling_result, PLACE_FIELDS,
+    create_output_directory, is_blocked_content
 )
+from change_detection import save_crawl_output
+from query_planner import all_queries, plan_queries, record_query_results
+from browser_watchdog import PageWatchdog, browser_process_pid, kill_process_tree
+from proxy_pool import ProxyPool, Proxy
+from page_archive import PageArchive
+from tracing import (
+    Tracer, NULL_TRACE, enable_playwright_metrics, start_playwright_metrics, collect_playwright_metrics
+)
+from crawl_events import RowEvent, ProgressEvent
 
 class OptimizedNaverCrawler:
     """네이버 지도 크롤러 최적화 클래스"""
@@ -25,7 +36,14 @@ class OptimizedNaverCrawler:
     def __init__(self):
         self.logger = setup_logging(LOGGING_CONFIG)
         self.browser: Optional[Browser] = None
+        self.browser_pid: Optional[int] = None  # 닫기가 멈췄을 때 강제 종료할 프로세스 트리의 루트
         self.page: Optional[Page] = None
+        self.watchdog = PageWatchdog(self)
+        self.proxy_pool: Optional[ProxyPool] = ProxyPool.from_config()
+        self.proxy: Optional[Proxy] = None
+        self.archive: Optional[PageArchive] = PageArchive() if ARCHIVE_CONFIG["enabled"] else None
+        self.tracer = Tracer()
+        self.metrics_cdp = None  # 페이지 생성 때 Performance.enable을 보낸 CDP 세션
         self.collected_data = []
 
     async def __aenter__(self):
@@ -41,22 +59,8 @@ class OptimizedNaverCrawler:
         """브라우저 초기화"""
         try:
             self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(
-                headless=BROWSER_CONFIG["headless"],
-                args=BROWSER_CONFIG["args"]
-            )
-
-            self.page = await self.browser.new_page(
-                viewport=BROWSER_CONFIG["viewport"],
-                user_agent=BROWSER_CONFIG["user_agent"]
-            )
-
-            # 추가 안티 디텍션 설정
-            await self.page.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined,
-                });
-            """)
+            await self.launch_browser()
+            await self.watchdog.start()
 
             self.logger.info("브라우저 초기화 완료")
 
@@ -64,6 +68,55 @@ class OptimizedNaverCrawler:
             self.logger.error(f"브라우저 초기화 실패: {e}")
             raise
 
+    async def launch_browser(self):
+        """Chromium 실행"""
+        launch_options = {}
+        if self.proxy_pool:
+            # 컨텍스트별 프록시를 쓰려면 브라우저 실행 시 자리표시 프록시가 필요
+            launch_options["proxy"] = {"server": "http://per-context"}
+
+        self.browser = await self.playwright.chromium.launch(
+            headless=BROWSER_CONFIG["headless"],
+            args=BROWSER_CONFIG["args"],
+            **launch_options
+        )
+        self.browser_pid = await browser_process_pid(self.browser)
+
+    async def restart_browser(self):
+        """응답 없는 브라우저를 버리고 새로 실행 (닫기가 멈추면 프로세스 트리 강제 종료)"""
+        try:
+            await asyncio.wait_for(self.browser.close(), WATCHDOG_CONFIG["close_timeout"])
+        except Exception as e:
+            self.logger.warning(f"기존 브라우저 종료 실패: {e}")
+            if self.browser_pid is not None:
+                kill_process_tree(self.browser_pid)
+                self.logger.warning(f"브라우저 프로세스 강제 종료: pid {self.browser_pid}")
+        await self.launch_browser()
+
+    async def new_page(self) -> Page:
+        """새 컨텍스트와 페이지 생성 (재생성 시에도 동일한 설정 적용)"""
+        context_options = {}
+        if self.proxy:
+            context_options["proxy"] = self.proxy.playwright_proxy()
+
+        context = await self.browser.new_context(
+            viewport=BROWSER_CONFIG["viewport"],
+            user_agent=BROWSER_CONFIG["user_agent"],
+            **context_options
+        )
+        page = await context.new_page()
+
+        # 추가 안티 디텍션 설정
+        await page.add_init_script("""
+            Object.defineProperty(navigator, 'webdriver', {
+                get: () => undefined,
+            });
+        """)
+
+        # 성능 지표는 enable 이후부터 쌓이므로 페이지를 만들 때 켜 둠
+        self.metrics_cdp = await enable_playwright_metrics(page) if self.tracer.enabled else None
+        return page
+
     async def search_places(self, location: str, keyword: str) -> List[Dict[str, Any]]:
         """특정 지역과 키워드로 장소 검색"""
         if not validate_search_params(location, keyword):
@@ -73,101 +126,172 @@ class OptimizedNaverCrawler:
         search_query = f"{location} {keyword}"
         search_url = f"{BASE_URL}/{quote(search_query)}"
 
+        trace = self.tracer.start(search_query, location=location, keyword=keyword)
+
         try:
             self.logger.info(f"검색 시작: {search_query}")
+            await start_playwright_metrics(self.metrics_cdp, trace)
 
             # 페이지 이동 및 로딩 대기
-            await self.page.goto(search_url, wait_until='networkidle', timeout=30000)
-            await random_delay(*DELAY_RANGE)
+            with trace.span("navigate", url=search_url):
+                await self.page.goto(search_url, wait_until='networkidle', timeout=30000)
 
             # 검색 결과 대기
-            try:
-                await self.page.wait_for_selector('.place_bluelink', timeout=10000)
-            except:
+            with trace.span("wait"):
+                await random_delay(*DELAY_RANGE)
+                try:
+                    await self.page.wait_for_selector(EXTRACT_SELECTORS["item"], timeout=10000)
+                    found = True
+                except Exception:
+                    found = False
+
+            # 셀렉터가 바뀌어도 재추출할 수 있도록 원본 페이지 보관
+            with trace.span("archive"):
+                await self.archive_page(location, keyword, search_url)
+
+            if found:
+                # 데이터 추출
+                places = await self.extract_place_data(location, keyword, trace)
+                self.logger.info(f"{search_query} 검색 완료: {len(places)}개 결과")
+            else:
                 self.logger.warning(f"검색 결과를 찾을 수 없음: {search_query}")
-                return []
-
-            # 데이터 추출
-            places = await self.extract_place_data(location, keyword)
-            self.logger.info(f"{search_query} 검색 완료: {len(places)}개 결과")
+                places = []
 
+            # 추출까지 포함한 메인 스레드 시간을 보도록 마지막에 수집
+            await collect_playwright_metrics(self.page, self.metrics_cdp, trace)
             return places
 
         except Exception as e:
+            # 네비게이션/프록시 오류는 빈 결과와 구분되도록 호출자(프록시 풀, 재시도)에 전달
             self.logger.error(f"검색 실패 - {search_query}: {e}")
-            return []
+            raise
 
-    async def extract_place_data(self, location: str, keyword: str) -> List[Dict[str, Any]]:
-        """페이지에서 장소 데이터 추출"""
-        places = []
+        finally:
+            trace_path = trace.save()
+            if trace_path:
+                self.logger.info(f"트레이스 저장: {trace_path}")
 
+    async def archive_page(self, location: str, keyword: str, url: str):
+        """현재 페이지 HTML을 아카이브에 저장"""
+        if not self.archive:
+            return
         try:
-            # 장소 목록 요소들 가져오기
-            place_elements = await self.page.query_selector_all('.place_bluelink')
-
-            for element in place_elements[:20]:  # 최대 20개 결과만
-                try:
-                    place_data = {}
-
-                    # 각 데이터 필드 추출
-                    name_element = await element.query_selector('.TYaxT')
-                    place_data["name"] = extract_text_content(name_element)
-
-                    address_element = await element.query_selector('.LDgIH')
-                    place_data["address"] = extract_text_content(address_element)
-
-                    rating_element = await element.query_selector('.PXMot .place_score .average')
-                    place_data["rating"] = extract_text_content(rating_element)
+            self.archive.put(await self.page.content(), location, keyword, url)
+        except Exception as e:
+            self.logger.warning(f"페이지 보관 실패: {e}")
 
-                    phone_element = await element.query_selector('.dry01')
-                    place_data["phone"] = extract_text_content(phone_element)
+    async def extract_place_data(self, location: str, keyword: str, trace=NULL_TRACE) -> List[Dict[str, Any]]:
+        """페이지에서 장소 데이터 추출"""
+        raw_places = []
 
-                    category_element = await element.query_selector('.KCMnt')
-                    place_data["category"] = extract_text_content(category_element)
+        # 개별 장소 오류는 _extract_raw_places에서 건너뛰고, 페이지 자체 오류는 호출자에 전달
+        with trace.span("extract"):
+            await self._extract_raw_places(raw_places)
 
-                    # 기본 데이터가 있을 때만 추가
-                    if place_data["name"]:
-                        formatted_data = format_crawling_result(location, keyword, place_data)
-                        places.append(formatted_data)
+        with trace.span("format", count=len(raw_places)):
+            return [format_crawling_result(location, keyword, place_data) for place_data in raw_places]
 
-                except Exception as e:
-                    self.logger.warning(f"개별 장소 데이터 추출 실패: {e}")
-                    continue
+    async def _extract_raw_places(self, raw_places: List[Dict[str, Any]]):
+        """장소 목록 요소에서 필드 텍스트 추출 (포맷팅 전, 셀렉터는 EXTRACT_SELECTORS)"""
+        # 장소 목록 요소들 가져오기
+        place_elements = await self.page.query_selector_all(EXTRACT_SELECTORS["item"])
 
-        except Exception as e:
-            self.logger.error(f"장소 데이터 추출 실패: {e}")
+        for element in place_elements[:20]:  # 최대 20개 결과만
+            try:
+                # 각 데이터 필드 추출
+                place_data = {}
+                for field in PLACE_FIELDS:
+                    field_element = await element.query_selector(EXTRACT_SELECTORS[field])
+                    place_data[field] = extract_text_content(field_element)
+
+                # 기본 데이터가 있을 때만 추가
+                if place_data["name"]:
+                    raw_places.append(place_data)
+
+            except Exception as e:
+                self.logger.warning(f"개별 장소 데이터 추출 실패: {e}")
+                continue
+
+    async def detect_block(self) -> bool:
+        """현재 페이지가 캡차/접근 제한 페이지인지 확인"""
+        try:
+            return is_blocked_content(await self.page.content(), BLOCK_MARKERS)
+        except Exception:
+            return False
+
+    async def search_with_proxy(self, location: str, keyword: str) -> List[Dict[str, Any]]:
+        """프록시 풀이 설정되어 있으면 프록시를 배정받아 검색하고 결과를 풀에 반영"""
+        if not self.proxy_pool:
+            return await self.watchdog.run(self.search_places, location, keyword)
+
+        proxy = await self.proxy_pool.acquire(prefer=self.proxy)
+        if proxy is not self.proxy:
+            # 프록시가 바뀌면 쿠키도 새로 시작하도록 컨텍스트 교체
+            self.proxy = proxy
+            await self.watchdog.recycle(f"프록시 변경: {proxy.server}")
+
+        start = time.monotonic()
+        try:
+            places = await self.watchdog.run(self.search_places, location, keyword)
+        except Exception:
+            self.proxy_pool.record(proxy, time.monotonic() - start, error=True)
+            raise
 
+        blocked = not places and await self.detect_block()
+        self.proxy_pool.record(proxy, time.monotonic() - start, blocked=blocked)
         return places
 
-    async def crawl_all_locations(self) -> List[Dict[str, Any]]:
-        """모든 지역과 키워드 조합으로 크롤링"""
-        all_data = []
-
-        for location in LOCATIONS:
-            for keyword in KEYWORDS:
-                retry_count = 0
-
-                while retry_count < MAX_RETRIES:
-                    try:
-                        places = await self.search_places(location, keyword)
-                        all_data.extend(places)
-                        break  # 성공시 재시도 루프 종료
-
-                    except Exception as e:
-                        retry_count += 1
-                        self.logger.warning(f"재시도 {retry_count}/{MAX_RETRIES} - {location} {keyword}: {e}")
+    async def search_with_retries(self, location: str, keyword: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """재시도를 포함한 검색. (결과, 최종 실패 시 마지막 오류) 반환"""
+        retry_count = 0
 
-                        if retry_count < MAX_RETRIES:
-                            await random_delay(5, 10)  # 재시도 전 더 긴 대기
-                        else:
-                            self.logger.error(f"최대 재시도 횟수 초과: {location} {keyword}")
+        while retry_count < MAX_RETRIES:
+            try:
+                return await self.search_with_proxy(location, keyword), None
+
+            except Exception as e:
+                retry_count += 1
+                self.logger.warning(f"재시도 {retry_count}/{MAX_RETRIES} - {location} {keyword}: {e}")
+
+                if retry_count < MAX_RETRIES:
+                    await random_delay(5, 10)  # 재시도 전 더 긴 대기
+                else:
+                    self.logger.error(f"최대 재시도 횟수 초과: {location} {keyword}")
+                    return [], str(e)
+
+        return [], None
+
+    async def crawl_iter(self, queries: Optional[List[Tuple[str, str]]] = None
+                         ) -> AsyncIterator[Union[RowEvent, ProgressEvent]]:
+        """검색이 끝날 때마다 결과 행(RowEvent)과 진행 이벤트(ProgressEvent)를 내보내는 비동기 제너레이터
+
+        소비자가 다음 이벤트를 가져가야 다음 검색을 시작하므로 결과가 쌓이지 않으며,
+        aclose()나 소비 태스크 취소로 진행 중인 검색 지점에서 중단된다
+        """
+        queries = list(queries if queries is not None else all_queries())
+        started = time.monotonic()
+
+        for index, (location, keyword) in enumerate(queries):
+            if index:
+                await random_delay(*DELAY_RANGE)  # 요청 간 딜레이
+
+            places, error = await self.search_with_retries(location, keyword)
+            for row in places:
+                yield RowEvent(index, location, keyword, row)
+            yield ProgressEvent(index, location, keyword, found=len(places), completed=index + 1,
+                                total=len(queries), elapsed=time.monotonic() - started, error=error)
+
+    async def crawl_all_locations(self, queries: Optional[List[Tuple[str, str]]] = None) -> List[Dict[str, Any]]:
+        """모든 지역과 키워드 조합(또는 주어진 쿼리 계획)으로 크롤링"""
+        all_data = []
 
-                # 요청 간 딜레이
-                await random_delay(*DELAY_RANGE)
+        async for event in self.crawl_iter(queries):
+            if isinstance(event, RowEvent):
+                all_data.append(event.row)
 
         return all_data
 
-    async def run(self) -> str:
+    async def run(self) -> Optional[str]:
         """크롤링 실행"""
         try:
             self.logger.info("네이버 지도 크롤링 시작")
@@ -176,16 +300,20 @@ class OptimizedNaverCrawler:
             create_output_directory(OUTPUT_DIR)
 
             # 크롤링 실행
-            data = await self.crawl_all_locations()
+            queries, plan = plan_queries(self.logger)
+            data = await self.crawl_all_locations(queries)
+            record_query_results(queries, data, plan, self.logger)
 
             if not data:
                 raise ValueError("크롤링된 데이터가 없습니다.")
 
-            # 엑셀 파일로 저장
-            filename = generate_filename(OUTPUT_FILENAME_FORMAT)
-            filepath = save_to_excel(data, filename, OUTPUT_DIR)
+            # 엑셀 파일로 저장 (DELTA_CONFIG 출력 모드에 따라 변경분만 저장)
+            filepath = save_crawl_output(data, self.logger)
 
             self.logger.info(f"크롤링 완료. 총 {len(data)}개 데이터 저장: {filepath}")
+            self.logger.info(f"브라우저 통계: {self.watchdog.stats()}")
+            if self.proxy_pool:
+                self.logger.info(f"프록시 통계: {self.proxy_pool.stats()}")
             return filepath
 
         except Exception as e:
@@ -201,6 +329,8 @@ class OptimizedNaverCrawler:
                 await self.browser.close()
             if hasattr(self, 'playwright'):
                 await self.playwright.stop()
+            if self.archive:
+                self.archive.close()
             self.logger.info("브라우저 정리 완료")
         except Exception as e:
             self.logger.error(f"브라우저 정리 실패: {e}")
@@ -5,24 +5,43 @@
 import time
 import logging
 import random
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Union
 import undetected_chromedriver as uc
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import TimeoutException, NoSuchElementException, WebDriverException
 from urllib.parse import quote
 
 from config import (
     BASE_URL, DELAY_RANGE, MAX_RETRIES,
-    LOCATIONS, KEYWORDS, OUTPUT_DIR,
-    OUTPUT_FILENAME_FORMAT, LOGGING_CONFIG
+    OUTPUT_DIR,
+    LOGGING_CONFIG, WATCHDOG_CONFIG, BLOCK_MARKERS,
+    ARCHIVE_CONFIG, EXTRACT_SELECTORS
 )
 from utils import (
     setup_logging, validate_search_params,
     format_crawling_result, create_output_directory,
-    generate_filename, save_to_excel
+    is_blocked_content, PLACE_FIELDS
 )
+from change_detection import save_crawl_output
+from query_planner import all_queries, plan_queries, record_query_results
+from page_archive import PageArchive
+from tracing import (
+    Tracer, NULL_TRACE, enable_selenium_metrics, start_selenium_metrics, collect_selenium_metrics
+)
+from crawl_events import RowEvent, ProgressEvent
+
+# EXTRACT_SELECTORS로 찾지 못했을 때 시도할 대체 셀렉터 (예전/다른 레이아웃)
+FALLBACK_SELECTORS = {
+    "item": ["li[data-id]", ".search_item", ".CHC5F", "[data-place-id]"],
+    "name": [".search_title", ".title", "h3", ".name", "strong"],
+    "address": [".search_address", ".address", ".addr", ".location"],
+    "rating": [".PXMot .average", ".rating", ".score", ".star_score", ".review_point"],
+    "reviews": [".review_count", ".review"],
+    "phone": [".phone", ".tel", ".contact"],
+    "category": [".category", ".type", ".business_type"]
+}
 
 class UndetectedNaverCrawler:
     """Undetected Chrome을 사용한 네이버 지도 크롤러"""
@@ -31,6 +50,9 @@ class UndetectedNaverCrawler:
         self.logger = setup_logging(LOGGING_CONFIG)
         self.driver: Optional[uc.Chrome] = None
         self.wait: Optional[WebDriverWait] = None
+        self.proxy = None  # proxy_pool.Proxy, 드라이버 실행 전에 지정
+        self.archive: Optional[PageArchive] = PageArchive() if ARCHIVE_CONFIG["enabled"] else None
+        self.tracer = Tracer()
         self.collected_data = []
 
     def __enter__(self):
@@ -66,12 +88,24 @@ class UndetectedNaverCrawler:
             # 윈도우 크기 설정
             options.add_argument('--window-size=1920,1080')
 
+            # 출구 프록시
+            if self.proxy:
+                options.add_argument(self.proxy.chrome_argument())
+
             # 헤드리스 모드 (필요시 주석 해제)
             # options.add_argument('--headless')
 
             self.driver = uc.Chrome(options=options, version_main=None)
             self.wait = WebDriverWait(self.driver, 15)
 
+            # goto 외의 스크립트 실행도 무한 대기하지 않도록 제한
+            self.driver.set_page_load_timeout(WATCHDOG_CONFIG["job_deadline"])
+            self.driver.set_script_timeout(WATCHDOG_CONFIG["job_deadline"])
+
+            # 성능 지표는 enable 이후부터 쌓이므로 드라이버를 만들 때 켜 둠
+            if self.tracer.enabled:
+                enable_selenium_metrics(self.driver)
+
             self.logger.info("Undetected Chrome 드라이버 초기화 완료")
 
         except Exception as e:
@@ -90,111 +124,118 @@ class UndetectedNaverCrawler:
             return []
 
         search_query = f"{location} {keyword}"
-        search_url = f"{BASE_URL}/{quote(search_query)}"
+
+        trace = self.tracer.start(search_query, location=location, keyword=keyword)
 
         try:
-            self.logger.info(f"검색 시작: {search_query}")
+            start_selenium_metrics(self.driver, trace)
 
             # 페이지 이동
-            self.driver.get(search_url)
-            self.random_delay(3, 6)
+            with trace.span("navigate"):
+                self.open_search_page(location, keyword)
+            with trace.span("wait"):
+                self.random_delay(3, 6)
+            with trace.span("archive"):
+                self.archive_page(location, keyword)
 
             # 검색 결과 대기 및 추출
-            places = self.extract_place_data(location, keyword)
+            places = self.extract_place_data(location, keyword, trace)
             self.logger.info(f"{search_query} 검색 완료: {len(places)}개 결과")
 
+            # 추출까지 포함한 메인 스레드 시간을 보도록 마지막에 수집
+            collect_selenium_metrics(self.driver, trace)
+
             return places
 
         except Exception as e:
+            # 네비게이션/프록시 오류는 빈 결과와 구분되도록 호출자(재시도, 드라이버 풀)에 전달
             self.logger.error(f"검색 실패 - {search_query}: {e}")
-            return []
+            raise
+
+        finally:
+            trace_path = trace.save()
+            if trace_path:
+                self.logger.info(f"트레이스 저장: {trace_path}")
+
+    def open_search_page(self, location: str, keyword: str):
+        """검색 페이지로 이동 (딜레이 없이 네비게이션만 수행)"""
+        search_query = f"{location} {keyword}"
+        search_url = f"{BASE_URL}/{quote(search_query)}"
+
+        self.logger.info(f"검색 시작: {search_query}")
+        self.driver.get(search_url)
+
+        # 프록시/네트워크 오류 시 Chrome은 예외 없이 오류 페이지를 띄우므로 직접 확인
+        if self.driver.execute_script("return !!document.querySelector('body.neterror')"):
+            raise WebDriverException(f"페이지 로드 실패: {search_url}")
+
+    def archive_page(self, location: str, keyword: str):
+        """현재 페이지 HTML을 아카이브에 저장 (셀렉터 변경 시 재추출용)"""
+        if not self.archive:
+            return
+        try:
+            self.archive.put(self.driver.page_source, location, keyword, self.driver.current_url)
+        except Exception as e:
+            self.logger.warning(f"페이지 보관 실패: {e}")
+
+    def detect_block(self) -> bool:
+        """현재 페이지가 캡차/접근 제한 페이지인지 확인"""
+        try:
+            return is_blocked_content(self.driver.page_source, BLOCK_MARKERS)
+        except Exception:
+            return False
 
-    def extract_place_data(self, location: str, keyword: str) -> List[Dict[str, Any]]:
+    def extract_place_data(self, location: str, keyword: str, trace=NULL_TRACE) -> List[Dict[str, Any]]:
         """페이지에서 장소 데이터 추출"""
+        with trace.span("extract"):
+            raw_places = self.extract_raw_places()
+
+        with trace.span("format", count=len(raw_places)):
+            return [format_crawling_result(location, keyword, place_data) for place_data in raw_places]
+
+    def extract_raw_places(self) -> List[Dict[str, Any]]:
+        """검색 결과 요소에서 필드 텍스트 추출 (포맷팅 전)
+
+        드라이버/세션 오류는 빈 결과와 구분되도록 호출자에 전달
+        """
         places = []
 
-        try:
-            # 다양한 셀렉터로 검색 결과 찾기
-            selectors_to_try = [
-                "li[data-id]",
-                ".place_bluelink",
-                ".search_item",
-                ".CHC5F",
-                "[data-place-id]"
-            ]
-
-            place_elements = []
-            for selector in selectors_to_try:
-                try:
-                    elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                    if elements:
-                        self.logger.info(f"검색 결과 발견: {selector} ({len(elements)}개)")
-                        place_elements = elements[:20]  # 최대 20개
-                        break
-                except:
-                    continue
-
-            if not place_elements:
-                self.logger.warning("검색 결과를 찾을 수 없음")
-                return []
-
-            # 각 장소 데이터 추출
-            for i, element in enumerate(place_elements):
-                try:
-                    place_data = self.extract_single_place(element)
-
-                    if place_data.get("name"):
-                        formatted_data = format_crawling_result(location, keyword, place_data)
-                        places.append(formatted_data)
-                        self.logger.debug(f"추출됨: {place_data['name']}")
-
-                except Exception as e:
-                    self.logger.warning(f"개별 장소 데이터 추출 실패 ({i}): {e}")
-                    continue
+        # 설정 셀렉터 우선, 없으면 대체 셀렉터로 검색 결과 찾기
+        selectors_to_try = [EXTRACT_SELECTORS["item"]] + FALLBACK_SELECTORS["item"]
 
-        except Exception as e:
-            self.logger.error(f"장소 데이터 추출 실패: {e}")
+        place_elements = []
+        for selector in selectors_to_try:
+            elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
+            if elements:
+                self.logger.info(f"검색 결과 발견: {selector} ({len(elements)}개)")
+                place_elements = elements[:20]  # 최대 20개
+                break
+
+        if not place_elements:
+            self.logger.warning("검색 결과를 찾을 수 없음")
+            return []
+
+        # 각 장소 데이터 추출
+        for i, element in enumerate(place_elements):
+            try:
+                place_data = self.extract_single_place(element)
+
+                if place_data.get("name"):
+                    places.append(place_data)
+                    self.logger.debug(f"추출됨: {place_data['name']}")
+
+            except Exception as e:
+                self.logger.warning(f"개별 장소 데이터 추출 실패 ({i}): {e}")
+                continue
 
         return places
 
     def extract_single_place(self, element) -> Dict[str, Any]:
-        """단일 장소에서 데이터 추출"""
-        place_data = {}
-
-        # 가게명 추출
-        name_selectors = [
-            ".TYaxT", ".search_title", ".title",
-            "h3", ".name", "strong"
-        ]
-        place_data["name"] = self.extract_text_by_selectors(element, name_selectors)
-
-        # 주소 추출
-        address_selectors = [
-            ".LDgIH", ".search_address", ".address",
-            ".addr", ".location"
-        ]
-        place_data["address"] = self.extract_text_by_selectors(element, address_selectors)
-
-        # 평점 추출
-        rating_selectors = [
-            ".PXMot .average", ".rating", ".score",
-            ".star_score", ".review_point"
-        ]
-        place_data["rating"] = self.extract_text_by_selectors(element, rating_selectors)
-
-        # 전화번호 추출
-        phone_selectors = [
-            ".dry01", ".phone", ".tel", ".contact"
-        ]
-        place_data["phone"] = self.extract_text_by_selectors(element, phone_selectors)
-
-        # 카테고리 추출
-        category_selectors = [
-            ".KCMnt", ".category", ".type", ".business_type"
-        ]
-        place_data["category"] = self.extract_text_by_selectors(element, category_selectors)
-
-        return place_data
+        """단일 장소에서 데이터 추출 (EXTRACT_SELECTORS 우선, 이후 대체 셀렉터)"""
+        return {
+            field: self.extract_text_by_selectors(element, [EXTRACT_SELECTORS[field]] + FALLBACK_SELECTORS[field])
+            for field in PLACE_FIELDS
+        }
 
     def extract_text_by_selectors(self, parent_element, selectors: List[str], default: str = "") -> str:
         """여러 셀렉터를 시도하여 텍스트 추출"""
@@ -208,35 +249,50 @@ class UndetectedNaverCrawler:
                 continue
         return default
 
-    def crawl_all_locations(self) -> List[Dict[str, Any]]:
-        """모든 지역과 키워드 조합으로 크롤링"""
-        all_data = []
+    def search_with_retries(self, location: str, keyword: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """재시도를 포함한 검색. (결과, 최종 실패 시 마지막 오류) 반환"""
+        retry_count = 0
+
+        while retry_count < MAX_RETRIES:
+            try:
+                return self.search_places(location, keyword), None
+
+            except Exception as e:
+                retry_count += 1
+                self.logger.warning(f"재시도 {retry_count}/{MAX_RETRIES} - {location} {keyword}: {e}")
 
-        for location in LOCATIONS:
-            for keyword in KEYWORDS:
-                retry_count = 0
+                if retry_count < MAX_RETRIES:
+                    self.random_delay(10, 15)  # 재시도 전 더 긴 대기
+                else:
+                    self.logger.error(f"최대 재시도 횟수 초과: {location} {keyword}")
+                    return [], str(e)
 
-                while retry_count < MAX_RETRIES:
-                    try:
-                        places = self.search_places(location, keyword)
-                        all_data.extend(places)
-                        break
+        return [], None
 
-                    except Exception as e:
-                        retry_count += 1
-                        self.logger.warning(f"재시도 {retry_count}/{MAX_RETRIES} - {location} {keyword}: {e}")
+    def crawl_iter(self, queries: Optional[List[Tuple[str, str]]] = None
+                   ) -> Iterator[Union[RowEvent, ProgressEvent]]:
+        """검색이 끝날 때마다 결과 행(RowEvent)과 진행 이벤트(ProgressEvent)를 내보내는 제너레이터
 
-                        if retry_count < MAX_RETRIES:
-                            self.random_delay(10, 15)  # 재시도 전 더 긴 대기
-                        else:
-                            self.logger.error(f"최대 재시도 횟수 초과: {location} {keyword}")
+        소비자가 다음 이벤트를 가져가야 다음 검색을 시작하며, close()나 break로 중단할 수 있다
+        """
+        queries = list(queries if queries is not None else all_queries())
+        started = time.monotonic()
 
-                # 요청 간 딜레이
-                self.random_delay(*DELAY_RANGE)
+        for index, (location, keyword) in enumerate(queries):
+            if index:
+                self.random_delay(*DELAY_RANGE)  # 요청 간 딜레이
 
-        return all_data
+            places, error = self.search_with_retries(location, keyword)
+            for row in places:
+                yield RowEvent(index, location, keyword, row)
+            yield ProgressEvent(index, location, keyword, found=len(places), completed=index + 1,
+                                total=len(queries), elapsed=time.monotonic() - started, error=error)
 
-    def run(self) -> str:
+    def crawl_all_locations(self, queries: Optional[List[Tuple[str, str]]] = None) -> List[Dict[str, Any]]:
+        """모든 지역과 키워드 조합(또는 주어진 쿼리 계획)으로 크롤링"""
+        return [event.row for event in self.crawl_iter(queries) if isinstance(event, RowEvent)]
+
+    def run(self) -> Optional[str]:
         """크롤링 실행"""
         try:
             self.logger.info("Undetected 네이버 지도 크롤링 시작")
@@ -245,14 +301,15 @@ class UndetectedNaverCrawler:
             create_output_directory(OUTPUT_DIR)
 
             # 크롤링 실행
-            data = self.crawl_all_locations()
+            queries, plan = plan_queries(self.logger)
+            data = self.crawl_all_locations(queries)
+            record_query_results(queries, data, plan, self.logger)
 
             if not data:
                 raise ValueError("크롤링된 데이터가 없습니다.")
 
-            # 엑셀 파일로 저장
-            filename = generate_filename(OUTPUT_FILENAME_FORMAT)
-            filepath = save_to_excel(data, filename, OUTPUT_DIR)
+            # 엑셀 파일로 저장 (DELTA_CONFIG 출력 모드에 따라 변경분만 저장)
+            filepath = save_crawl_output(data, self.logger)
 
             self.logger.info(f"크롤링 완료. 총 {len(data)}개 데이터 저장: {filepath}")
             return filepath
@@ -261,6 +318,22 @@ class UndetectedNaverCrawler:
             self.logger.error(f"크롤링 실행 실패: {e}")
             raise
 
+    def release_resources(self):
+        """드라이버 외 리소스(아카이브 DB 연결, chromedriver 프로세스) 정리
+
+        드라이버 스레드가 멈춰 있어도 호출할 수 있도록 드라이버 명령은 보내지 않는다
+        """
+        if self.archive:
+            try:
+                self.archive.close()
+            except Exception as e:
+                self.logger.warning(f"아카이브 연결 종료 실패: {e}")
+            self.archive = None
+
+        process = getattr(getattr(self.driver, "service", None), "process", None)
+        if process is not None and process.poll() is None:
+            process.kill()
+
     def close(self):
         """리소스 정리"""
         try:
@@ -269,6 +342,8 @@ class UndetectedNaverCrawler:
             self.logger.info("드라이버 정리 완료")
         except Exception as e:
             self.logger.error(f"드라이버 정리 실패: {e}")
+        finally:
+            self.release_resources()
 
 
 def main():
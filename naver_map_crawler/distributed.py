@@ -0,0 +1,567 @@
+"""
+네이버 지도 분산 크롤링
+코디네이터가 (지역, 키워드, 세부지역) 작업을 브로커에 넣고, 여러 노드의 워커가 작업을 임대해 처리한다.
+- 임대(lease) + 하트비트: 노드가 죽으면 임대가 만료되어 다른 노드에 재배정
+- 결과는 브로커의 하나의 저장소로 모이고 코디네이터가 기존 출력 경로(save_crawl_output)로 저장
+- 전체 노드가 하나의 요청 예산(토큰 버킷)을 공유
+브로커는 JobBroker 인터페이스를 구현하면 교체 가능
+(기본 SQLite 브로커는 WAL을 쓰므로 한 머신의 여러 프로세스 전용.
+ WAL은 네트워크 파일시스템에서 동작하지 않으므로 여러 노드는 네트워크 브로커를 register_broker()로 등록)
+
+사용 예:
+    python distributed.py coordinator            # 작업 등록 후 완료될 때까지 대기, 결과 저장
+    python distributed.py worker                 # 노드마다 실행 (여러 개 가능)
+    python distributed.py worker --engine fake   # 브라우저 없이 흐름만 시험
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Tuple, Callable, Awaitable
+
+from config import DISTRIBUTED_CONFIG, QUERY_FILES, LOGGING_CONFIG, OUTPUT_DIR
+from utils import setup_logging, create_output_directory, format_crawling_result
+from change_detection import save_crawl_output, make_place_id
+from query_planner import load_terms, plan_queries, record_query_results
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class BrokerJob:
+    """브로커에서 임대한 작업"""
+    job_id: int
+    run_id: str
+    location: str
+    keyword: str
+    tile: str
+    attempts: int
+    lease_expires: float
+
+    @property
+    def search_location(self) -> str:
+        """실제 검색에 쓰는 지역 (세부지역이 있으면 붙임)"""
+        return f"{self.location} {self.tile}" if self.tile else self.location
+
+
+class JobBroker(ABC):
+    """작업 브로커 인터페이스
+
+    워커는 이벤트 루프를 막지 않도록 메서드를 asyncio.to_thread로 호출하므로
+    구현은 여러 스레드에서 호출해도 안전해야 한다
+    """
+
+    @abstractmethod
+    def enqueue(self, run_id: str, jobs: List[Tuple[str, str, str]]) -> int:
+        """(지역, 키워드, 세부지역) 작업 등록. 새로 등록된 수 반환"""
+
+    @abstractmethod
+    def lease(self, worker_id: str, run_id: Optional[str] = None) -> Optional[BrokerJob]:
+        """대기 중이거나 임대가 만료된 작업 하나를 임대"""
+
+    @abstractmethod
+    def heartbeat(self, job: BrokerJob, worker_id: str) -> bool:
+        """임대 연장. 임대를 잃었으면(만료 후 재배정 등) False"""
+
+    @abstractmethod
+    def complete(self, job: BrokerJob, worker_id: str, rows: List[Dict[str, Any]]) -> bool:
+        """결과 저장 후 완료 처리. 임대를 잃었으면 결과를 버리고 False"""
+
+    @abstractmethod
+    def fail(self, job: BrokerJob, worker_id: str, error: str):
+        """실패 보고. 시도 횟수가 남아 있으면 다시 대기 상태로"""
+
+    @abstractmethod
+    def take_token(self) -> float:
+        """전체 요청 예산에서 토큰 하나 소비. 바로 쓸 수 없으면 기다릴 시간(초) 반환"""
+
+    @abstractmethod
+    def progress(self, run_id: str) -> Dict[str, int]:
+        """상태별 작업 수"""
+
+    @abstractmethod
+    def results(self, run_id: str) -> List[Dict[str, Any]]:
+        """완료된 작업 결과를 작업 등록 순서대로 병합"""
+
+    @abstractmethod
+    def completed_queries(self, run_id: str) -> List[Tuple[str, str]]:
+        """세부지역 작업이 하나 이상 완료된 (지역, 키워드) 목록"""
+
+    def close(self):
+        pass
+
+
+class SQLiteBroker(JobBroker):
+    """SQLite 파일 기반 브로커 (WAL, 상태 변경은 BEGIN IMMEDIATE로 직렬화)
+
+    WAL의 공유 메모리 인덱스는 같은 호스트의 프로세스끼리만 공유되므로 NFS/SMB 같은
+    공유 파일시스템 위에 두고 여러 노드에서 열면 안 된다
+    """
+
+    def __init__(self, path: str, config: Optional[Dict[str, Any]] = None):
+        self.config = dict(DISTRIBUTED_CONFIG, **(config or {}))
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            create_output_directory(directory)
+
+        # 워커가 스레드에서 호출하므로 연결 하나를 잠금으로 공유
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id INTEGER PRIMARY KEY,
+                run_id TEXT NOT NULL,
+                location TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                tile TEXT NOT NULL DEFAULT '',
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                worker_id TEXT,
+                lease_expires REAL,
+                error TEXT,
+                result_count INTEGER,
+                created_at REAL NOT NULL,
+                finished_at REAL,
+                UNIQUE (run_id, location, keyword, tile)
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (run_id, status, lease_expires);
+            CREATE TABLE IF NOT EXISTS job_results (
+                job_id INTEGER NOT NULL,
+                seq INTEGER NOT NULL,
+                row TEXT NOT NULL,
+                PRIMARY KEY (job_id, seq)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS rate_budget (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS workers (
+                worker_id TEXT PRIMARY KEY,
+                host TEXT, pid INTEGER,
+                started_at REAL, last_seen REAL,
+                completed INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+
+    def _transaction(self, func: Callable[[sqlite3.Connection], Any]):
+        """쓰기 잠금을 먼저 잡는 트랜잭션 (여러 프로세스가 같은 작업을 임대하지 않도록)"""
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = func(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return result
+
+    def _fetch(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def enqueue(self, run_id: str, jobs: List[Tuple[str, str, str]]) -> int:
+        now = time.time()
+
+        def insert(conn):
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (run_id, location, keyword, tile, created_at) VALUES (?, ?, ?, ?, ?)",
+                [(run_id, location, keyword, tile or "", now) for location, keyword, tile in jobs]
+            )
+            return conn.total_changes - before
+
+        return self._transaction(insert)
+
+    def lease(self, worker_id: str, run_id: Optional[str] = None) -> Optional[BrokerJob]:
+        now = time.time()
+        lease_seconds = self.config["lease_seconds"]
+        max_attempts = self.config["max_attempts"]
+
+        def claim(conn):
+            # 시도 횟수를 다 쓴 채 임대가 만료된 작업은 실패로 확정
+            conn.execute("""
+                UPDATE jobs SET status = 'failed', error = COALESCE(error, '임대 만료 반복'), finished_at = ?
+                WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?
+            """, (now, now, max_attempts))
+
+            run_clause = "AND run_id = ?" if run_id else ""
+            params = [now, max_attempts] + ([run_id] if run_id else [])
+            row = conn.execute(f"""
+                SELECT job_id, run_id, location, keyword, tile, attempts FROM jobs
+                WHERE (status = 'pending' OR (status = 'leased' AND lease_expires < ?))
+                  AND attempts < ? {run_clause}
+                ORDER BY attempts, job_id
+                LIMIT 1
+            """, params).fetchone()
+            if row is None:
+                return None
+
+            expires = now + lease_seconds
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', worker_id = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE job_id = ?", (worker_id, expires, row[0])
+            )
+            self._touch_worker(conn, worker_id, now)
+            return BrokerJob(row[0], row[1], row[2], row[3], row[4], row[5] + 1, expires)
+
+        return self._transaction(claim)
+
+    def heartbeat(self, job: BrokerJob, worker_id: str) -> bool:
+        now = time.time()
+        expires = now + self.config["lease_seconds"]
+
+        def extend(conn):
+            updated = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE job_id = ? AND worker_id = ? AND status = 'leased'",
+                (expires, job.job_id, worker_id)
+            ).rowcount
+            self._touch_worker(conn, worker_id, now)
+            return updated == 1
+
+        ok = self._transaction(extend)
+        if ok:
+            job.lease_expires = expires
+        return ok
+
+    def complete(self, job: BrokerJob, worker_id: str, rows: List[Dict[str, Any]]) -> bool:
+        now = time.time()
+
+        def finish(conn):
+            owned = conn.execute(
+                "UPDATE jobs SET status = 'done', finished_at = ?, result_count = ?, error = NULL "
+                "WHERE job_id = ? AND worker_id = ? AND status = 'leased'",
+                (now, len(rows), job.job_id, worker_id)
+            ).rowcount
+            if owned != 1:
+                return False
+            conn.execute("DELETE FROM job_results WHERE job_id = ?", (job.job_id,))
+            conn.executemany(
+                "INSERT INTO job_results (job_id, seq, row) VALUES (?, ?, ?)",
+                [(job.job_id, seq, json.dumps(row, ensure_ascii=False)) for seq, row in enumerate(rows)]
+            )
+            conn.execute("UPDATE workers SET completed = completed + 1, last_seen = ? WHERE worker_id = ?",
+                         (now, worker_id))
+            return True
+
+        return self._transaction(finish)
+
+    def fail(self, job: BrokerJob, worker_id: str, error: str):
+        now = time.time()
+        max_attempts = self.config["max_attempts"]
+
+        def release(conn):
+            conn.execute("""
+                UPDATE jobs SET
+                    status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    error = ?, lease_expires = NULL,
+                    finished_at = CASE WHEN attempts >= ? THEN ? ELSE NULL END
+                WHERE job_id = ? AND worker_id = ? AND status = 'leased'
+            """, (max_attempts, error, max_attempts, now, job.job_id, worker_id))
+
+        self._transaction(release)
+
+    def take_token(self) -> float:
+        rate = self.config["requests_per_minute"] / 60.0
+        capacity = max(1.0, rate * 5)
+        now = time.time()
+
+        def take(conn):
+            row = conn.execute("SELECT tokens, updated_at FROM rate_budget WHERE name = 'global'").fetchone()
+            tokens = capacity if row is None else min(capacity, row[0] + max(0.0, now - row[1]) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate if rate > 0 else self.config["poll_interval"]
+            conn.execute(
+                "INSERT INTO rate_budget (name, tokens, updated_at) VALUES ('global', ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (tokens, now)
+            )
+            return wait
+
+        return self._transaction(take)
+
+    def progress(self, run_id: str) -> Dict[str, int]:
+        counts = {PENDING: 0, LEASED: 0, DONE: 0, FAILED: 0}
+        for status, count in self._fetch(
+            "SELECT status, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY status", (run_id,)
+        ):
+            counts[status] = count
+        counts["total"] = sum(counts.values())
+        return counts
+
+    def results(self, run_id: str) -> List[Dict[str, Any]]:
+        return [json.loads(row) for (row,) in self._fetch("""
+            SELECT r.row FROM job_results r JOIN jobs j ON j.job_id = r.job_id
+            WHERE j.run_id = ? AND j.status = 'done'
+            ORDER BY j.job_id, r.seq
+        """, (run_id,))]
+
+    def completed_queries(self, run_id: str) -> List[Tuple[str, str]]:
+        return [tuple(row) for row in self._fetch("""
+            SELECT location, keyword FROM jobs WHERE run_id = ? AND status = 'done'
+            GROUP BY location, keyword ORDER BY MIN(job_id)
+        """, (run_id,))]
+
+    def workers(self) -> List[Dict[str, Any]]:
+        columns = ["worker_id", "host", "pid", "started_at", "last_seen", "completed"]
+        return [dict(zip(columns, row)) for row in self._fetch(f"SELECT {', '.join(columns)} FROM workers")]
+
+    def _touch_worker(self, conn, worker_id: str, now: float):
+        conn.execute("""
+            INSERT INTO workers (worker_id, host, pid, started_at, last_seen) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(worker_id) DO UPDATE SET last_seen = excluded.last_seen
+        """, (worker_id, socket.gethostname(), os.getpid(), now, now))
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+BROKERS: Dict[str, Callable[[str], JobBroker]] = {
+    "sqlite": lambda location: SQLiteBroker(location),
+}
+
+
+def register_broker(scheme: str, factory: Callable[[str], JobBroker]):
+    """브로커 구현 등록 (예: register_broker("redis", RedisBroker))"""
+    BROKERS[scheme] = factory
+
+
+def create_broker(url: Optional[str] = None) -> JobBroker:
+    """브로커 URL(scheme:///위치)로 브로커 생성"""
+    url = url or DISTRIBUTED_CONFIG["broker_url"]
+    scheme, _, location = url.partition(":///")
+    if scheme not in BROKERS:
+        raise ValueError(f"지원하지 않는 브로커: {url} (등록된 브로커: {', '.join(BROKERS)})")
+    return BROKERS[scheme](location)
+
+
+def load_tiles() -> Dict[str, List[str]]:
+    """지역별 세부지역 목록 (queries/tiles.txt, '지역|세부지역')"""
+    tiles: Dict[str, List[str]] = {}
+    for line in load_terms(QUERY_FILES["tiles"], []):
+        location, _, tile = line.partition("|")
+        if tile.strip():
+            tiles.setdefault(location.strip(), []).append(tile.strip())
+    return tiles
+
+
+def expand_tiles(queries: List[Tuple[str, str]]) -> List[Tuple[str, str, str]]:
+    """(지역, 키워드) -> (지역, 키워드, 세부지역) 작업 목록"""
+    tiles = load_tiles()
+    return [
+        (location, keyword, tile)
+        for location, keyword in queries
+        for tile in tiles.get(location, [""])
+    ]
+
+
+# ---- 워커 ----------------------------------------------------------------
+
+SearchFunc = Callable[[str, str], Awaitable[List[Dict[str, Any]]]]
+
+
+class DistributedWorker:
+    """브로커에서 작업을 임대해 검색하고 결과를 보고하는 노드"""
+
+    def __init__(self, broker: JobBroker, search: SearchFunc, worker_id: Optional[str] = None,
+                 run_id: Optional[str] = None, config: Optional[Dict[str, Any]] = None):
+        self.config = dict(DISTRIBUTED_CONFIG, **(config or {}))
+        self.logger = setup_logging(LOGGING_CONFIG)
+        self.broker = broker
+        self.search = search
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:4]}"
+        self.run_id = run_id
+        self.stats = {"completed": 0, "failed": 0, "lost_leases": 0}
+
+    async def _heartbeat(self, job: BrokerJob, lost: asyncio.Event):
+        while True:
+            await asyncio.sleep(self.config["heartbeat_interval"])
+            if not await asyncio.to_thread(self.broker.heartbeat, job, self.worker_id):
+                self.logger.warning(f"[{self.worker_id}] 임대 상실: {job.search_location} {job.keyword}")
+                lost.set()
+                return
+
+    async def _wait_for_budget(self):
+        """전체 노드 공유 요청 예산에서 토큰 확보"""
+        while True:
+            wait = await asyncio.to_thread(self.broker.take_token)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait + random.uniform(0, 0.2))  # 여러 노드가 동시에 깨지 않도록
+
+    async def process(self, job: BrokerJob):
+        """작업 하나 처리 (하트비트 유지, 임대를 잃으면 결과 폐기)"""
+        lost = asyncio.Event()
+        heartbeat = asyncio.create_task(self._heartbeat(job, lost))
+        try:
+            await self._wait_for_budget()
+            rows = await self.search(job.search_location, job.keyword)
+            for row in rows:
+                row['지역'] = job.location  # 세부지역 결과는 원래 지역 쿼리의 결과로 합침
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.stats["failed"] += 1
+            self.logger.error(f"[{self.worker_id}] 작업 실패 - {job.search_location} {job.keyword}: {e}")
+            await asyncio.to_thread(self.broker.fail, job, self.worker_id, str(e))
+            return
+        finally:
+            heartbeat.cancel()
+            await asyncio.gather(heartbeat, return_exceptions=True)
+
+        if lost.is_set() or not await asyncio.to_thread(self.broker.complete, job, self.worker_id, rows):
+            self.stats["lost_leases"] += 1
+            self.logger.warning(f"[{self.worker_id}] 임대가 만료되어 결과 폐기: {job.search_location} {job.keyword}")
+            return
+        self.stats["completed"] += 1
+        self.logger.info(f"[{self.worker_id}] 완료 {job.search_location} {job.keyword}: {len(rows)}개")
+
+    async def run(self, exit_when_idle: bool = False):
+        """작업을 계속 임대해 처리. exit_when_idle이면 남은 작업이 없을 때 종료"""
+        self.logger.info(f"워커 시작: {self.worker_id}")
+        while True:
+            job = await asyncio.to_thread(self.broker.lease, self.worker_id, self.run_id)
+            if job is None:
+                if exit_when_idle and self.run_id and await self._run_finished():
+                    break
+                await asyncio.sleep(self.config["poll_interval"])
+                continue
+            await self.process(job)
+        self.logger.info(f"워커 종료: {self.worker_id} {self.stats}")
+
+    async def _run_finished(self) -> bool:
+        progress = await asyncio.to_thread(self.broker.progress, self.run_id)
+        return progress[PENDING] == 0 and progress[LEASED] == 0
+
+
+async def fake_search(location: str, keyword: str) -> List[Dict[str, Any]]:
+    """브라우저 없이 분산 흐름을 시험하기 위한 검색"""
+    await asyncio.sleep(random.uniform(0.05, 0.3))
+    return [
+        format_crawling_result(location, keyword, {"name": f"{location} {keyword} {i}", "address": location})
+        for i in range(random.randint(0, 5))
+    ]
+
+
+async def run_worker(broker: JobBroker, engine: str, run_id: Optional[str], exit_when_idle: bool):
+    """엔진별 검색 함수를 준비해 워커 실행"""
+    if engine == "fake":
+        await DistributedWorker(broker, fake_search, run_id=run_id).run(exit_when_idle)
+        return
+
+    if engine == "selenium":
+        from crawler_selenium import UndetectedNaverCrawler
+        loop = asyncio.get_running_loop()
+        with UndetectedNaverCrawler() as crawler:
+            async def search(location, keyword):
+                places, error = await loop.run_in_executor(None, crawler.search_with_retries, location, keyword)
+                if error:
+                    raise RuntimeError(error)
+                return places
+            await DistributedWorker(broker, search, run_id=run_id).run(exit_when_idle)
+        return
+
+    from crawler import OptimizedNaverCrawler
+    async with OptimizedNaverCrawler() as crawler:
+        async def search(location, keyword):
+            places, error = await crawler.search_with_retries(location, keyword)
+            if error:
+                raise RuntimeError(error)
+            return places
+        await DistributedWorker(broker, search, run_id=run_id).run(exit_when_idle)
+
+
+# ---- 코디네이터 --------------------------------------------------------------
+
+def merge_results(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """세부지역이 겹쳐 같은 쿼리에서 여러 번 나온 장소는 하나만 남김"""
+    seen = set()
+    merged = []
+    for row in rows:
+        key = (row.get('지역'), row.get('키워드'), make_place_id(row))
+        if key not in seen:
+            seen.add(key)
+            merged.append(row)
+    return merged
+
+
+async def coordinate(broker: JobBroker, run_id: Optional[str] = None, report_interval: float = 10) -> Optional[str]:
+    """작업 등록 -> 완료 대기 -> 결과 병합 저장. 저장된 파일 경로 반환"""
+    logger = setup_logging(LOGGING_CONFIG)
+    create_output_directory(OUTPUT_DIR)
+
+    run_id = run_id or time.strftime("%Y%m%d_%H%M%S")
+    queries, plan = plan_queries(logger)
+    jobs = expand_tiles(queries)
+    added = await asyncio.to_thread(broker.enqueue, run_id, jobs)
+    logger.info(f"분산 실행 {run_id}: 작업 {len(jobs)}개 등록 (신규 {added}개)")
+
+    while True:
+        progress = await asyncio.to_thread(broker.progress, run_id)
+        logger.info(f"진행 상황 {run_id}: {progress}")
+        if progress[PENDING] == 0 and progress[LEASED] == 0:
+            break
+        await asyncio.sleep(report_interval)
+
+    data = merge_results(await asyncio.to_thread(broker.results, run_id))
+    completed = await asyncio.to_thread(broker.completed_queries, run_id)
+    record_query_results(completed, data, plan, logger)
+    if not data:
+        logger.warning(f"분산 실행 {run_id}: 수집된 데이터가 없습니다.")
+        return None
+
+    filepath = save_crawl_output(data, logger)
+    logger.info(f"분산 실행 {run_id} 완료. 총 {len(data)}개 데이터 저장: {filepath} (실패 {progress[FAILED]}개)")
+    return filepath
+
+
+def main():
+    parser = argparse.ArgumentParser(description="분산 크롤링 코디네이터/워커")
+    parser.add_argument("--broker", help="브로커 URL (기본: DISTRIBUTED_CONFIG['broker_url'])")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    coordinator_cmd = sub.add_parser("coordinator", help="작업 등록 후 완료 시 결과 병합 저장")
+    coordinator_cmd.add_argument("--run-id", help="재개할 실행 ID")
+
+    worker_cmd = sub.add_parser("worker", help="작업 처리 노드")
+    worker_cmd.add_argument("--engine", choices=["playwright", "selenium", "fake"], default="playwright")
+    worker_cmd.add_argument("--run-id", help="이 실행의 작업만 처리")
+    worker_cmd.add_argument("--exit-when-idle", action="store_true", help="--run-id 작업이 끝나면 종료")
+
+    progress_cmd = sub.add_parser("progress", help="실행 진행 상황")
+    progress_cmd.add_argument("run_id")
+    args = parser.parse_args()
+
+    broker = create_broker(args.broker)
+    try:
+        if args.command == "coordinator":
+            result_file = asyncio.run(coordinate(broker, args.run_id))
+            print(f"✅ 분산 크롤링 완료! 결과 파일: {result_file}")
+        elif args.command == "worker":
+            asyncio.run(run_worker(broker, args.engine, args.run_id, args.exit_when_idle))
+        else:
+            print(broker.progress(args.run_id))
+    finally:
+        broker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,521 @@
+"""
+장소 엔티티 통합 (퍼지 중복 제거)
+"스타벅스 기흥구청점" / "스타벅스 기흥구청" 처럼 표기만 다른 레코드를 같은 장소로 묶는다.
+- 블로킹: geohash 셀(인접 8셀 포함) 또는 동 + 글자 n-gram 역색인(prefix filtering)
+- 점수: 상호명 n-gram 유사도 + 전화번호/주소/거리 일치 여부
+- 군집: union-find, 이전 실행의 엔티티 ID를 최대한 유지
+"""
+import argparse
+import hashlib
+import math
+import os
+import re
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, Iterator
+
+from config import ENTITY_CONFIG, OUTPUT_DIR
+from utils import create_output_directory, generate_filename, save_to_excel, read_result_excel
+from change_detection import make_place_id
+from address import AddressIndex, parse_address
+
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+RESOLVED_FILENAME_FORMAT = "naver_map_resolved_{date}.xlsx"
+
+# 지점 표기 차이는 비교에서 제외 ("기흥구청점" == "기흥구청")
+BRANCH_SUFFIX_RE = re.compile(r'(본점|직영점|점)$')
+NAME_STRIP_RE = re.compile(r'[\s\W_]+')
+# 0502~0508 안심번호는 플랫폼/시기마다 바뀌므로 장소 식별에 쓰지 않음
+VIRTUAL_PHONE_RE = re.compile(r'^050\d')
+
+
+def geohash_encode(lat: float, lng: float, precision: int) -> str:
+    """위경도 -> geohash 문자열"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value_range, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            value_range[0] = mid
+        else:
+            value_range[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def geohash_cell_size(precision: int) -> Tuple[float, float]:
+    """geohash 셀의 (위도, 경도) 크기 (도)"""
+    lng_bits = math.ceil(precision * 5 / 2)
+    lat_bits = precision * 5 // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+
+def geohash_neighbors(lat: float, lng: float, precision: int) -> List[str]:
+    """자기 셀과 인접 8셀의 geohash"""
+    dlat, dlng = geohash_cell_size(precision)
+    return sorted({
+        geohash_encode(lat + i * dlat, lng + j * dlng, precision)
+        for i in (-1, 0, 1) for j in (-1, 0, 1)
+    })
+
+
+def field_text(row: Dict[str, Any], field: str) -> str:
+    """레코드 필드 문자열 (None/NaN(엑셀 빈 셀)은 'nan'이 되지 않도록 빈 문자열)"""
+    value = row.get(field)
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return str(value).strip()
+
+
+def normalize_name(name: str) -> str:
+    text = NAME_STRIP_RE.sub("", str(name or "")).lower()
+    stripped = BRANCH_SUFFIX_RE.sub("", text)
+    return stripped if len(stripped) >= 2 else text
+
+
+def name_grams(name: str) -> frozenset:
+    """상호명 글자 bigram (한 글자면 그 글자)"""
+    if len(name) < 2:
+        return frozenset([name]) if name else frozenset()
+    return frozenset(name[i:i + 2] for i in range(len(name) - 1))
+
+
+def normalize_phone(phone: Any) -> Optional[str]:
+    """숫자만 남기고 +82 국가번호 처리. 안심번호는 None"""
+    digits = re.sub(r'\D', '', str(phone or ""))
+    if digits.startswith("82") and len(digits) >= 11:
+        digits = "0" + digits[2:]
+    if len(digits) < 8 or VIRTUAL_PHONE_RE.match(digits):
+        return None
+    return digits
+
+
+def address_key(address: str) -> Tuple[Optional[str], Optional[str]]:
+    """(주소 비교 키, 좌표가 없을 때 쓸 블록 키)"""
+    parsed = parse_address(address)
+    if parsed is None:
+        return None, None
+
+    key = None
+    if parsed.road and parsed.building_main is not None:
+        key = f"R|{parsed.road}|{parsed.building_main}-{parsed.building_sub}"
+    elif parsed.dong and parsed.jibun_main is not None:
+        key = f"J|{parsed.dong}|{int(parsed.san)}|{parsed.jibun_main}-{parsed.jibun_sub}"
+
+    if parsed.dong:
+        block = f"동:{parsed.sigungu or ''} {parsed.dong}"
+    elif parsed.road:
+        block = f"도로:{parsed.sigungu or ''} {parsed.road}"
+    else:
+        block = f"시군구:{parsed.sigungu or ''}"
+    return key, block
+
+
+class UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+
+    def find(self, item: int) -> int:
+        parent = self.parent
+        root = item
+        while parent[root] != root:
+            root = parent[root]
+        while parent[item] != root:
+            parent[item], item = root, parent[item]
+        return root
+
+    def union(self, a: int, b: int):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            if root_a < root_b:
+                self.parent[root_b] = root_a
+            else:
+                self.parent[root_a] = root_b
+
+
+class EntityResolver:
+    """장소 레코드를 엔티티로 묶고 엔티티 ID를 SQLite에 유지"""
+
+    def __init__(self, db_path: Optional[str] = None, geocoder: Optional[AddressIndex] = None,
+                 config: Optional[Dict[str, Any]] = None):
+        self.config = dict(ENTITY_CONFIG, **(config or {}))
+        self.db_path = db_path or self.config["db_path"]
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            create_output_directory(directory)
+
+        self.geocoder = geocoder
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entity_records (
+                record_key TEXT PRIMARY KEY,
+                entity_id TEXT NOT NULL,
+                first_seen TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_entity_records_entity ON entity_records (entity_id);
+            CREATE TABLE IF NOT EXISTS entities (
+                entity_id TEXT PRIMARY KEY,
+                name TEXT, address TEXT, phone TEXT, category TEXT,
+                lat REAL, lng REAL,
+                record_count INTEGER NOT NULL,
+                first_seen TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS entity_aliases (
+                old_id TEXT PRIMARY KEY,
+                entity_id TEXT NOT NULL,
+                merged_at TEXT NOT NULL
+            ) WITHOUT ROWID;
+        """)
+        self.stats: Dict[str, Any] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # ---- 1. 정규화 -------------------------------------------------------
+
+    def _prepare(self, rows: List[Dict[str, Any]]):
+        """레코드를 정규화하고 완전히 같은 레코드는 하나로 합침"""
+        precision = self.config["geohash_precision"]
+        unique_index: Dict[Tuple, int] = {}
+        members: List[int] = []
+        records = []
+        address_cache: Dict[str, Tuple] = {}
+
+        for row in rows:
+            address = field_text(row, '주소')
+            located = address_cache.get(address)
+            if located is None:
+                key, block = address_key(address)
+                result = self.geocoder.geocode(address) if self.geocoder and address else None
+                if result:
+                    located = (key, geohash_encode(result.lat, result.lng, precision), result.lat, result.lng)
+                else:
+                    located = (key, block, None, None)
+                address_cache[address] = located
+
+            addr_key, block, lat, lng = located
+            name = normalize_name(field_text(row, '가게명'))
+            phone = normalize_phone(field_text(row, '전화번호'))
+            signature = (name, phone, addr_key, block)
+
+            index = unique_index.get(signature)
+            if index is None:
+                index = len(records)
+                unique_index[signature] = index
+                records.append((name, name_grams(name), phone, addr_key, block, lat, lng))
+            members.append(index)
+
+        return records, members
+
+    # ---- 2. 블로킹 / 후보 생성 ---------------------------------------------
+
+    def _candidate_pairs(self, records) -> Iterator[Tuple[int, int]]:
+        """블록 + n-gram prefix 역색인으로 비교할 후보 쌍 생성 (레코드별로 흘려보내 메모리 사용 제한)"""
+        precision = self.config["geohash_precision"]
+        max_postings = self.config["max_postings"]
+        min_similarity = self.config["min_name_similarity"]
+
+        # 드문 n-gram부터 정렬해 prefix만 색인 (n-gram을 충분히 공유하면 prefix끼리도 반드시 겹침)
+        frequency = Counter(gram for record in records for gram in record[1])
+        prefixes = []
+        for record in records:
+            ordered = sorted(record[1], key=lambda g: (frequency[g], g))
+            prefixes.append(ordered[:len(ordered) - math.ceil(min_similarity * len(ordered)) + 1])
+
+        postings: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        by_value: Dict[Tuple[int, str], List[int]] = defaultdict(list)
+        for index, record in enumerate(records):
+            block = record[4]
+            for gram in prefixes[index]:
+                postings[(block, gram)].append(index)
+            if record[2]:
+                by_value[(2, record[2])].append(index)
+            if record[3]:
+                by_value[(3, record[3])].append(index)
+
+        neighbor_cache: Dict[str, List[str]] = {}
+        skipped = 0
+        for index, record in enumerate(records):
+            block, lat = record[4], record[5]
+            if lat is None:
+                blocks = [block]  # 동/도로 블록은 인접 개념 없음
+            else:
+                blocks = neighbor_cache.get(block)
+                if blocks is None:
+                    blocks = neighbor_cache[block] = geohash_neighbors(lat, record[6], precision)
+
+            seen = set()
+            for block in blocks:
+                for gram in prefixes[index]:
+                    posting = postings.get((block, gram))
+                    if not posting:
+                        continue
+                    if len(posting) > max_postings:
+                        skipped += 1
+                        continue
+                    seen.update(posting)
+            for other in seen:
+                if other > index:
+                    yield index, other
+
+        # 같은 전화번호/같은 건물은 상호명이 달라도 후보 (대표번호, 대형 상가는 그룹 크기로 제한)
+        for indexes in by_value.values():
+            if 1 < len(indexes) <= max_postings:
+                for i, a in enumerate(indexes):
+                    for b in indexes[i + 1:]:
+                        yield a, b
+
+        self.stats["skipped_postings"] = skipped
+
+    # ---- 3. 점수 ---------------------------------------------------------
+
+    def score(self, a, b) -> float:
+        """두 정규화 레코드가 같은 장소일 점수 (0~1)"""
+        name_a, grams_a, phone_a, addr_a, _, lat_a, lng_a = a
+        name_b, grams_b, phone_b, addr_b, _, lat_b, lng_b = b
+
+        if grams_a and grams_b:
+            name_sim = 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+        else:
+            name_sim = 0.0
+        if name_a and name_b and min(len(name_a), len(name_b)) >= 3 and (name_a in name_b or name_b in name_a):
+            name_sim = max(name_sim, 0.9)
+
+        if phone_a and phone_a == phone_b and name_sim >= 0.5:
+            return max(0.9, name_sim)
+
+        signals = []
+        if phone_a and phone_b:
+            signals.append(1.0 if phone_a == phone_b else 0.0)
+        if addr_a and addr_b:
+            signals.append(1.0 if addr_a == addr_b else 0.0)
+        if lat_a is not None and lat_b is not None:
+            dy = (lat_a - lat_b) * 111_320
+            dx = (lng_a - lng_b) * 111_320 * math.cos(math.radians(lat_a))
+            distance = math.hypot(dx, dy)
+            near = self.config["near_distance_m"]
+            signals.append(max(0.0, 1.0 - max(0.0, distance - near) / (near * 5)))
+
+        if not signals:
+            return name_sim * 0.8
+        return 0.6 * name_sim + 0.4 * sum(signals) / len(signals)
+
+    # ---- 4. 군집 및 ID 유지 -----------------------------------------------
+
+    def resolve(self, rows: List[Dict[str, Any]]) -> List[str]:
+        """각 행의 엔티티 ID 목록 반환 (엔티티/매핑 테이블도 갱신)"""
+        started = time.perf_counter()
+        records, members = self._prepare(rows)
+        prepared = time.perf_counter()
+
+        threshold = self.config["match_threshold"]
+        clusters = UnionFind(len(records))
+        candidates = matched = 0
+        for a, b in self._candidate_pairs(records):
+            candidates += 1
+            if self.score(records[a], records[b]) >= threshold:
+                clusters.union(a, b)
+                matched += 1
+        scored = time.perf_counter()
+
+        entity_ids = self._assign_ids(rows, members, clusters)
+        finished = time.perf_counter()
+
+        self.stats.update({
+            "rows": len(rows),
+            "unique_records": len(records),
+            "candidate_pairs": candidates,
+            "matched_pairs": matched,
+            "entities": len(set(entity_ids)),
+            "seconds": {
+                "prepare": round(prepared - started, 2),
+                "blocking_scoring": round(scored - prepared, 2),
+                "assign": round(finished - scored, 2)
+            }
+        })
+        return entity_ids
+
+    def _assign_ids(self, rows, members, clusters: UnionFind) -> List[str]:
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        record_keys = [make_place_id(row) for row in rows]
+        known = dict(self.conn.execute("SELECT record_key, entity_id FROM entity_records"))
+
+        # 군집(root) -> 행 번호 목록
+        groups: Dict[int, List[int]] = defaultdict(list)
+        for row_index, record_index in enumerate(members):
+            groups[clusters.find(record_index)].append(row_index)
+
+        # 큰 군집부터 기존 ID를 가져가도록 해서 분리된 경우 작은 쪽이 새 ID를 받음
+        ordered = sorted(groups.values(), key=lambda group: (-len(group), min(record_keys[i] for i in group)))
+        used = set()
+        row_entities = [None] * len(rows)
+        aliases = []
+
+        for group in ordered:
+            previous = Counter(known[record_keys[i]] for i in group if record_keys[i] in known)
+            candidates = [eid for eid, _ in sorted(previous.items(), key=lambda item: (-item[1], item[0]))
+                          if eid not in used]
+            if candidates:
+                entity_id = candidates[0]
+                aliases.extend((old_id, entity_id, now) for old_id in candidates[1:])
+            else:
+                seed = min(record_keys[i] for i in group)
+                entity_id = "E" + hashlib.sha1(seed.encode('utf-8')).hexdigest()[:15]
+                while entity_id in used:
+                    entity_id = "E" + hashlib.sha1(entity_id.encode('utf-8')).hexdigest()[:15]
+            used.add(entity_id)
+            for i in group:
+                row_entities[i] = entity_id
+
+        with self.conn:
+            self.conn.executemany("""
+                INSERT INTO entity_records (record_key, entity_id, first_seen) VALUES (?, ?, ?)
+                ON CONFLICT(record_key) DO UPDATE SET entity_id = excluded.entity_id
+            """, ((key, entity_id, now) for key, entity_id in zip(record_keys, row_entities)))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO entity_aliases (old_id, entity_id, merged_at) VALUES (?, ?, ?)", aliases
+            )
+            self.conn.executemany("""
+                INSERT INTO entities
+                    (entity_id, name, address, phone, category, lat, lng, record_count, first_seen, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(entity_id) DO UPDATE SET
+                    name = excluded.name, address = excluded.address, phone = excluded.phone,
+                    category = excluded.category, lat = excluded.lat, lng = excluded.lng,
+                    record_count = excluded.record_count, updated_at = excluded.updated_at
+            """, (
+                (row_entities[group[0]],) + self._canonical([rows[i] for i in group]) + (len(group), now, now)
+                for group in ordered
+            ))
+
+        self.stats["merged_ids"] = len(aliases)
+        return row_entities
+
+    def _canonical(self, rows: List[Dict[str, Any]]) -> Tuple:
+        """군집 대표값: 가장 많이 나온 표기 (같으면 짧은 표기)"""
+        def most_common(field):
+            values = Counter(value for value in (field_text(row, field) for row in rows) if value)
+            if not values:
+                return None
+            return sorted(values.items(), key=lambda item: (-item[1], len(item[0]), item[0]))[0][0]
+
+        located = self.geocoder.geocode(most_common('주소') or "") if self.geocoder else None
+        return (most_common('가게명'), most_common('주소'), most_common('전화번호'), most_common('카테고리'),
+                located.lat if located else None, located.lng if located else None)
+
+    def resolve_alias(self, entity_id: str) -> str:
+        """병합으로 사라진 ID를 현재 ID로 변환"""
+        seen = set()
+        while entity_id not in seen:
+            seen.add(entity_id)
+            row = self.conn.execute("SELECT entity_id FROM entity_aliases WHERE old_id = ?", (entity_id,)).fetchone()
+            if not row:
+                break
+            entity_id = row[0]
+        return entity_id
+
+    def close(self):
+        self.conn.close()
+
+
+def synthetic_rows(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """벤치마크용 표기 변형이 섞인 장소 레코드"""
+    import random
+    rng = random.Random(seed)
+    brands = ["스타벅스", "투썸플레이스", "이디야커피", "메가커피", "김밥천국", "본죽", "교촌치킨", "맘스터치"]
+    syllables = "가나다라마바사아자차카타파하정민서윤도현우진수경희영철한솔빛봄달별숲들강산이은주연호태성미혜석"
+    districts = {
+        "처인구": ["김량장", "역북", "삼가", "유방", "고림", "마평", "운학", "호동", "해곡", "남동"],
+        "기흥구": ["구갈", "신갈", "영덕", "보정", "마북", "동백", "상하", "언남", "청덕", "중동"],
+        "수지구": ["풍덕천", "죽전", "동천", "고기", "신봉", "성복", "상현"],
+    }
+    places = []
+    for i in range(max(1, count // 4)):
+        district = rng.choice(list(districts))
+        if rng.random() < 0.3:
+            name = f"{rng.choice(brands)} {rng.choice(districts['기흥구'])}{rng.randint(1, 30)}점"
+        else:
+            name = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 5))) + rng.choice(["식당", "카페", "분식", ""])
+        places.append({
+            "가게명": name,
+            "주소": f"경기 용인시 {district} {rng.choice(districts[district])}동 {rng.randint(1, 999)}-{rng.randint(0, 30)}",
+            "전화번호": f"031-{rng.randint(200, 999)}-{rng.randint(1000, 9999)}" if rng.random() < 0.7 else "",
+            "카테고리": rng.choice(["카페", "한식", "분식", "치킨"])
+        })
+
+    rows = []
+    for _ in range(count):
+        row = dict(rng.choice(places))
+        variant = rng.random()
+        if variant < 0.1:
+            row["가게명"] = row["가게명"].rstrip("점")
+        elif variant < 0.15:
+            row["가게명"] = row["가게명"].replace(" ", "")
+        elif variant < 0.2 and row["전화번호"]:
+            row["전화번호"] = row["전화번호"].replace("-", "")
+        elif variant < 0.25:
+            row["전화번호"] = ""
+        elif variant < 0.3:
+            row["가게명"] = row["가게명"] + " " + row["카테고리"]
+        rows.append(row)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="장소 엔티티 통합")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    resolve_cmd = sub.add_parser("resolve", help="크롤링 결과 엑셀에 장소_ID 부여")
+    resolve_cmd.add_argument("files", nargs="+")
+
+    bench_cmd = sub.add_parser("bench", help="합성 레코드로 처리 시간 측정")
+    bench_cmd.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    if args.command == "bench":
+        rows = synthetic_rows(args.rows)
+        bench_db = os.path.join(OUTPUT_DIR, "entities_bench.db")
+        if os.path.exists(bench_db):
+            os.remove(bench_db)
+        with EntityResolver(bench_db) as resolver:
+            resolver.resolve(rows)
+            print(resolver.stats)
+        return
+
+    rows = []
+    for path in args.files:
+        rows.extend(read_result_excel(path).to_dict("records"))
+
+    try:
+        geocoder = AddressIndex()
+    except FileNotFoundError:
+        geocoder = None
+
+    with EntityResolver(geocoder=geocoder) as resolver:
+        for row, entity_id in zip(rows, resolver.resolve(rows)):
+            row["장소_ID"] = entity_id
+        print(resolver.stats)
+
+    if geocoder:
+        geocoder.close()
+
+    create_output_directory(OUTPUT_DIR)
+    filepath = save_to_excel(rows, generate_filename(RESOLVED_FILENAME_FORMAT), OUTPUT_DIR)
+    print(f"✅ 엔티티 통합 완료! {filepath}")
+
+
+if __name__ == "__main__":
+    main()
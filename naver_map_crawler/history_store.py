@@ -0,0 +1,330 @@
+"""
+크롤링 이력 저장소
+실행마다 결과를 Parquet 파일로 추가하고 crawl_date/location/keyword 파티션으로 나눠 보관한다.
+- 조회: 매니페스트로 필요한 파티션 파일만 고르고, 필요한 컬럼만 메모리 맵으로 읽음
+- 시점 조회: 각 (지역, 키워드)의 주어진 시각 이전 마지막 실행 결과
+- 압축: 파티션 안의 작은 실행 파일들을 하나로 병합
+"""
+import argparse
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from pyarrow import fs
+
+from config import HISTORY_CONFIG
+from utils import create_output_directory, read_result_excel
+from change_detection import make_place_id
+
+SCHEMA = pa.schema([
+    ("run_id", pa.string()),
+    ("crawled_at", pa.timestamp("s")),
+    ("place_id", pa.string()),
+    ("지역", pa.string()),
+    ("키워드", pa.string()),
+    ("가게명", pa.string()),
+    ("주소", pa.string()),
+    ("평점", pa.float64()),
+    ("전화번호", pa.string()),
+    ("카테고리", pa.string()),
+])
+
+
+def _timestamp(value) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return pd.Timestamp(value).to_pydatetime()
+
+
+def to_table(data: List[Dict[str, Any]], run_id: str, crawled_at: datetime) -> pa.Table:
+    """크롤링 결과 행 -> 이력 스키마 테이블"""
+    df = pd.DataFrame(data)
+    for column in ("지역", "키워드", "가게명", "주소", "평점", "전화번호", "카테고리"):
+        if column not in df.columns:
+            df[column] = None
+
+    rating = pd.to_numeric(df["평점"].astype(str).str.extract(r"(\d+(?:\.\d+)?)", expand=False), errors="coerce")
+    frame = pd.DataFrame({
+        "run_id": run_id,
+        "crawled_at": pd.Timestamp(crawled_at).floor("s"),
+        "place_id": [make_place_id(row) for row in df[["가게명", "주소"]].fillna("").to_dict("records")],
+        "지역": df["지역"].fillna("").astype("string"),
+        "키워드": df["키워드"].fillna("").astype("string"),
+        "가게명": df["가게명"].astype("string"),
+        "주소": df["주소"].astype("string"),
+        "평점": rating,
+        "전화번호": df["전화번호"].astype("string"),
+        "카테고리": df["카테고리"].astype("string"),
+    })
+    return pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+
+
+class HistoryStore:
+    """Parquet 파티션 디렉토리 + SQLite 매니페스트"""
+
+    def __init__(self, root: Optional[str] = None, config: Optional[Dict[str, Any]] = None):
+        self.config = dict(HISTORY_CONFIG, **(config or {}))
+        self.root = root or self.config["dir"]
+        create_output_directory(self.root)
+        self.filesystem = fs.LocalFileSystem(use_mmap=True)
+
+        self.conn = sqlite3.connect(os.path.join(self.root, "manifest.db"))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS segments (
+                run_id TEXT NOT NULL,
+                crawled_at TEXT NOT NULL,
+                crawl_date TEXT NOT NULL,
+                location TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                file TEXT NOT NULL,
+                rows INTEGER NOT NULL,
+                PRIMARY KEY (run_id, location, keyword)
+            );
+            CREATE INDEX IF NOT EXISTS idx_segments_scope ON segments (location, keyword, crawled_at);
+            CREATE INDEX IF NOT EXISTS idx_segments_file ON segments (file);
+        """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def partition_dir(self, crawl_date: str, location: str, keyword: str) -> str:
+        """hive 형식 파티션 경로 (값은 URI 인코딩)"""
+        return os.path.join(
+            f"crawl_date={crawl_date}", f"location={quote(location, safe='')}", f"keyword={quote(keyword, safe='')}"
+        )
+
+    # ---- 쓰기 ------------------------------------------------------------
+
+    def append(self, data: List[Dict[str, Any]], crawled_at: Optional[datetime] = None,
+               run_id: Optional[str] = None) -> str:
+        """실행 결과 전체를 (지역, 키워드)별 파일로 추가하고 run_id 반환"""
+        crawled_at = crawled_at or datetime.now()
+        run_id = run_id or f"{crawled_at.strftime('%Y%m%dT%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        crawl_date = crawled_at.strftime(self.config["date_partition"])
+        table = to_table(data, run_id, crawled_at)
+
+        segments = []
+        scopes = table.group_by(["지역", "키워드"]).aggregate([]).to_pylist()
+        for scope in scopes:
+            location, keyword = scope["지역"], scope["키워드"]
+            part = table.filter(
+                pc.and_(pc.equal(table["지역"], location), pc.equal(table["키워드"], keyword))
+            )
+            relative = os.path.join(self.partition_dir(crawl_date, location, keyword), f"run-{run_id}.parquet")
+            self._write(part, relative)
+            segments.append((run_id, crawled_at.strftime("%Y-%m-%d %H:%M:%S"), crawl_date,
+                             location, keyword, relative, part.num_rows))
+
+        with self.conn:
+            self.conn.executemany("INSERT INTO segments VALUES (?, ?, ?, ?, ?, ?, ?)", segments)
+        return run_id
+
+    def _write(self, table: pa.Table, relative: str):
+        path = os.path.join(self.root, relative)
+        create_output_directory(os.path.dirname(path))
+        tmp_path = f"{path}.tmp"
+        pq.write_table(table.sort_by([("run_id", "ascending"), ("place_id", "ascending")]), tmp_path,
+                       row_group_size=self.config["row_group_size"], compression="zstd")
+        os.replace(tmp_path, path)
+
+    # ---- 조회 ------------------------------------------------------------
+
+    def _segments(self, since=None, until=None, location: Optional[str] = None,
+                  keywords: Optional[Iterable[str]] = None, as_of=None) -> List[tuple]:
+        """조건에 맞는 (run_id, file) 목록. 매니페스트만 보고 파티션을 가지치기"""
+        clauses, params = [], []
+        since, until, as_of = _timestamp(since), _timestamp(until), _timestamp(as_of)
+        if since:
+            clauses.append("crawled_at >= ?")
+            params.append(since.strftime("%Y-%m-%d %H:%M:%S"))
+        if until:
+            clauses.append("crawled_at < ?")
+            params.append(until.strftime("%Y-%m-%d %H:%M:%S"))
+        if location:
+            clauses.append("location LIKE ?")  # '처인구' 처럼 일부만 줘도 매칭
+            params.append(f"%{location}%")
+        if keywords:
+            keywords = list(keywords)
+            clauses.append(f"keyword IN ({', '.join('?' * len(keywords))})")
+            params.extend(keywords)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        if as_of is None:
+            return self.conn.execute(f"SELECT run_id, file FROM segments {where}", params).fetchall()
+
+        # 시점 조회: 범위별로 as_of 이전 마지막 실행만
+        clauses.append("crawled_at <= ?")
+        params.append(as_of.strftime("%Y-%m-%d %H:%M:%S"))
+        return self.conn.execute(f"""
+            SELECT run_id, file FROM (
+                SELECT run_id, file, ROW_NUMBER() OVER (
+                    PARTITION BY location, keyword ORDER BY crawled_at DESC, run_id DESC
+                ) AS rank
+                FROM segments WHERE {' AND '.join(clauses)}
+            ) WHERE rank = 1
+        """, params).fetchall()
+
+    def scan(self, columns: Optional[List[str]] = None, since=None, until=None,
+             location: Optional[str] = None, keywords: Optional[Iterable[str]] = None,
+             as_of=None, filter: Optional[pc.Expression] = None) -> pa.Table:
+        """필요한 파티션 파일과 컬럼만 읽기
+
+        filter에는 pyarrow 식(예: ds.field("평점") >= 4.0)을 줄 수 있으며 row group 통계로 건너뜀
+        """
+        segments = self._segments(since, until, location, keywords, as_of)
+        schema = SCHEMA if columns is None else pa.schema([SCHEMA.field(name) for name in columns])
+        if not segments:
+            return schema.empty_table()
+
+        files = sorted({os.path.join(self.root, file) for _, file in segments})
+        dataset = ds.dataset(files, schema=SCHEMA, format="parquet", filesystem=self.filesystem)
+
+        # 압축된 파일에는 다른 실행도 섞여 있으므로 선택된 실행만 남김
+        expression = ds.field("run_id").isin(sorted({run_id for run_id, _ in segments}))
+        if filter is not None:
+            expression = expression & filter
+        return dataset.to_table(columns=columns, filter=expression)
+
+    def query(self, **kwargs) -> pd.DataFrame:
+        """scan 결과를 DataFrame으로"""
+        return self.scan(**kwargs).to_pandas()
+
+    def snapshot(self, as_of=None, **kwargs) -> pd.DataFrame:
+        """as_of 시각 기준 각 (지역, 키워드)의 마지막 실행 결과 (기본: 현재)"""
+        return self.query(as_of=as_of or datetime.now(), **kwargs)
+
+    def rating_trend(self, location: Optional[str] = None, since=None, until=None,
+                     freq: str = "W") -> pd.DataFrame:
+        """기간별 장소 평균 평점 (행: 기간, 열: place_id)"""
+        df = self.query(columns=["crawled_at", "place_id", "평점"], since=since, until=until,
+                        location=location, filter=ds.field("평점").is_valid())
+        if df.empty:
+            return df
+        return df.pivot_table(index=pd.Grouper(key="crawled_at", freq=freq), columns="place_id",
+                              values="평점", aggfunc="mean")
+
+    def runs(self) -> pd.DataFrame:
+        return pd.read_sql_query("""
+            SELECT run_id, MIN(crawled_at) AS crawled_at, COUNT(*) AS scopes, SUM(rows) AS rows
+            FROM segments GROUP BY run_id ORDER BY crawled_at
+        """, self.conn)
+
+    # ---- 압축 ------------------------------------------------------------
+
+    def compact(self, min_files: Optional[int] = None) -> Dict[str, int]:
+        """파티션별로 작은 파일이 min_files 이상 쌓이면 하나로 병합"""
+        min_files = min_files or self.config["compact_min_files"]
+        partitions = self.conn.execute("""
+            SELECT crawl_date, location, keyword, COUNT(DISTINCT file) AS files
+            FROM segments GROUP BY crawl_date, location, keyword HAVING files >= ?
+        """, (min_files,)).fetchall()
+
+        merged_files = 0
+        for crawl_date, location, keyword, _ in partitions:
+            old_files = [row[0] for row in self.conn.execute(
+                "SELECT DISTINCT file FROM segments WHERE crawl_date = ? AND location = ? AND keyword = ?",
+                (crawl_date, location, keyword)
+            )]
+            table = ds.dataset([os.path.join(self.root, f) for f in old_files], schema=SCHEMA,
+                               format="parquet", filesystem=self.filesystem).to_table()
+
+            relative = os.path.join(self.partition_dir(crawl_date, location, keyword),
+                                    f"compacted-{uuid.uuid4().hex[:12]}.parquet")
+            self._write(table, relative)
+
+            # 매니페스트를 먼저 새 파일로 바꾼 뒤 기존 파일 삭제 (중간에 실패해도 조회 가능)
+            # 병합 중에 추가된 실행은 새 파일에 없으므로 병합한 파일을 가리키던 구간만 바꿈
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE segments SET file = ? WHERE crawl_date = ? AND location = ? AND keyword = ? "
+                    "AND file IN (SELECT value FROM json_each(?))",
+                    (relative, crawl_date, location, keyword, json.dumps(old_files))
+                )
+            for file in old_files:
+                try:
+                    os.remove(os.path.join(self.root, file))
+                except OSError:
+                    pass
+            merged_files += len(old_files)
+
+        return {"partitions": len(partitions), "merged_files": merged_files}
+
+    def close(self):
+        self.conn.close()
+
+
+def append_run(data: List[Dict[str, Any]], logger) -> Optional[str]:
+    """크롤링 결과를 이력 저장소에 추가 (save_crawl_output에서 호출)"""
+    if not data:
+        return None
+    with HistoryStore() as store:
+        run_id = store.append(data)
+    logger.info(f"이력 저장소 추가: {run_id} ({len(data)}행)")
+    return run_id
+
+
+def import_excel(store: HistoryStore, path: str) -> Optional[str]:
+    """기존 엑셀 결과 파일을 이력으로 가져오기 (크롤링_시간의 가장 이른 값을 실행 시각으로 사용)"""
+    df = read_result_excel(path)
+    if df.empty:
+        return None
+    crawled = pd.to_datetime(df.get("크롤링_시간"), errors="coerce") if "크롤링_시간" in df else None
+    if crawled is not None and crawled.notna().any():
+        crawled_at = crawled.min().to_pydatetime()
+    else:
+        crawled_at = datetime.fromtimestamp(os.path.getmtime(path))
+    return store.append(df.to_dict("records"), crawled_at=crawled_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="크롤링 이력 저장소")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = sub.add_parser("import", help="기존 엑셀 결과 파일 가져오기")
+    import_cmd.add_argument("files", nargs="+")
+
+    sub.add_parser("compact", help="파티션별 작은 파일 병합")
+    sub.add_parser("runs", help="저장된 실행 목록")
+
+    trend_cmd = sub.add_parser("trend", help="지역 장소 평점 추이")
+    trend_cmd.add_argument("--location", help="지역 (일부만 입력 가능, 예: 처인구)")
+    trend_cmd.add_argument("--since", help="시작 시각 (예: 2025-04-01)")
+    trend_cmd.add_argument("--until", help="종료 시각")
+    trend_cmd.add_argument("--freq", default="W", help="집계 주기 (D, W, MS)")
+
+    snapshot_cmd = sub.add_parser("snapshot", help="특정 시점 기준 결과를 CSV로 저장")
+    snapshot_cmd.add_argument("as_of", help="기준 시각 (예: 2025-09-01 12:00)")
+    snapshot_cmd.add_argument("output")
+    args = parser.parse_args()
+
+    with HistoryStore() as store:
+        if args.command == "import":
+            for path in sorted(args.files):
+                print(f"{path}: {import_excel(store, path)}")
+        elif args.command == "compact":
+            print(f"✅ 압축 완료: {store.compact()}")
+        elif args.command == "runs":
+            print(store.runs().to_string(index=False))
+        elif args.command == "trend":
+            trend = store.rating_trend(args.location, args.since, args.until, args.freq)
+            print(trend.mean(axis=1).round(3).to_string() if not trend.empty else "데이터 없음")
+        else:
+            df = store.snapshot(args.as_of)
+            df.to_csv(args.output, index=False, encoding="utf-8-sig")
+            print(f"✅ {len(df)}행 저장: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+원본 페이지 아카이브
+가져온 페이지 HTML을 내용 해시(sha256) 기준으로 압축 저장하고
+쿼리(지역, 키워드)와 시각으로 조회할 수 있는 인덱스를 유지
+보관 기간/용량 상한(ARCHIVE_CONFIG)을 넘은 오래된 페이지는 정리 명령으로 삭제
+
+사용 예:
+    python page_archive.py prune    # 보관 기간/용량 상한 적용 (크롤링과 동시에 실행해도 됨)
+    python page_archive.py stats
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional
+
+from config import ARCHIVE_CONFIG
+from utils import create_output_directory
+
+
+class PageArchive:
+    """내용 주소 기반 압축 페이지 저장소"""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or ARCHIVE_CONFIG["dir"]
+        create_output_directory(os.path.join(self.root, "objects"))
+        # 트랜잭션은 _locked()에서 직접 시작 (객체 파일 생성/삭제를 인덱스 쓰기 잠금으로 직렬화)
+        self.conn = sqlite3.connect(os.path.join(self.root, "index.db"), timeout=60,
+                                    isolation_level=None, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                digest TEXT NOT NULL,
+                location TEXT,
+                keyword TEXT,
+                url TEXT,
+                fetched_at TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_pages_query ON pages (location, keyword, fetched_at);
+            CREATE INDEX IF NOT EXISTS idx_pages_fetched ON pages (fetched_at);
+        """)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def object_path(self, digest: str) -> str:
+        return object_path(self.root, digest)
+
+    @staticmethod
+    def _compress(raw: bytes) -> bytes:
+        return gzip.compress(raw, compresslevel=ARCHIVE_CONFIG["compression_level"])
+
+    @contextmanager
+    def _locked(self):
+        """인덱스 쓰기 잠금(BEGIN IMMEDIATE) 트랜잭션
+
+        put()의 객체 확인/저장과 prune()의 참조 확인/삭제를 이 잠금 안에서 하므로
+        다른 프로세스가 같은 해시를 저장하는 중에 객체가 지워지지 않는다
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+    def put(self, html: str, location: str, keyword: str, url: str = "") -> str:
+        """페이지 저장 (같은 내용은 한 번만 저장) 후 해시 반환"""
+        raw = html.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self.object_path(digest)
+        # 압축은 잠금 밖에서 (이미 있는 객체면 생략)
+        compressed = None if os.path.exists(path) else self._compress(raw)
+
+        with self._locked():
+            if not os.path.exists(path):
+                compressed = compressed or self._compress(raw)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    f.write(compressed)
+                os.replace(tmp_path, path)
+
+            self.conn.execute(
+                "INSERT INTO pages (digest, location, keyword, url, fetched_at, size, stored_size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (digest, location, keyword, url, datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                 len(raw), os.path.getsize(path))
+            )
+        return digest
+
+    def get(self, digest: str) -> str:
+        """해시로 페이지 HTML 읽기"""
+        return read_object(self.root, digest)
+
+    def query(self, location: Optional[str] = None, keyword: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None) -> List[Dict[str, Any]]:
+        """쿼리/기간 조건으로 아카이브 항목 조회 (오래된 순)"""
+        conditions, params = [], []
+        if location:
+            conditions.append("location = ?")
+            params.append(location)
+        if keyword:
+            conditions.append("keyword = ?")
+            params.append(keyword)
+        if since:
+            conditions.append("fetched_at >= ?")
+            params.append(since)
+        if until:
+            conditions.append("fetched_at < ?")
+            params.append(until)
+
+        sql = "SELECT digest, location, keyword, url, fetched_at FROM pages"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY fetched_at, id"
+
+        columns = ["digest", "location", "keyword", "url", "fetched_at"]
+        return [dict(zip(columns, row)) for row in self.conn.execute(sql, params)]
+
+    def stats(self) -> Dict[str, Any]:
+        pages, objects, size, stored = self.conn.execute("""
+            SELECT COUNT(*), COUNT(DISTINCT digest), COALESCE(SUM(size), 0),
+                   (SELECT COALESCE(SUM(stored_size), 0) FROM (SELECT DISTINCT digest, stored_size FROM pages))
+            FROM pages
+        """).fetchone()
+        return {"pages": pages, "objects": objects, "raw_bytes": size, "stored_bytes": stored}
+
+    def prune(self, retention_days: Optional[int] = None, max_size_mb: Optional[float] = None) -> int:
+        """보관 기간이 지난 페이지와 용량 상한을 넘는 오래된 페이지를 지우고 삭제한 객체 수 반환
+
+        객체 파일은 같은 쓰기 트랜잭션 안에서 참조가 남아 있지 않은지 다시 확인한 뒤 삭제
+        """
+        retention_days = retention_days if retention_days is not None else ARCHIVE_CONFIG["retention_days"]
+        max_size_mb = max_size_mb if max_size_mb is not None else ARCHIVE_CONFIG["max_size_mb"]
+        candidates = set()
+        removed = 0
+
+        with self._locked():
+            if retention_days:
+                cutoff = (datetime.now() - timedelta(days=retention_days)).strftime("%Y-%m-%d %H:%M:%S")
+                candidates.update(digest for digest, in self.conn.execute(
+                    "SELECT DISTINCT digest FROM pages WHERE fetched_at < ?", (cutoff,)
+                ))
+                self.conn.execute("DELETE FROM pages WHERE fetched_at < ?", (cutoff,))
+
+            if max_size_mb:
+                # 객체는 가장 최근에 참조된 시각 기준으로 최신 것부터 상한까지 남김
+                budget, over = max_size_mb * 1024 * 1024, []
+                for digest, stored_size in self.conn.execute(
+                    "SELECT digest, MAX(stored_size) FROM pages GROUP BY digest ORDER BY MAX(fetched_at) DESC"
+                ):
+                    budget -= stored_size
+                    if budget < 0:
+                        over.append(digest)
+                self.conn.executemany("DELETE FROM pages WHERE digest = ?", [(digest,) for digest in over])
+                candidates.update(over)
+
+            referenced = {digest for digest, in self.conn.execute(
+                "SELECT DISTINCT digest FROM pages WHERE digest IN (SELECT value FROM json_each(?))",
+                (json.dumps(sorted(candidates)),)
+            )}
+
+            for digest in candidates - referenced:
+                try:
+                    os.remove(self.object_path(digest))
+                    removed += 1
+                except FileNotFoundError:
+                    pass  # 다른 프로세스가 먼저 정리한 경우
+        return removed
+
+    def close(self):
+        self.conn.close()
+
+
+def object_path(root: str, digest: str) -> str:
+    """해시 앞 4글자로 디렉토리를 나눈 저장 경로"""
+    return os.path.join(root, "objects", digest[:2], digest[2:4], f"{digest}.html.gz")
+
+
+def read_object(root: str, digest: str) -> str:
+    """압축된 페이지 읽기 (다른 프로세스에서도 인덱스 없이 사용 가능)"""
+    with open(object_path(root, digest), 'rb') as f:
+        return gzip.decompress(f.read()).decode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="원본 페이지 아카이브 관리")
+    parser.add_argument("--archive", help="아카이브 디렉토리 (기본: ARCHIVE_CONFIG['dir'])")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    prune_cmd = sub.add_parser("prune", help="보관 기간/용량 상한을 넘은 오래된 페이지 삭제")
+    prune_cmd.add_argument("--retention-days", type=int, help="보관 기간 (기본: ARCHIVE_CONFIG)")
+    prune_cmd.add_argument("--max-size-mb", type=float, help="용량 상한 (기본: ARCHIVE_CONFIG)")
+    sub.add_parser("stats", help="저장 통계")
+    args = parser.parse_args()
+
+    with PageArchive(args.archive) as archive:
+        if args.command == "prune":
+            removed = archive.prune(args.retention_days, args.max_size_mb)
+            print(f"✅ 정리 완료! 삭제한 객체 {removed}개, 현재 {archive.stats()}")
+        else:
+            print(archive.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+장소 DB(database.db) 검색 인덱스 및 쿼리 모듈
+- FTS5 trigram: 한글 가게명/주소 부분 문자열 검색
+- R*Tree: 좌표 바운딩 박스 검색
+- 복합 인덱스: 카테고리/검색(지역) 필터 + 최신순 정렬
+- 키셋 페이지네이션: (created_at, id) 커서
+- 검색어/범위가 넓으면(매칭 건수 ≥ probe_limit) 조인 대신 최신순 인덱스를 따라가며 EXISTS로 확인
+"""
+import base64
+import json
+import sqlite3
+from typing import Dict, Any, Optional, Tuple
+
+from config import PLACE_DB_PATH, PLACE_QUERY_CONFIG
+
+# trigram 토크나이저는 3글자 미만 검색어를 매칭하지 못함
+TRIGRAM_MIN_LENGTH = 3
+
+INDEX_STATEMENTS = [
+    "CREATE INDEX IF NOT EXISTS idx_places_created ON places (created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_places_category_created ON places (category, created_at DESC, id DESC)",
+    "CREATE INDEX IF NOT EXISTS idx_places_search_created ON places (search_id, created_at DESC, id DESC)",
+
+    """CREATE VIRTUAL TABLE IF NOT EXISTS places_fts USING fts5(
+        name, address,
+        content='places', content_rowid='id',
+        tokenize='trigram'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS places_fts_ai AFTER INSERT ON places BEGIN
+        INSERT INTO places_fts (rowid, name, address) VALUES (new.id, new.name, new.address);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS places_fts_ad AFTER DELETE ON places BEGIN
+        INSERT INTO places_fts (places_fts, rowid, name, address) VALUES ('delete', old.id, old.name, old.address);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS places_fts_au AFTER UPDATE OF name, address ON places BEGIN
+        INSERT INTO places_fts (places_fts, rowid, name, address) VALUES ('delete', old.id, old.name, old.address);
+        INSERT INTO places_fts (rowid, name, address) VALUES (new.id, new.name, new.address);
+    END""",
+
+    "CREATE VIRTUAL TABLE IF NOT EXISTS places_rtree USING rtree(id, min_lat, max_lat, min_lng, max_lng)",
+    """CREATE TRIGGER IF NOT EXISTS places_rtree_ai AFTER INSERT ON places
+       WHEN new.lat IS NOT NULL AND new.lng IS NOT NULL BEGIN
+        INSERT INTO places_rtree VALUES (new.id, new.lat, new.lat, new.lng, new.lng);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS places_rtree_ad AFTER DELETE ON places BEGIN
+        DELETE FROM places_rtree WHERE id = old.id;
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS places_rtree_au AFTER UPDATE OF lat, lng ON places BEGIN
+        DELETE FROM places_rtree WHERE id = old.id;
+        INSERT INTO places_rtree
+            SELECT new.id, new.lat, new.lat, new.lng, new.lng
+            WHERE new.lat IS NOT NULL AND new.lng IS NOT NULL;
+    END""",
+]
+
+
+def connect(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """장소 DB 연결 (읽기 성능 위주 PRAGMA 적용)"""
+    conn = sqlite3.connect(db_path or PLACE_DB_PATH)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA cache_size = -65536")  # 64MB
+    conn.execute("PRAGMA mmap_size = 268435456")
+    return conn
+
+
+def ensure_coordinate_columns(conn: sqlite3.Connection):
+    """places 테이블에 lat/lng 컬럼이 없으면 추가"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(places)")}
+    for column in ("lat", "lng"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE places ADD COLUMN {column} REAL")
+
+
+def build_indexes(conn: sqlite3.Connection, rebuild: bool = False):
+    """검색 인덱스 생성 및 기존 데이터 적재 (여러 번 실행해도 안전)"""
+    with conn:
+        ensure_coordinate_columns(conn)
+        for statement in INDEX_STATEMENTS:
+            conn.execute(statement)
+
+        fts_count = conn.execute("SELECT COUNT(*) FROM places_fts_docsize").fetchone()[0]
+        if rebuild or fts_count == 0:
+            conn.execute("INSERT INTO places_fts (places_fts) VALUES ('rebuild')")
+
+        rtree_count = conn.execute("SELECT COUNT(*) FROM places_rtree").fetchone()[0]
+        if rebuild or rtree_count == 0:
+            conn.execute("DELETE FROM places_rtree")
+            conn.execute("""
+                INSERT INTO places_rtree
+                SELECT id, lat, lat, lng, lng FROM places
+                WHERE lat IS NOT NULL AND lng IS NOT NULL
+            """)
+
+    conn.execute("ANALYZE")
+
+
+def encode_cursor(row: sqlite3.Row) -> str:
+    """마지막 행의 (created_at, id)를 다음 페이지 커서로 인코딩"""
+    payload = json.dumps([row["created_at"], row["id"]])
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    created_at, place_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return created_at, place_id
+
+
+def fts_phrase(text: str) -> str:
+    """FTS5 MATCH용 문구 (따옴표 이스케이프)"""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def is_broad(conn: sqlite3.Connection, sql: str, params) -> bool:
+    """매칭 건수가 probe_limit 이상인지 (probe_limit건까지만 세어 비용 상한 고정)"""
+    probe_limit = PLACE_QUERY_CONFIG["probe_limit"]
+    count = conn.execute(f"SELECT COUNT(*) FROM ({sql} LIMIT ?)", [*params, probe_limit]).fetchone()[0]
+    return count >= probe_limit
+
+
+def query_places(conn: sqlite3.Connection,
+                 text: Optional[str] = None,
+                 bbox: Optional[Tuple[float, float, float, float]] = None,
+                 category: Optional[str] = None,
+                 search_id: Optional[int] = None,
+                 limit: Optional[int] = None,
+                 cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    장소 검색
+    bbox: (min_lat, min_lng, max_lat, max_lng)
+    반환: {"places": [...], "next_cursor": str | None}
+
+    FTS/R*Tree 매칭이 probe_limit건 미만이면 매칭 행을 조인해 정렬하고,
+    그 이상이면 최신순 인덱스를 따라가며 행마다 EXISTS로 확인해 limit건에서 멈춘다.
+    넓은 조건 여러 개의 교집합이 아주 작으면(예: 시 전체 범위 + 흔한 검색어인데
+    둘 다 만족하는 장소가 드문 경우) 인덱스를 오래 따라가야 하므로 응답이 느려질 수 있다.
+    """
+    limit = min(limit or PLACE_QUERY_CONFIG["page_size"], PLACE_QUERY_CONFIG["max_page_size"])
+    sources, conditions, params = ["places p"], [], []
+
+    if text:
+        text = text.strip()
+    if text:
+        if len(text) >= TRIGRAM_MIN_LENGTH:
+            phrase = fts_phrase(text)
+            if is_broad(conn, "SELECT 1 FROM places_fts WHERE places_fts MATCH ?", [phrase]):
+                conditions.append(
+                    "EXISTS (SELECT 1 FROM places_fts f WHERE f.rowid = p.id AND places_fts MATCH ?)"
+                )
+            else:
+                sources.append("JOIN places_fts ON places_fts.rowid = p.id")
+                conditions.append("places_fts MATCH ?")
+            params.append(phrase)
+        else:
+            # 짧은 검색어는 trigram으로 찾을 수 없으므로 LIKE로 대체
+            conditions.append("(p.name LIKE ? OR p.address LIKE ?)")
+            params.extend([f"%{text}%", f"%{text}%"])
+
+    if bbox:
+        min_lat, min_lng, max_lat, max_lng = bbox
+        box = "r.min_lat >= ? AND r.max_lat <= ? AND r.min_lng >= ? AND r.max_lng <= ?"
+        box_params = [min_lat, max_lat, min_lng, max_lng]
+        if is_broad(conn, f"SELECT 1 FROM places_rtree r WHERE {box}", box_params):
+            conditions.append(f"EXISTS (SELECT 1 FROM places_rtree r WHERE r.id = p.id AND {box})")
+        else:
+            # 범위가 좁을수록 R*Tree가 가장 선택적이므로 조인 순서를 R*Tree 우선으로 고정
+            sources.insert(0, "places_rtree r CROSS JOIN")
+            conditions.append("r.id = p.id")
+            conditions.append(box)
+        params.extend(box_params)
+
+    if category:
+        conditions.append("p.category = ?")
+        params.append(category)
+
+    if search_id is not None:
+        conditions.append("p.search_id = ?")
+        params.append(search_id)
+
+    if cursor:
+        created_at, place_id = decode_cursor(cursor)
+        conditions.append("(p.created_at, p.id) < (?, ?)")
+        params.extend([created_at, place_id])
+
+    sql = "SELECT p.* FROM " + " ".join(sources)
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY p.created_at DESC, p.id DESC LIMIT ?"
+    params.append(limit + 1)
+
+    rows = conn.execute(sql, params).fetchall()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return {
+        "places": [dict(row) for row in rows],
+        "next_cursor": encode_cursor(rows[-1]) if has_more and rows else None
+    }
+
+
+def main():
+    """인덱스 생성 실행"""
+    conn = connect()
+    try:
+        build_indexes(conn)
+        count = conn.execute("SELECT COUNT(*) FROM places").fetchone()[0]
+        print(f"✅ 장소 검색 인덱스 생성 완료 ({count}개 장소)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""
+네이버 지도 크롤러 출구 프록시 풀
+- 프록시별 토큰 버킷 요청 예산
+- 지연/오류율/차단율 기반 건강 점수와 자동 격리
+- 예산이 남은 가장 건강한 프록시에 작업 배정
+- 테스트용 로컬 대체 프록시 서버
+"""
+import argparse
+import asyncio
+import time
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlsplit
+
+from config import PROXY_CONFIG, LOGGING_CONFIG
+from utils import setup_logging
+from rate_limiter import AsyncTokenBucket
+
+
+class Proxy:
+    """프록시 하나의 예산과 건강 상태"""
+
+    def __init__(self, server: str, username: Optional[str] = None, password: Optional[str] = None,
+                 requests_per_minute: Optional[float] = None):
+        self.server = server
+        self.username = username
+        self.password = password
+        self.bucket = AsyncTokenBucket(requests_per_minute or PROXY_CONFIG["requests_per_minute"])
+
+        self.requests = 0
+        self.errors = 0
+        self.blocks = 0
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.block_ewma = 0.0
+        self.quarantined_until = 0.0
+        self.quarantine_count = 0
+
+    def __repr__(self):
+        return f"Proxy({self.server})"
+
+    def health(self) -> float:
+        """0~1 건강 점수 (높을수록 좋음)"""
+        latency_factor = 1.0
+        if self.latency_ewma:
+            latency_factor = min(1.0, PROXY_CONFIG["latency_target"] / self.latency_ewma)
+        return (1 - self.error_ewma) * (1 - self.block_ewma) ** 2 * latency_factor
+
+    def is_quarantined(self, now: Optional[float] = None) -> bool:
+        return (now or time.monotonic()) < self.quarantined_until
+
+    def playwright_proxy(self) -> Dict[str, str]:
+        """Playwright new_context(proxy=...) 인자"""
+        proxy = {"server": self.server}
+        if self.username:
+            proxy["username"] = self.username
+            proxy["password"] = self.password or ""
+        return proxy
+
+    def chrome_argument(self) -> str:
+        """Chrome --proxy-server 인자 (인증 정보는 전달되지 않음)"""
+        parts = urlsplit(self.server)
+        address = f"{parts.hostname}:{parts.port}" if parts.port else parts.hostname
+        return f"--proxy-server={parts.scheme or 'http'}://{address}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "blocks": self.blocks,
+            "latency_ewma": self.latency_ewma,
+            "error_rate": self.error_ewma,
+            "block_rate": self.block_ewma,
+            "health": self.health(),
+            "quarantined": self.is_quarantined(),
+            "quarantine_count": self.quarantine_count,
+            "tokens": self.bucket.tokens
+        }
+
+
+class ProxyPool:
+    """건강 점수와 예산 기반 프록시 배정기"""
+
+    def __init__(self, proxies: List[Proxy]):
+        self.logger = setup_logging(LOGGING_CONFIG)
+        self.proxies = proxies
+
+    @classmethod
+    def from_config(cls, entries: Optional[List[Dict[str, Any]]] = None) -> Optional["ProxyPool"]:
+        """PROXY_CONFIG로 풀 생성. 프록시가 없으면 None"""
+        entries = PROXY_CONFIG["proxies"] if entries is None else entries
+        if not entries:
+            return None
+        return cls([Proxy(**entry) for entry in entries])
+
+    def __len__(self):
+        return len(self.proxies)
+
+    def _release_expired_quarantine(self, now: float):
+        for proxy in self.proxies:
+            if proxy.quarantined_until and now >= proxy.quarantined_until:
+                proxy.quarantined_until = 0.0
+                # 격리 해제 후에는 이전 평가를 일부만 유지하여 다시 기회를 줌
+                proxy.error_ewma /= 2
+                proxy.block_ewma /= 2
+                # 지연은 성공한 요청에서만 갱신되므로 격리 전 값이 남으면 바로 다시 격리될 수 있음
+                proxy.latency_ewma = None
+                self.logger.info(f"프록시 격리 해제: {proxy.server}")
+
+    async def acquire(self, prefer: Optional[Proxy] = None) -> Proxy:
+        """
+        예산이 남은 가장 건강한 프록시를 골라 토큰 1개를 소비
+        prefer가 건강하고 예산이 있으면 우선 사용 (브라우저/드라이버 재생성 최소화)
+        """
+        while True:
+            now = time.monotonic()
+            self._release_expired_quarantine(now)
+
+            active = [proxy for proxy in self.proxies if not proxy.is_quarantined(now)]
+            if not active:
+                wake = min(proxy.quarantined_until for proxy in self.proxies)
+                self.logger.warning(f"모든 프록시 격리 중, {wake - now:.0f}초 대기")
+                await asyncio.sleep(max(wake - now, 0.1))
+                continue
+
+            # 건강 점수가 비슷하면(0.1 단위) 남은 예산이 많은 프록시로 분산
+            for proxy in active:
+                proxy.bucket.wait_time()  # 토큰 충전 상태 갱신
+            ranked = sorted(active, key=lambda proxy: (round(proxy.health(), 1), proxy.bucket.tokens), reverse=True)
+            if prefer in ranked and prefer.health() >= ranked[0].health() * 0.9:
+                ranked.remove(prefer)
+                ranked.insert(0, prefer)
+
+            for proxy in ranked:
+                if proxy.bucket.try_acquire():
+                    return proxy
+
+            await asyncio.sleep(min(proxy.bucket.wait_time() for proxy in active))
+
+    def record(self, proxy: Proxy, latency: float, error: bool = False, blocked: bool = False):
+        """요청 결과 반영 및 격리 판정"""
+        alpha = PROXY_CONFIG["ewma_alpha"]
+        proxy.requests += 1
+        proxy.errors += int(error)
+        proxy.blocks += int(blocked)
+
+        if not error:
+            proxy.latency_ewma = latency if proxy.latency_ewma is None else (
+                alpha * latency + (1 - alpha) * proxy.latency_ewma
+            )
+        proxy.error_ewma = alpha * float(error) + (1 - alpha) * proxy.error_ewma
+        proxy.block_ewma = alpha * float(blocked) + (1 - alpha) * proxy.block_ewma
+
+        if proxy.requests >= PROXY_CONFIG["min_samples"] and proxy.health() < PROXY_CONFIG["quarantine_threshold"]:
+            self.quarantine(proxy)
+
+    def quarantine(self, proxy: Proxy):
+        """프록시 격리 (반복될수록 격리 시간 증가)"""
+        duration = PROXY_CONFIG["quarantine_seconds"] * (2 ** proxy.quarantine_count)
+        proxy.quarantine_count += 1
+        proxy.quarantined_until = time.monotonic() + duration
+        self.logger.warning(f"프록시 격리: {proxy.server} (건강 점수 {proxy.health():.2f}, {duration:.0f}초)")
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """프록시별 통계"""
+        return {proxy.server: proxy.stats() for proxy in self.proxies}
+
+
+class LocalProxyServer:
+    """
+    테스트용 로컬 HTTP 프록시 (CONNECT 터널 및 일반 HTTP 전달)
+    latency/failure_rate로 느리거나 불안정한 프록시를 흉내낼 수 있음
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0,
+                 latency: float = 0.0, failure_rate: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.connections = 0
+        self._failure_budget = 0.0
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "LocalProxyServer":
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    def _should_fail(self) -> bool:
+        # 난수 대신 누적 방식으로 실패를 분배해 테스트 결과가 항상 같도록 함
+        self._failure_budget += self.failure_rate
+        if self._failure_budget >= 1.0:
+            self._failure_budget -= 1.0
+            return True
+        return False
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            request_line = await reader.readline()
+            headers = []
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                headers.append(line)
+
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self._should_fail():
+                writer.write(b"HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n\r\n")
+                return
+
+            method, target, version = request_line.decode("latin-1").split()
+            if method == "CONNECT":
+                host, port = target.rsplit(":", 1)
+                upstream_reader, upstream_writer = await asyncio.open_connection(host, int(port))
+                writer.write(b"HTTP/1.1 200 Connection Established\r\n\r\n")
+            else:
+                parts = urlsplit(target)
+                upstream_reader, upstream_writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+                path = parts.path or "/"
+                if parts.query:
+                    path += f"?{parts.query}"
+                upstream_writer.write(f"{method} {path} {version}\r\n".encode("latin-1") + b"".join(headers) + b"\r\n")
+            await writer.drain()
+
+            await asyncio.gather(
+                self._pipe(reader, upstream_writer),
+                self._pipe(upstream_reader, writer)
+            )
+        except Exception:
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(port: int, latency: float, failure_rate: float):
+    """로컬 대체 프록시 실행"""
+    async with LocalProxyServer(port=port, latency=latency, failure_rate=failure_rate) as proxy:
+        print(f"✅ 로컬 프록시 실행 중: {proxy.url}")
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="테스트용 로컬 프록시")
+    parser.add_argument("--port", type=int, default=8899)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(serve(args.port, args.latency, args.failure_rate))
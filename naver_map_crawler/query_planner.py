@@ -0,0 +1,311 @@
+"""
+네이버 지도 크롤링 쿼리 계획기
+지역/키워드 파일을 읽어 후보 쿼리를 만들고, 쿼리별 과거 결과(장소 집합)로
+예상 신규 장소 수(한계 수확)를 추정해 같은 장소를 더 적은 요청으로 덮는 계획을 만든다
+"""
+import math
+import os
+import sqlite3
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple, Set
+
+from config import LOCATIONS, KEYWORDS, QUERY_FILES, PLANNER_CONFIG, DELTA_CONFIG
+from utils import create_output_directory
+from change_detection import make_place_id
+
+Query = Tuple[str, str]
+
+
+def load_terms(path: str, default: List[str]) -> List[str]:
+    """한 줄에 하나씩 적힌 쿼리 항목 파일 읽기 ('#' 주석, 빈 줄 무시)"""
+    if not os.path.exists(path):
+        return list(default)
+
+    terms = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#') and line not in terms:
+                terms.append(line)
+    return terms
+
+
+def all_queries() -> List[Query]:
+    """지역×키워드 전체 후보 쿼리"""
+    locations = load_terms(QUERY_FILES["locations"], LOCATIONS)
+    keywords = load_terms(QUERY_FILES["keywords"], KEYWORDS)
+    return [(location, keyword) for location in locations for keyword in keywords]
+
+
+class QueryHistory:
+    """쿼리별 결과 이력 (장소 집합 및 결과 수)"""
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or DELTA_CONFIG["state_db"]
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            create_output_directory(directory)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS query_runs (
+                location TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                run_at TEXT NOT NULL,
+                result_count INTEGER NOT NULL,
+                new_places INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_query_runs_query ON query_runs (location, keyword);
+            CREATE TABLE IF NOT EXISTS query_places (
+                location TEXT NOT NULL,
+                keyword TEXT NOT NULL,
+                place_id TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                PRIMARY KEY (location, keyword, place_id)
+            );
+        """)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def place_sets(self) -> Dict[Query, Set[str]]:
+        """쿼리별로 지금까지 관측된 장소 집합"""
+        sets: Dict[Query, Set[str]] = defaultdict(set)
+        for location, keyword, place_id in self.conn.execute(
+            "SELECT location, keyword, place_id FROM query_places"
+        ):
+            sets[(location, keyword)].add(place_id)
+        return sets
+
+    def novelty(self) -> Dict[Query, float]:
+        """쿼리별 실행당 평균 신규 장소 수 (최근 5회)"""
+        result = {}
+        rows = self.conn.execute("""
+            SELECT location, keyword, AVG(new_places) FROM (
+                SELECT location, keyword, new_places,
+                       ROW_NUMBER() OVER (PARTITION BY location, keyword ORDER BY run_at DESC) AS rn
+                FROM query_runs
+            ) WHERE rn <= 5 GROUP BY location, keyword
+        """)
+        for location, keyword, average in rows:
+            result[(location, keyword)] = average or 0.0
+        return result
+
+    def last_runs(self) -> Dict[Query, str]:
+        """쿼리별 마지막 실행 시각"""
+        rows = self.conn.execute("SELECT location, keyword, MAX(run_at) FROM query_runs GROUP BY location, keyword")
+        return {(location, keyword): run_at for location, keyword, run_at in rows}
+
+    def prune(self, days: Optional[int] = None):
+        """보관 기간 동안 다시 관측되지 않은 장소와 오래된 실행 기록 삭제"""
+        days = days if days is not None else PLANNER_CONFIG["history_days"]
+        cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M:%S")
+        with self.conn:
+            self.conn.execute("DELETE FROM query_places WHERE last_seen < ?", (cutoff,))
+            self.conn.execute("DELETE FROM query_runs WHERE run_at < ?", (cutoff,))
+
+    def record(self, queries: List[Query], data: List[Dict[str, Any]]):
+        """실행한 쿼리 결과 저장 (결과 0건 쿼리도 기록)"""
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        known_ids = set()
+        for place_ids in self.place_sets().values():
+            known_ids |= place_ids
+
+        by_query: Dict[Query, Set[str]] = defaultdict(set)
+        for row in data:
+            by_query[(row.get('지역'), row.get('키워드'))].add(make_place_id(row))
+
+        with self.conn:
+            for query in queries:
+                place_ids = by_query.get(query, set())
+                self.conn.execute(
+                    "INSERT INTO query_runs VALUES (?, ?, ?, ?, ?)",
+                    (query[0], query[1], now, len(place_ids), len(place_ids - known_ids))
+                )
+                known_ids |= place_ids
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO query_places VALUES (?, ?, ?, ?)",
+                    [(query[0], query[1], place_id, now) for place_id in place_ids]
+                )
+        self.prune()
+
+    def close(self):
+        self.conn.close()
+
+
+class QueryPlan:
+    """실행할 쿼리와 예상 커버리지"""
+
+    def __init__(self):
+        self.queries: List[Query] = []
+        self.expected_new: Dict[Query, float] = {}
+        self.skipped: Dict[Query, str] = {}
+        self.explored: List[Query] = []
+        self.redundant_pairs: List[Tuple[Query, Query, float]] = []
+        self.universe: Set[str] = set()
+        self.expected_covered = 0
+
+    @property
+    def known_places(self) -> int:
+        return len(self.universe)
+
+    def expected_coverage(self) -> float:
+        """후보 쿼리 이력상 알려진 장소 중 계획으로 다시 덮을 것으로 예상되는 비율"""
+        return self.expected_covered / self.known_places if self.known_places else 1.0
+
+    def actual_coverage(self, found: Set[str]) -> float:
+        """실제 결과가 같은 장소 집합(universe)을 덮은 비율 (expected_coverage와 같은 분모)"""
+        return len(found & self.universe) / self.known_places if self.known_places else 1.0
+
+
+class QueryPlanner:
+    """이력 기반 탐욕적 최대 커버리지 쿼리 계획기"""
+
+    def __init__(self, history: QueryHistory, candidates: Optional[List[Query]] = None):
+        self.history = history
+        self.candidates = candidates if candidates is not None else all_queries()
+
+    def plan(self, budget: Optional[int] = None) -> QueryPlan:
+        """예산 안에서 한계 수확이 큰 순서로 쿼리 선택"""
+        budget = budget if budget is not None else PLANNER_CONFIG["budget"]
+        place_sets = self.history.place_sets()
+        novelty = self.history.novelty()
+        plan = QueryPlan()
+
+        for query in self.candidates:
+            plan.universe |= place_sets.get(query, set())
+        plan.redundant_pairs = self.redundant_pairs(place_sets)
+
+        covered: Set[str] = set()
+        remaining = list(self.candidates)
+        while remaining and (budget is None or len(plan.queries) < budget):
+            best, best_gain = None, -1.0
+            for query in remaining:
+                gain = self.marginal_yield(query, place_sets, novelty, covered)
+                if gain > best_gain:
+                    best, best_gain = query, gain
+
+            if best_gain < PLANNER_CONFIG["min_marginal_yield"]:
+                break
+
+            remaining.remove(best)
+            plan.queries.append(best)
+            plan.expected_new[best] = best_gain
+            covered |= place_sets.get(best, set())
+
+        for query in remaining:
+            if budget is not None and len(plan.queries) >= budget:
+                plan.skipped[query] = "예산 초과"
+            else:
+                plan.skipped[query] = "한계 수확 낮음"
+
+        # 제외 판단이 오래된 이력에 묶이지 않도록 일부는 마지막 실행이 오래된 순으로 다시 실행
+        for query in self.exploration(plan.skipped):
+            del plan.skipped[query]
+            plan.explored.append(query)
+            plan.queries.append(query)
+            plan.expected_new[query] = self.marginal_yield(query, place_sets, novelty, covered)
+            covered |= place_sets.get(query, set())
+
+        plan.expected_covered = len(covered & plan.universe)
+        return plan
+
+    def exploration(self, skipped: Dict[Query, str]) -> List[Query]:
+        """다시 실행할 제외 쿼리 (explore_share 비율, 마지막 실행이 오래된 순)"""
+        count = math.ceil(len(skipped) * PLANNER_CONFIG["explore_share"])
+        if not count:
+            return []
+        last_runs = self.history.last_runs()
+        return sorted(skipped, key=lambda query: last_runs.get(query, ""))[:count]
+
+    @staticmethod
+    def marginal_yield(query: Query, place_sets: Dict[Query, Set[str]],
+                       novelty: Dict[Query, float], covered: Set[str]) -> float:
+        """이미 선택된 쿼리들이 덮지 못하는 장소 수 + 과거 실행당 신규 장소 수
+
+        실행 기록(novelty의 키는 query_runs 기준)이 없는 쿼리만 이력 없음으로 보며,
+        실행했지만 결과가 0건이었던 쿼리는 장소 집합이 비어 있어 수확 0(+신규 평균)이 됨
+        """
+        if query not in novelty:
+            return float(PLANNER_CONFIG["unknown_query_yield"])
+        return len(place_sets.get(query, set()) - covered) + novelty[query]
+
+    def redundant_pairs(self, place_sets: Dict[Query, Set[str]]) -> List[Tuple[Query, Query, float]]:
+        """결과가 크게 겹치는 쿼리 쌍 (작은 집합 기준 겹침 비율)"""
+        pairs = []
+        known = [query for query in self.candidates if place_sets.get(query)]
+        for i, first in enumerate(known):
+            for second in known[i + 1:]:
+                a, b = place_sets[first], place_sets[second]
+                overlap = len(a & b) / min(len(a), len(b))
+                if overlap >= PLANNER_CONFIG["overlap_threshold"]:
+                    pairs.append((first, second, overlap))
+        return pairs
+
+
+def plan_queries(logger) -> Tuple[List[Query], Optional[QueryPlan]]:
+    """PLANNER_CONFIG에 따라 실행할 쿼리 목록 결정"""
+    if not PLANNER_CONFIG["enabled"]:
+        return all_queries(), None
+
+    with QueryHistory() as history:
+        plan = QueryPlanner(history).plan()
+
+    logger.info(
+        f"쿼리 계획: {len(plan.queries)}/{len(plan.queries) + len(plan.skipped)}개 실행 "
+        f"(재확인 {len(plan.explored)}개), 예상 커버리지 {plan.expected_coverage():.1%} ({plan.expected_covered}/{plan.known_places})"
+    )
+    for first, second, overlap in plan.redundant_pairs:
+        logger.info(f"중복 쿼리: {' '.join(first)} ↔ {' '.join(second)} ({overlap:.0%})")
+    return plan.queries, plan
+
+
+def record_query_results(queries: List[Query], data: List[Dict[str, Any]],
+                         plan: Optional[QueryPlan], logger) -> Dict[str, Any]:
+    """쿼리 결과를 이력에 저장하고 예상 대비 실제 커버리지 보고"""
+    with QueryHistory() as history:
+        known = set()
+        for place_ids in history.place_sets().values():
+            known |= place_ids
+        history.record(queries, data)
+
+    found = {make_place_id(row) for row in data}
+    report = {
+        "queries": len(queries),
+        "places": len(found),
+        "new_places": len(found - known),
+        "actual_coverage": len(found & known) / len(known) if known else 1.0
+    }
+    if plan:
+        # 예상 커버리지와 같은 분모(계획 시점 후보 쿼리의 장소 집합)로 비교
+        report["actual_coverage"] = plan.actual_coverage(found)
+        report["expected_coverage"] = plan.expected_coverage()
+        report["expected_new"] = sum(plan.expected_new.values())
+        logger.info(
+            f"커버리지: 예상 {report['expected_coverage']:.1%} / 실제 {report['actual_coverage']:.1%}, "
+            f"신규 장소 예상 {report['expected_new']:.0f} / 실제 {report['new_places']}"
+        )
+    return report
+
+
+def main():
+    """현재 이력 기준 쿼리 계획 출력"""
+    with QueryHistory() as history:
+        plan = QueryPlanner(history).plan()
+
+    print(f"예상 커버리지: {plan.expected_coverage():.1%} ({plan.expected_covered}/{plan.known_places})")
+    for query in plan.queries:
+        label = "재확인" if query in plan.explored else "실행"
+        print(f"  {label}: {' '.join(query)} (예상 신규 {plan.expected_new[query]:.1f})")
+    for query, reason in plan.skipped.items():
+        print(f"  제외: {' '.join(query)} ({reason})")
+    for first, second, overlap in plan.redundant_pairs:
+        print(f"  중복: {' '.join(first)} ↔ {' '.join(second)} ({overlap:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+네이버 지도 크롤러 요청 속도 제한기
+토큰 버킷 방식으로 분당 요청 수를 제한
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+class AsyncTokenBucket:
+    """비동기 토큰 버킷 (여러 워커가 하나의 요청 예산을 공유)"""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0  # 초당 충전량
+        self.capacity = capacity if capacity is not None else max(1.0, self.rate * 5)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """토큰이 있으면 즉시 소비하고 True 반환"""
+        self._refill()
+        if self.tokens >= tokens:
+            self.tokens -= tokens
+            return True
+        return False
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """토큰을 얻을 때까지 남은 시간 (초)"""
+        self._refill()
+        if self.tokens >= tokens or self.rate <= 0:
+            return 0.0
+        return (tokens - self.tokens) / self.rate
+
+    async def acquire(self, tokens: float = 1.0):
+        """토큰을 얻을 때까지 대기"""
+        async with self._lock:
+            while not self.try_acquire(tokens):
+                await asyncio.sleep(self.wait_time(tokens))
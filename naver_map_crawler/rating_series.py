@@ -0,0 +1,432 @@
+"""
+장소별 평점/리뷰 수 시계열 저장소
+실행마다 값이 바뀐 장소만 변경 시점을 기록하므로 저장 용량은 (실행 수 x 장소 수)가 아니라 변경 횟수에 비례한다.
+- 장소별 변경 시점을 chunk_points개씩 묶어 시각/평점/리뷰 수 컬럼을 각각 델타 + RLE로 인코딩해 저장
+  (시각은 간격, 평점·리뷰 수는 변화량의 연속 구간으로 압축되며 디코딩은 np.repeat + np.cumsum)
+- 장소 또는 지역 단위 기간 조회: 기간 시작 시점의 값(직전 변경)도 함께 반환
+- 값이 비어 있는 관측(추출 실패, 과거 엑셀에 리뷰수 없음)은 변경으로 보지 않고 이전 값을 유지
+
+사용 예:
+    python rating_series.py import data/naver_map_data_*.xlsx
+    python rating_series.py area 처인구 --since 2025-04-01 --output trend.csv
+    python rating_series.py trend --area 기흥구 --freq W
+"""
+import argparse
+import os
+import re
+import sqlite3
+import struct
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+import numpy as np
+import pandas as pd
+
+from config import RATING_SERIES_CONFIG
+from utils import create_output_directory, read_result_excel
+from change_detection import make_place_id
+
+MISSING = -1  # 평점/리뷰 수 없음
+RATING_SCALE = 100  # 평점은 소수 둘째 자리까지 정수로 저장 (4.52 -> 452)
+
+_VALUE_TYPES = [np.int8, np.int16, np.int32, np.int64]
+_LENGTH_TYPES = [np.uint8, np.uint16, np.uint32]
+_HEADER = struct.Struct("<BBI")  # 값 타입, 런 길이 타입, 런 수
+
+
+def _smallest_type(values: np.ndarray, types: List[type]) -> int:
+    """값 범위를 담을 수 있는 가장 작은 정수 타입 번호"""
+    for code, dtype in enumerate(types):
+        info = np.iinfo(dtype)
+        if values.size == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return code
+    raise ValueError("인코딩할 수 없는 값 범위")
+
+
+def encode_column(values: Iterable[int]) -> bytes:
+    """정수 배열 -> 델타 + RLE 바이트 (첫 델타는 첫 값 자체)"""
+    values = np.asarray(values, dtype=np.int64)
+    deltas = np.diff(values, prepend=0)
+    starts = np.flatnonzero(np.r_[True, deltas[1:] != deltas[:-1]]) if deltas.size else np.empty(0, np.int64)
+    run_values = deltas[starts]
+    run_lengths = np.diff(np.r_[starts, deltas.size])
+
+    value_code = _smallest_type(run_values, _VALUE_TYPES)
+    length_code = _smallest_type(run_lengths, _LENGTH_TYPES)
+    return (
+        _HEADER.pack(value_code, length_code, len(starts))
+        + run_values.astype(_VALUE_TYPES[value_code]).tobytes()
+        + run_lengths.astype(_LENGTH_TYPES[length_code]).tobytes()
+    )
+
+
+def decode_column(blob: bytes) -> np.ndarray:
+    """encode_column의 역변환"""
+    value_code, length_code, runs = _HEADER.unpack_from(blob)
+    value_type, length_type = _VALUE_TYPES[value_code], _LENGTH_TYPES[length_code]
+    offset = _HEADER.size
+    run_values = np.frombuffer(blob, value_type, runs, offset)
+    run_lengths = np.frombuffer(blob, length_type, runs, offset + runs * np.dtype(value_type).itemsize)
+    return np.cumsum(np.repeat(run_values.astype(np.int64), run_lengths))
+
+
+def is_blank(value: Any) -> bool:
+    """None 또는 NaN/NaT (엑셀 빈 셀)"""
+    return value is None or (np.ndim(value) == 0 and pd.isna(value))
+
+
+def to_epoch(value) -> int:
+    """시각 -> 초 단위 정수 (크롤링_시간과 같은 로컬 시각 기준)"""
+    timestamp = pd.Timestamp(value)
+    if pd.isna(timestamp):
+        raise ValueError(f"시각으로 변환할 수 없는 값: {value!r}")
+    return int(timestamp.value // 10**9)
+
+
+def from_epoch(values) -> pd.DatetimeIndex:
+    return pd.to_datetime(np.asarray(values, dtype=np.int64), unit="s").astype("datetime64[ns]")
+
+
+def parse_rating(value: Any) -> int:
+    """평점 문자열("별점 4.52", 4.5) -> 정수 (없으면 MISSING)"""
+    if is_blank(value):
+        return MISSING
+    match = re.search(r"\d+(?:\.\d+)?", str(value))
+    return int(round(float(match.group()) * RATING_SCALE)) if match else MISSING
+
+
+def parse_reviews(value: Any) -> int:
+    """리뷰수 컬럼 값 -> 정수 (없으면 MISSING)"""
+    if is_blank(value):
+        return MISSING
+    match = re.search(r"\d[\d,]*", str(value))
+    return int(match.group().replace(",", "")) if match else MISSING
+
+
+def observations(data: List[Dict[str, Any]], observed_at: Optional[datetime] = None) -> Dict[str, Tuple]:
+    """크롤링 결과 행 -> 장소별 (지역, 가게명, 주소, 시각, 평점, 리뷰 수)
+
+    같은 장소가 여러 키워드로 나오면 값이 있는 쪽을 우선해 하나로 합친다
+    """
+    default_ts = to_epoch(observed_at or datetime.now())
+    merged: Dict[str, Tuple] = {}
+    for row in data:
+        # 엑셀에서 읽은 빈 셀(NaN)이 'nan' 문자열이나 잘못된 시각이 되지 않도록 None으로 통일
+        row = {key: None if is_blank(value) else value for key, value in row.items()}
+        # 장소_ID(엔티티 통합 결과)는 파일마다 있거나 없으므로 항상 같은 키(make_place_id)로 기록
+        place_id = make_place_id(row)
+        crawled = row.get("크롤링_시간")
+        try:
+            ts = to_epoch(crawled) if crawled and not observed_at else default_ts
+        except (ValueError, TypeError):
+            ts = default_ts
+        rating, reviews = parse_rating(row.get("평점")), parse_reviews(row.get("리뷰수"))
+
+        previous = merged.get(place_id)
+        if previous is not None:
+            rating = rating if rating != MISSING else previous[4]
+            reviews = reviews if reviews != MISSING else previous[5]
+            ts = max(ts, previous[3])
+        merged[place_id] = (row.get("지역") or "", row.get("가게명") or "", row.get("주소") or "",
+                            ts, rating, reviews)
+    return merged
+
+
+class RatingSeriesStore:
+    """평점/리뷰 수 변경 시계열 (SQLite, 청크별 델타+RLE 컬럼)"""
+
+    def __init__(self, db_path: Optional[str] = None, config: Optional[Dict[str, Any]] = None):
+        self.config = dict(RATING_SERIES_CONFIG, **(config or {}))
+        self.db_path = db_path or self.config["db_path"]
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            create_output_directory(directory)
+
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS series_places (
+                place_id TEXT PRIMARY KEY,
+                area TEXT, name TEXT, address TEXT,
+                first_ts INTEGER NOT NULL,
+                last_ts INTEGER NOT NULL,     -- 마지막 변경 시각
+                last_seen INTEGER NOT NULL,   -- 마지막 관측 시각
+                rating INTEGER NOT NULL,
+                reviews INTEGER NOT NULL,
+                changes INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_series_places_area ON series_places (area);
+            CREATE TABLE IF NOT EXISTS series_chunks (
+                place_id TEXT NOT NULL,
+                start_ts INTEGER NOT NULL,
+                end_ts INTEGER NOT NULL,
+                points INTEGER NOT NULL,
+                ts BLOB NOT NULL,
+                rating BLOB NOT NULL,
+                reviews BLOB NOT NULL,
+                PRIMARY KEY (place_id, start_ts)
+            ) WITHOUT ROWID;
+        """)
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ---- 기록 ------------------------------------------------------------
+
+    def _latest(self, place_ids: List[str]) -> Dict[str, Tuple[int, int, int, int]]:
+        """장소별 (마지막 변경 시각, 마지막 관측 시각, 평점, 리뷰 수)"""
+        latest = {}
+        for start in range(0, len(place_ids), 500):
+            batch = place_ids[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT place_id, last_ts, last_seen, rating, reviews FROM series_places "
+                f"WHERE place_id IN ({','.join('?' * len(batch))})", batch
+            )
+            latest.update((row[0], row[1:]) for row in rows)
+        return latest
+
+    def _append_point(self, place_id: str, ts: int, rating: int, reviews: int):
+        """장소의 마지막 청크에 변경 시점 추가 (가득 찼으면 새 청크)"""
+        chunk = self.conn.execute(
+            "SELECT start_ts, points, ts, rating, reviews FROM series_chunks "
+            "WHERE place_id = ? ORDER BY start_ts DESC LIMIT 1", (place_id,)
+        ).fetchone()
+        if chunk is None or chunk[1] >= self.config["chunk_points"]:
+            self.conn.execute(
+                "INSERT INTO series_chunks VALUES (?, ?, ?, 1, ?, ?, ?)",
+                (place_id, ts, ts, encode_column([ts]), encode_column([rating]), encode_column([reviews]))
+            )
+            return
+
+        start_ts, points = chunk[0], chunk[1]
+        columns = [np.append(decode_column(blob), value) for blob, value in zip(chunk[2:], (ts, rating, reviews))]
+        self.conn.execute(
+            "UPDATE series_chunks SET end_ts = ?, points = ?, ts = ?, rating = ?, reviews = ? "
+            "WHERE place_id = ? AND start_ts = ?",
+            (ts, points + 1, *(encode_column(column) for column in columns), place_id, start_ts)
+        )
+
+    def record(self, data: List[Dict[str, Any]], observed_at: Optional[datetime] = None) -> Dict[str, int]:
+        """실행 결과 반영. 값이 바뀐 장소만 변경 시점을 추가한다"""
+        merged = observations(data, observed_at)
+        latest = self._latest(list(merged))
+        stats = {"observed": len(merged), "new": 0, "changed": 0, "stale": 0}
+
+        with self.conn:
+            for place_id, (area, name, address, ts, rating, reviews) in merged.items():
+                previous = latest.get(place_id)
+                if previous is None:
+                    self._append_point(place_id, ts, rating, reviews)
+                    self.conn.execute(
+                        "INSERT INTO series_places VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 1)",
+                        (place_id, area, name, address, ts, ts, ts, rating, reviews)
+                    )
+                    stats["new"] += 1
+                    continue
+
+                last_ts, last_seen, last_rating, last_reviews = previous
+                if ts <= last_seen:
+                    # 이미 더 나중 관측이 반영됨 (오래된 파일을 늦게 가져온 경우)
+                    stats["stale"] += 1
+                    continue
+
+                rating = last_rating if rating == MISSING else rating
+                reviews = last_reviews if reviews == MISSING else reviews
+                if (rating, reviews) == (last_rating, last_reviews):
+                    self.conn.execute("UPDATE series_places SET last_seen = ? WHERE place_id = ?", (ts, place_id))
+                    continue
+
+                self._append_point(place_id, ts, rating, reviews)
+                self.conn.execute(
+                    "UPDATE series_places SET last_ts = ?, last_seen = ?, rating = ?, reviews = ?, "
+                    "changes = changes + 1, area = ?, name = ?, address = ? WHERE place_id = ?",
+                    (ts, ts, rating, reviews, area, name, address, place_id)
+                )
+                stats["changed"] += 1
+        return stats
+
+    # ---- 조회 ------------------------------------------------------------
+
+    def _read(self, where: str, params: List[Any], since: Optional[int], until: Optional[int]) -> pd.DataFrame:
+        """조건에 맞는 장소의 청크 중 기간과 겹치는 것만 읽어 디코딩"""
+        since = since if since is not None else np.iinfo(np.int64).min
+        until = until if until is not None else np.iinfo(np.int64).max
+        # 다음 청크가 since 이전에 시작하면 그 청크의 값은 모두 since 이전에 대체됨
+        chunks = self.conn.execute(f"""
+            SELECT c.place_id, c.ts, c.rating, c.reviews FROM (
+                SELECT place_id, start_ts, ts, rating, reviews,
+                       LEAD(start_ts) OVER (PARTITION BY place_id ORDER BY start_ts) AS next_start
+                FROM series_chunks
+                WHERE place_id IN (SELECT place_id FROM series_places WHERE {where})
+            ) c
+            WHERE c.start_ts <= ? AND (c.next_start IS NULL OR c.next_start > ?)
+            ORDER BY c.place_id, c.start_ts
+        """, [*params, until, since]).fetchall()
+        if not chunks:
+            return pd.DataFrame({"place_id": pd.Series(dtype=object), "time": pd.Series(dtype="datetime64[ns]"),
+                                 "rating": pd.Series(dtype=float), "reviews": pd.Series(dtype="Int64")})
+
+        place_ids = np.asarray([chunk[0] for chunk in chunks], dtype=object)
+        columns = [[decode_column(chunk[i]) for chunk in chunks] for i in (1, 2, 3)]
+        sizes = np.fromiter((len(part) for part in columns[0]), dtype=np.int64, count=len(chunks))
+        ts, rating, reviews = (np.concatenate(parts) for parts in columns)
+        # 청크는 장소 순으로 정렬되어 있으므로 장소가 바뀌는 위치마다 번호 증가
+        chunk_place = np.cumsum(np.r_[True, place_ids[1:] != place_ids[:-1]])
+        place_codes = np.repeat(chunk_place, sizes)
+
+        # 기간 안의 변경 + 기간 시작 시점의 값(장소별 since 이전 마지막 변경, since에 바로 변경이 있으면 제외)
+        next_ts = np.r_[ts[1:], np.iinfo(np.int64).max]
+        next_place = np.r_[place_codes[1:], -1]
+        as_of = (ts < since) & ((next_ts > since) | (next_place != place_codes))
+        keep = (as_of | (ts >= since)) & (ts <= until)
+
+        return pd.DataFrame({
+            "place_id": np.repeat(place_ids, sizes)[keep],
+            "time": from_epoch(ts[keep]),
+            "rating": np.where(rating[keep] == MISSING, np.nan, rating[keep] / RATING_SCALE),
+            "reviews": pd.array(np.where(reviews[keep] == MISSING, None, reviews[keep]), dtype="Int64"),
+        })
+
+    def place_history(self, place: str, since=None, until=None) -> pd.DataFrame:
+        """장소 하나의 변경 이력 (place_id 또는 가게명 일부). 첫 행은 since 시점의 값"""
+        return self._read("place_id = ? OR name LIKE ?", [place, f"%{place}%"],
+                          _epoch_or_none(since), _epoch_or_none(until))
+
+    def area_history(self, area: Optional[str] = None, since=None, until=None) -> pd.DataFrame:
+        """지역(일부만 입력 가능) 장소들의 변경 이력 + 장소 정보"""
+        where, params = ("area LIKE ?", [f"%{area}%"]) if area else ("1 = 1", [])
+        history = self._read(where, params, _epoch_or_none(since), _epoch_or_none(until))
+        places = self.places(area)[["place_id", "area", "name"]]
+        return history.merge(places, on="place_id", how="left")
+
+    def values_at(self, as_of, area: Optional[str] = None) -> pd.DataFrame:
+        """주어진 시각 기준 장소별 평점/리뷰 수"""
+        history = self.area_history(area, since=as_of, until=as_of)
+        return history.drop_duplicates("place_id", keep="last").reset_index(drop=True)
+
+    def trend(self, area: Optional[str] = None, since=None, until=None, freq: str = "W") -> pd.DataFrame:
+        """기간별(기간 끝 시점) 평균 평점, 리뷰 수 합계, 기간 중 변경된 장소 수"""
+        history = self.area_history(area, since, until)
+        if history.empty:
+            return pd.DataFrame(columns=["mean_rating", "total_reviews", "changed_places"])
+
+        start = pd.Timestamp(since) if since else history["time"].min()
+        end = pd.Timestamp(until) if until else history["time"].max()
+        periods = pd.date_range(start, end, freq=freq)
+        if len(periods) == 0 or periods[-1] < end:
+            periods = periods.append(pd.DatetimeIndex([end]))
+
+        grid = pd.MultiIndex.from_product([periods.astype("datetime64[ns]"), history["place_id"].unique()],
+                                          names=["time", "place_id"]).to_frame(index=False)
+        values = pd.merge_asof(grid.sort_values("time"), history.sort_values("time"),
+                               on="time", by="place_id", direction="backward")
+        summary = values.groupby("time").agg(mean_rating=("rating", "mean"), total_reviews=("reviews", "sum"))
+
+        changes = history[history["time"] >= start]
+        changed = changes.groupby(pd.cut(changes["time"], [pd.Timestamp.min, *periods]), observed=False)[
+            "place_id"].nunique()
+        summary["changed_places"] = changed.to_numpy()
+        return summary
+
+    def places(self, area: Optional[str] = None) -> pd.DataFrame:
+        """장소별 현재 값과 변경 횟수"""
+        where, params = ("WHERE area LIKE ?", [f"%{area}%"]) if area else ("", [])
+        df = pd.read_sql_query(
+            f"SELECT place_id, area, name, address, first_ts, last_ts, last_seen, rating, reviews, changes "
+            f"FROM series_places {where} ORDER BY place_id", self.conn, params=params
+        )
+        for column in ("first_ts", "last_ts", "last_seen"):
+            df[column] = from_epoch(df[column])
+        df["rating"] = df["rating"].where(df["rating"] != MISSING) / RATING_SCALE
+        df["reviews"] = df["reviews"].where(df["reviews"] != MISSING).astype("Int64")
+        return df
+
+    def stats(self) -> Dict[str, Any]:
+        """장소 수, 변경 시점 수, 청크 바이트 수"""
+        places, changes = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(changes), 0) FROM series_places").fetchone()
+        chunks, encoded = self.conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(ts) + LENGTH(rating) + LENGTH(reviews)), 0) FROM series_chunks"
+        ).fetchone()
+        return {
+            "places": places,
+            "points": changes,
+            "chunks": chunks,
+            "encoded_bytes": encoded,
+            "bytes_per_point": round(encoded / changes, 2) if changes else 0.0
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def _epoch_or_none(value) -> Optional[int]:
+    return None if value is None else to_epoch(value)
+
+
+def record_run(data: List[Dict[str, Any]], logger) -> Optional[Dict[str, int]]:
+    """크롤링 결과를 평점/리뷰 수 시계열에 반영 (save_crawl_output에서 호출)"""
+    if not data:
+        return None
+    with RatingSeriesStore() as store:
+        stats = store.record(data)
+    logger.info(f"평점/리뷰 수 시계열: 관측 {stats['observed']}, 신규 {stats['new']}, 변경 {stats['changed']}")
+    return stats
+
+
+def import_excel(store: RatingSeriesStore, path: str) -> Dict[str, int]:
+    """기존 엑셀 결과 파일 가져오기 (행의 크롤링_시간 기준, 없으면 파일 수정 시각)"""
+    df = read_result_excel(path)
+    observed_at = None if "크롤링_시간" in df else datetime.fromtimestamp(os.path.getmtime(path))
+    return store.record(df.to_dict("records"), observed_at=observed_at)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="장소별 평점/리뷰 수 시계열")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    import_cmd = sub.add_parser("import", help="기존 엑셀 결과 파일 가져오기 (오래된 파일부터)")
+    import_cmd.add_argument("files", nargs="+")
+
+    place_cmd = sub.add_parser("place", help="장소 하나의 변경 이력")
+    place_cmd.add_argument("place", help="place_id 또는 가게명 일부")
+
+    area_cmd = sub.add_parser("area", help="지역 장소들의 변경 이력")
+    area_cmd.add_argument("area", help="지역 (일부만 입력 가능, 예: 처인구)")
+    area_cmd.add_argument("--output", help="CSV로 저장")
+
+    trend_cmd = sub.add_parser("trend", help="기간별 평균 평점/리뷰 수 합계")
+    trend_cmd.add_argument("--area")
+    trend_cmd.add_argument("--freq", default="W", help="집계 주기 (D, W, MS)")
+
+    for cmd in (place_cmd, area_cmd, trend_cmd):
+        cmd.add_argument("--since", help="시작 시각 (예: 2025-04-01)")
+        cmd.add_argument("--until", help="종료 시각")
+    sub.add_parser("stats", help="저장 통계")
+    args = parser.parse_args()
+
+    with RatingSeriesStore() as store:
+        if args.command == "import":
+            for path in sorted(args.files):
+                print(f"{path}: {import_excel(store, path)}")
+        elif args.command == "place":
+            print(store.place_history(args.place, args.since, args.until).to_string(index=False))
+        elif args.command == "area":
+            df = store.area_history(args.area, args.since, args.until)
+            if args.output:
+                df.to_csv(args.output, index=False, encoding="utf-8-sig")
+                print(f"✅ {len(df)}행 저장: {args.output}")
+            else:
+                print(df.to_string(index=False))
+        elif args.command == "trend":
+            trend = store.trend(args.area, args.since, args.until, args.freq)
+            print(trend.round(3).to_string() if not trend.empty else "데이터 없음")
+        else:
+            print(store.stats())
+
+
+if __name__ == "__main__":
+    main()
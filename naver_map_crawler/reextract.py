@@ -0,0 +1,96 @@
+"""
+아카이브된 페이지 재추출
+네이버 셀렉터가 바뀌었을 때 config.py의 EXTRACT_SELECTORS만 고친 뒤
+재크롤링 없이 보관된 원본 HTML에서 데이터를 다시 추출한다
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional
+
+from selectolax.lexbor import LexborHTMLParser
+
+from config import ARCHIVE_CONFIG, EXTRACT_SELECTORS, OUTPUT_DIR
+from utils import format_crawling_result, create_output_directory, generate_filename, save_to_excel, PLACE_FIELDS
+from page_archive import PageArchive, read_object
+
+REEXTRACT_FILENAME_FORMAT = "naver_map_reextract_{date}.xlsx"
+
+
+def node_text(parent, selector: str) -> str:
+    node = parent.css_first(selector)
+    return node.text(strip=True) if node else ""
+
+
+def extract_from_html(html: str, location: str, keyword: str,
+                      selectors: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """HTML 문자열에서 장소 데이터 추출 (크롤러와 같은 EXTRACT_SELECTORS 사용)"""
+    selectors = selectors or EXTRACT_SELECTORS
+    places = []
+
+    for element in LexborHTMLParser(html).css(selectors["item"])[:20]:  # 최대 20개 결과만
+        place_data = {field: node_text(element, selectors[field]) for field in PLACE_FIELDS}
+        if place_data["name"]:
+            places.append(format_crawling_result(location, keyword, place_data))
+    return places
+
+
+def _extract_entry(args) -> List[Dict[str, Any]]:
+    """프로세스 풀 작업: 아카이브 항목 하나 재추출"""
+    root, entry, selectors = args
+    try:
+        html = read_object(root, entry["digest"])
+    except OSError:
+        return []
+
+    rows = extract_from_html(html, entry["location"], entry["keyword"], selectors)
+    for row in rows:
+        # 재추출 시각이 아니라 원본을 가져온 시각을 기록
+        row["크롤링_시간"] = entry["fetched_at"]
+    return rows
+
+
+def reextract(root: Optional[str] = None, location: Optional[str] = None, keyword: Optional[str] = None,
+              since: Optional[str] = None, until: Optional[str] = None,
+              workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """조건에 맞는 아카이브 페이지를 여러 프로세스에서 병렬로 재추출"""
+    root = root or ARCHIVE_CONFIG["dir"]
+    with PageArchive(root) as archive:
+        entries = archive.query(location, keyword, since, until)
+
+    if not entries:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(entries) // (workers * 4))
+    tasks = [(root, entry, EXTRACT_SELECTORS) for entry in entries]
+
+    data = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for rows in executor.map(_extract_entry, tasks, chunksize=chunksize):
+            data.extend(rows)
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="아카이브된 페이지에서 장소 데이터 재추출")
+    parser.add_argument("--location", help="지역 필터")
+    parser.add_argument("--keyword", help="키워드 필터")
+    parser.add_argument("--since", help="이 시각 이후 (예: 2025-09-01)")
+    parser.add_argument("--until", help="이 시각 이전 (예: 2025-10-01)")
+    parser.add_argument("--workers", type=int, help="프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--archive", help="아카이브 디렉토리")
+    args = parser.parse_args()
+
+    data = reextract(args.archive, args.location, args.keyword, args.since, args.until, args.workers)
+    if not data:
+        print("❌ 재추출된 데이터가 없습니다.")
+        return
+
+    create_output_directory(OUTPUT_DIR)
+    filepath = save_to_excel(data, generate_filename(REEXTRACT_FILENAME_FORMAT), OUTPUT_DIR)
+    print(f"✅ 재추출 완료! {len(data)}개 데이터: {filepath}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,482 @@
+"""
+네이버 지도 크롤링 스케줄러
+대화형(interactive)·일괄(batch) 두 레인을 우선순위로 스케줄링하고
+하나의 요청 예산과 워커 풀을 두 레인이 공유 (워커 수는 AdaptiveConcurrency가 조절)
+
+웹 앱(server.js)의 즉시 조회와 야간 일괄 크롤링이 같은 브라우저 풀을 쓰도록 HTTP 서비스로 실행:
+    python scheduler.py                      # 드라이버 풀 (SCHEDULER_CONFIG["engine"])
+    python scheduler.py --engine playwright --no-nightly
+"""
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Callable, Awaitable, Tuple
+
+from config import LOGGING_CONFIG, RATE_LIMIT, SCHEDULER_CONFIG
+from utils import setup_logging
+from rate_limiter import AsyncTokenBucket
+from concurrency import AdaptiveConcurrency
+from query_planner import all_queries
+from change_detection import save_crawl_output
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)
+
+
+@dataclass
+class CrawlJob:
+    """스케줄링 대상 크롤링 작업"""
+    location: str
+    keyword: str
+    lane: str = BATCH
+    priority: int = 0                      # 클수록 먼저 실행
+    deadline: Optional[float] = None       # time.time() 기준 마감 시각
+    recurrence: Optional[float] = None     # 반복 주기 (초), None이면 1회성
+    last_crawled: Optional[float] = None   # 마지막 크롤링 시각
+    last_yield: int = 0                    # 마지막 크롤링 결과 개수
+    not_before: float = 0.0                # 이 시각 이전에는 실행하지 않음
+    enqueued_at: float = field(default_factory=time.time)
+    future: Optional[asyncio.Future] = field(default=None, repr=False, compare=False)  # 결과를 기다리는 호출자가 있을 때만
+
+    def score(self, now: float) -> float:
+        """우선순위 점수: 오래됐거나 수확이 많았던 쿼리일수록 높음"""
+        if self.last_crawled is None:
+            staleness = SCHEDULER_CONFIG["staleness_cap_hours"]
+        else:
+            staleness = min((now - self.last_crawled) / 3600, SCHEDULER_CONFIG["staleness_cap_hours"])
+        return self.priority * 100 + staleness + math.log1p(self.last_yield) * 5
+
+    def sort_key(self, now: float):
+        lane_rank = LANES.index(self.lane)
+        deadline = self.deadline if self.deadline is not None else math.inf
+        return (lane_rank, -self.score(now), deadline, self.enqueued_at)
+
+
+class CrawlScheduler:
+    """우선순위 기반 크롤링 스케줄러
+
+    레인 우선순위는 디스패치 시점에만 적용: 슬롯이 비면 대화형 작업을 먼저 꺼내지만,
+    이미 실행 중인 일괄 작업은 선점(취소)하지 않음. 검색 도중 취소하면 쓴 요청 예산과
+    페이지 로드가 버려지고 같은 쿼리를 처음부터 다시 해야 하므로, 대화형 요청의 추가 대기는
+    실행 중인 검색 1건(최대 WATCHDOG_CONFIG["job_deadline"])으로 둔다.
+    """
+
+    def __init__(self, runner: Callable[[CrawlJob], Awaitable[List[Dict[str, Any]]]],
+                 workers: Optional[int] = None,
+                 rate_limiter: Optional[AsyncTokenBucket] = None,
+                 concurrency: Optional[AdaptiveConcurrency] = None,
+                 on_idle: Optional[Callable[[str], None]] = None):
+        self.logger = setup_logging(LOGGING_CONFIG)
+        self.runner = runner
+        self.on_idle = on_idle  # 레인의 준비/실행 중 작업이 모두 끝나면 호출 (예: 일괄 결과 저장)
+        self.workers = workers or SCHEDULER_CONFIG["workers"]
+        self.rate_limiter = rate_limiter or AsyncTokenBucket(RATE_LIMIT["requests_per_minute"])
+
+        self._ready: Dict[str, list] = {lane: [] for lane in LANES}
+        self._delayed: list = []
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._last_rescore = time.time()
+        self.concurrency = concurrency or AdaptiveConcurrency(initial=self.workers)
+        self._running: set = set()
+        self._lane_running = {lane: 0 for lane in LANES}
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self.stats = {
+            lane: {
+                "dispatched": 0, "completed": 0, "failed": 0, "expired": 0,
+                "waits": deque(maxlen=SCHEDULER_CONFIG["wait_history"])
+            }
+            for lane in LANES
+        }
+
+    async def __aenter__(self):
+        """비동기 컨텍스트 매니저 진입"""
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """비동기 컨텍스트 매니저 종료"""
+        await self.stop()
+
+    def submit(self, job: CrawlJob, wait: bool = True) -> Optional[asyncio.Future]:
+        """작업 등록. wait이면 결과를 받을 Future 반환 (반복 작업처럼 결과를 기다리지 않으면 wait=False)"""
+        if job.lane not in LANES:
+            raise ValueError(f"알 수 없는 레인: {job.lane}")
+
+        if wait and job.future is None:
+            job.future = asyncio.get_running_loop().create_future()
+        job.enqueued_at = time.time()
+
+        if job.not_before > job.enqueued_at:
+            heapq.heappush(self._delayed, (job.not_before, next(self._counter), job))
+        else:
+            self._push_ready(job, job.enqueued_at)
+
+        self._wakeup.set()
+        return job.future
+
+    def submit_interactive(self, location: str, keyword: str, deadline: Optional[float] = None) -> asyncio.Future:
+        """웹 앱 등의 즉시 조회 요청 등록"""
+        return self.submit(CrawlJob(location, keyword, lane=INTERACTIVE, priority=10, deadline=deadline))
+
+    def _push_ready(self, job: CrawlJob, now: float):
+        heapq.heappush(self._ready[job.lane], (job.sort_key(now), next(self._counter), job))
+
+    def _resolve(self, job: CrawlJob, result: Any = None, error: Optional[BaseException] = None):
+        """결과를 기다리는 호출자가 있으면 전달"""
+        if job.future is None or job.future.done():
+            return
+        if error is not None:
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
+
+    def _rescore(self, now: float):
+        """준비 큐의 우선순위 키를 현재 시각 기준으로 다시 계산 (대기 중인 작업도 점수가 오르도록)"""
+        if now - self._last_rescore < SCHEDULER_CONFIG["rescore_interval"]:
+            return
+        self._last_rescore = now
+        for lane in LANES:
+            queue = self._ready[lane]
+            queue[:] = [(job.sort_key(now), order, job) for _, order, job in queue]
+            heapq.heapify(queue)
+
+    def _promote_delayed(self, now: float):
+        """실행 시각이 된 지연 작업을 준비 큐로 이동"""
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, job = heapq.heappop(self._delayed)
+            job.enqueued_at = now
+            self._push_ready(job, now)
+
+    def _pop_next(self, now: float) -> Optional[CrawlJob]:
+        """가장 우선순위가 높은 실행 가능 작업 반환 (마감 지난 작업은 폐기)"""
+        for lane in LANES:
+            queue = self._ready[lane]
+            while queue:
+                _, _, job = heapq.heappop(queue)
+                if job.deadline is not None and job.deadline < now:
+                    self.stats[lane]["expired"] += 1
+                    self.logger.warning(f"마감 시각 초과로 작업 폐기: {job.location} {job.keyword}")
+                    self._resolve(job, error=TimeoutError("작업 마감 시각 초과"))
+                    self._reschedule(job, now)
+                    continue
+                return job
+        return None
+
+    def _has_ready(self) -> bool:
+        return any(self._ready[lane] for lane in LANES)
+
+    async def _wait_for_work(self):
+        """준비된 작업이 생길 때까지 대기"""
+        while True:
+            now = time.time()
+            self._promote_delayed(now)
+            if self._has_ready():
+                return
+
+            self._wakeup.clear()
+            timeout = self._delayed[0][0] - now if self._delayed else None
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=timeout)
+            finally:
+                waiter.cancel()
+
+    async def _dispatch_loop(self):
+        """워커 슬롯과 요청 토큰을 확보한 시점에 가장 급한 작업을 선택해 실행"""
+        while True:
+            await self._wait_for_work()
+            await self.concurrency.acquire()
+            await self.rate_limiter.acquire()
+
+            # 대기하는 동안 더 급한 작업이 들어왔을 수 있으므로 토큰 확보 후에 선택
+            now = time.time()
+            self._promote_delayed(now)
+            self._rescore(now)
+            job = self._pop_next(now)
+            if job is None:
+                self.concurrency.release()
+                continue
+
+            lane_stats = self.stats[job.lane]
+            lane_stats["dispatched"] += 1
+            lane_stats["waits"].append(now - job.enqueued_at)
+
+            self._lane_running[job.lane] += 1
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _execute(self, job: CrawlJob):
+        """작업 실행 후 결과 전달 및 반복 작업 재등록"""
+        start = time.monotonic()
+        try:
+            results = await self.runner(job)
+            job.last_yield = len(results)
+            self.stats[job.lane]["completed"] += 1
+            self.concurrency.record(time.monotonic() - start)
+            self._resolve(job, results)
+        except Exception as e:
+            self.concurrency.record(time.monotonic() - start, error=True)
+            self.stats[job.lane]["failed"] += 1
+            self.logger.error(f"작업 실패 - {job.location} {job.keyword}: {e}")
+            self._resolve(job, error=e)
+        finally:
+            job.last_crawled = time.time()
+            self.concurrency.release()
+            self._lane_running[job.lane] -= 1
+            self._reschedule(job, job.last_crawled)
+            if self.on_idle and not self._lane_running[job.lane] and not self._ready[job.lane]:
+                self.on_idle(job.lane)
+
+    def _reschedule(self, job: CrawlJob, now: float):
+        """반복 작업이면 다음 실행 시각으로 재등록"""
+        if not job.recurrence:
+            return
+        if job.deadline is not None:
+            job.deadline += job.recurrence
+        job.not_before = now + job.recurrence
+        job.future = None
+        self.submit(job, wait=False)
+
+    def start(self):
+        """디스패처 시작"""
+        if self._dispatcher is None:
+            self._dispatcher = asyncio.create_task(self._dispatch_loop())
+            self.logger.info(f"스케줄러 시작 (워커 {self.concurrency.target}개, 최대 {self.concurrency.maximum}개)")
+
+    async def stop(self):
+        """디스패처 중지 및 실행 중인 작업 취소"""
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        for task in list(self._running):
+            task.cancel()
+        await asyncio.gather(*self._running, return_exceptions=True)
+        self.logger.info("스케줄러 중지")
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """레인별 큐 대기 시간 및 처리 통계"""
+        report = {}
+        for lane in LANES:
+            lane_stats = self.stats[lane]
+            waits = sorted(lane_stats["waits"])
+            report[lane] = {
+                "queued": len(self._ready[lane]),
+                "dispatched": lane_stats["dispatched"],
+                "completed": lane_stats["completed"],
+                "failed": lane_stats["failed"],
+                "expired": lane_stats["expired"],
+                "wait_avg": sum(waits) / len(waits) if waits else 0.0,
+                "wait_p95": waits[min(len(waits) - 1, int(len(waits) * 0.95))] if waits else 0.0,
+                "wait_max": waits[-1] if waits else 0.0
+            }
+        report["delayed"] = len(self._delayed)
+        report["concurrency"] = self.concurrency.report()
+        return report
+
+
+def nightly_jobs(locations: Optional[List[str]] = None, keywords: Optional[List[str]] = None) -> List[CrawlJob]:
+    """지역×키워드 조합을 매일 반복하는 일괄 작업 목록 생성"""
+    queries = all_queries()
+    if locations or keywords:
+        queries = [
+            (location, keyword)
+            for location in (locations or sorted({q[0] for q in queries}))
+            for keyword in (keywords or sorted({q[1] for q in queries}))
+        ]
+    return [
+        CrawlJob(location, keyword, lane=BATCH, recurrence=SCHEDULER_CONFIG["nightly_interval"])
+        for location, keyword in queries
+    ]
+
+
+# ---- 실행기 / 서비스 ----------------------------------------------------------
+
+def pool_runner(pool) -> Callable[[CrawlJob], Awaitable[List[Dict[str, Any]]]]:
+    """AsyncUndetectedPool의 유휴 드라이버로 작업 실행"""
+    async def run(job: CrawlJob) -> List[Dict[str, Any]]:
+        return await pool.search(job.location, job.keyword)
+    return run
+
+
+def crawler_runner(crawler) -> Callable[[CrawlJob], Awaitable[List[Dict[str, Any]]]]:
+    """OptimizedNaverCrawler(페이지 1개)로 작업 실행. 재시도 후에도 실패하면 예외"""
+    async def run(job: CrawlJob) -> List[Dict[str, Any]]:
+        places, error = await crawler.search_with_retries(job.location, job.keyword)
+        if error:
+            raise RuntimeError(error)
+        return places
+    return run
+
+
+@asynccontextmanager
+async def open_runner(engine: str):
+    """엔진별 공유 브라우저를 띄우고 (실행기, 최대 동시 작업 수) 반환"""
+    if engine == "playwright":
+        from crawler import OptimizedNaverCrawler
+        async with OptimizedNaverCrawler() as crawler:
+            yield crawler_runner(crawler), 1
+    else:
+        from selenium_pool import AsyncUndetectedPool
+        async with AsyncUndetectedPool() as pool:
+            yield pool_runner(pool), len(pool.slots)
+
+
+class BatchSink:
+    """일괄 레인 결과를 모았다가 그 회차 작업이 모두 끝나면(on_idle) save_crawl_output으로 저장"""
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.rows: List[Dict[str, Any]] = []
+
+    def wrap(self, runner: Callable[[CrawlJob], Awaitable[List[Dict[str, Any]]]]):
+        async def run(job: CrawlJob) -> List[Dict[str, Any]]:
+            results = await runner(job)
+            if job.lane == BATCH:
+                self.rows.extend(results)
+            return results
+        return run
+
+    def on_idle(self, lane: str):
+        if lane == BATCH:
+            self.flush()
+
+    def flush(self) -> Optional[str]:
+        if not self.rows:
+            return None
+        rows, self.rows = self.rows, []
+        try:
+            filepath = save_crawl_output(rows, self.logger)
+            self.logger.info(f"일괄 크롤링 결과 저장: {len(rows)}개 ({filepath})")
+            return filepath
+        except Exception as e:
+            self.logger.error(f"일괄 크롤링 결과 저장 실패: {e}")
+            return None
+
+
+def split_query(query: str) -> Optional[Tuple[str, str]]:
+    """웹 앱 검색어("용인시 처인구 음식점") -> (지역, 키워드). 마지막 단어를 키워드로 본다"""
+    parts = query.split()
+    if len(parts) < 2:
+        return None
+    return " ".join(parts[:-1]), parts[-1]
+
+
+class SchedulerService:
+    """웹 앱의 즉시 조회와 야간 일괄 작업을 하나의 브라우저 풀로 처리하는 HTTP 서비스
+
+    POST /crawl  {"query": "..."} 또는 {"location": "...", "keyword": "..."} -> {"places": [...]}
+    GET  /report -> 레인별 대기 시간 및 처리 통계
+    """
+
+    def __init__(self, scheduler: CrawlScheduler, logger):
+        self.scheduler = scheduler
+        self.logger = logger
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0) or 0))
+
+            if len(request_line) < 2:
+                status, payload = 400, {"error": "잘못된 요청"}
+            else:
+                status, payload = await self.route(request_line[0], request_line[1], body)
+        except Exception as e:
+            self.logger.error(f"스케줄러 서비스 요청 처리 실패: {e}")
+            status, payload = 500, {"error": str(e)}
+
+        data = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'ERROR'}\r\n"
+            f"Content-Type: application/json; charset=utf-8\r\nContent-Length: {len(data)}\r\n"
+            f"Connection: close\r\n\r\n".encode("latin-1") + data
+        )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def route(self, method: str, path: str, body: bytes) -> Tuple[int, Dict[str, Any]]:
+        if method == "GET" and path == "/report":
+            return 200, self.scheduler.report()
+        if method != "POST" or path != "/crawl":
+            return 404, {"error": f"알 수 없는 경로: {method} {path}"}
+
+        request = json.loads(body or b"{}")
+        if request.get("location") and request.get("keyword"):
+            location, keyword = request["location"], request["keyword"]
+        else:
+            parsed = split_query(request.get("query", ""))
+            if parsed is None:
+                return 400, {"error": "검색어는 '지역 키워드' 형식이어야 합니다"}
+            location, keyword = parsed
+
+        deadline = time.time() + SCHEDULER_CONFIG["interactive_timeout"]
+        try:
+            places = await self.scheduler.submit_interactive(location, keyword, deadline=deadline)
+        except TimeoutError as e:
+            return 504, {"error": str(e), "location": location, "keyword": keyword}
+        return 200, {"location": location, "keyword": keyword, "places": places}
+
+
+async def serve(engine: Optional[str] = None, host: Optional[str] = None, port: Optional[int] = None,
+                nightly: bool = True):
+    """공유 브라우저 + 스케줄러 + HTTP 서비스 실행 (일괄 레인에 야간 작업 등록)"""
+    logger = setup_logging(LOGGING_CONFIG)
+    engine = engine or SCHEDULER_CONFIG["engine"]
+    async with open_runner(engine) as (runner, max_workers):
+        sink = BatchSink(logger)
+        scheduler = CrawlScheduler(sink.wrap(runner), concurrency=AdaptiveConcurrency(maximum=max_workers),
+                                   on_idle=sink.on_idle)
+
+        async with scheduler:
+            if nightly:
+                for job in nightly_jobs():
+                    scheduler.submit(job, wait=False)
+
+            service = SchedulerService(scheduler, logger)
+            server = await asyncio.start_server(
+                service.handle, host or SCHEDULER_CONFIG["host"], port or SCHEDULER_CONFIG["port"]
+            )
+            logger.info(f"스케줄러 서비스 시작: {', '.join(str(s.getsockname()) for s in server.sockets)} ({engine})")
+            try:
+                async with server:
+                    await server.serve_forever()
+            finally:
+                sink.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대화형/일괄 레인 크롤링 스케줄러 서비스")
+    parser.add_argument("--engine", choices=["selenium", "playwright"], help="공유 브라우저 종류")
+    parser.add_argument("--host")
+    parser.add_argument("--port", type=int)
+    parser.add_argument("--no-nightly", action="store_true", help="야간 일괄 작업을 등록하지 않음")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.engine, args.host, args.port, nightly=not args.no_nightly))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""
+네이버 지도 크롤러 - Undetected Chrome 드라이버 풀
+여러 개의 동기식 uc.Chrome 드라이버를 스레드 풀에서 구동하고
+asyncio 큐로 (지역, 키워드) 작업을 분배하는 비동기 래퍼
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple, AsyncIterator, Union
+
+from config import (
+    DELAY_RANGE, MAX_RETRIES,
+    OUTPUT_DIR, LOGGING_CONFIG,
+    SELENIUM_POOL_CONFIG, WATCHDOG_CONFIG
+)
+from utils import (
+    setup_logging, random_delay, validate_search_params,
+    create_output_directory
+)
+from change_detection import save_crawl_output
+from query_planner import all_queries, plan_queries, record_query_results
+from crawler_selenium import UndetectedNaverCrawler
+from browser_watchdog import RendererHungError, process_tree_pids, process_rss_mb, kill_process_tree
+from proxy_pool import ProxyPool, Proxy
+from tracing import Tracer, start_selenium_metrics, collect_selenium_metrics
+from concurrency import AdaptiveConcurrency
+from crawl_events import RowEvent, ProgressEvent
+
+
+class DriverSlot:
+    """드라이버 하나와 그 드라이버 전용 스레드"""
+
+    def __init__(self, index: int, proxy: Optional[Proxy] = None):
+        self.index = index
+        self.proxy = proxy
+        self.crawler = self._new_crawler()
+        # 드라이버는 스레드 안전하지 않으므로 항상 같은 스레드에서만 호출
+        self.executor = self._new_executor()
+
+        self.navigations = 0
+        self.total_navigations = 0
+        self.recycles = 0
+        self.restarts = 0
+        self.hangs = 0
+        self.last_memory_mb: Optional[float] = None
+        self.peak_memory_mb = 0.0
+
+    def _new_crawler(self) -> UndetectedNaverCrawler:
+        crawler = UndetectedNaverCrawler()
+        crawler.proxy = self.proxy
+        return crawler
+
+    def _new_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"uc-driver-{self.index}")
+
+    async def call(self, func, *args):
+        """드라이버 스레드에서 블로킹 함수 실행"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def start(self):
+        await self.call(self.crawler.initialize_driver)
+        self.navigations = 0
+
+    async def stop(self):
+        try:
+            await asyncio.wait_for(self.call(self.crawler.close), WATCHDOG_CONFIG["close_timeout"])
+        except asyncio.TimeoutError:
+            self.kill()
+            self.crawler.release_resources()
+        finally:
+            self.executor.shutdown(wait=False)
+
+    def browser_pid(self) -> Optional[int]:
+        driver = self.crawler.driver
+        return getattr(driver, "browser_pid", None) if driver else None
+
+    def memory_mb(self) -> Optional[float]:
+        """Chrome 프로세스 트리 RSS (MB)"""
+        pid = self.browser_pid()
+        if pid is None:
+            return None
+        return process_rss_mb(process_tree_pids(pid))
+
+    def kill(self):
+        """멈춘 Chrome 강제 종료 (드라이버 스레드가 막혀 있어도 동작)"""
+        pid = self.browser_pid()
+        if pid is not None:
+            kill_process_tree(pid)
+
+    async def maybe_recycle(self, logger):
+        """이동 횟수/메모리 기준을 넘으면 드라이버 재생성"""
+        memory = self.memory_mb()
+        if memory is not None:
+            self.last_memory_mb = memory
+            self.peak_memory_mb = max(self.peak_memory_mb, memory)
+
+        if self.navigations >= WATCHDOG_CONFIG["max_navigations"]:
+            await self.recycle(logger, f"이동 {self.navigations}회")
+        elif memory is not None and memory > WATCHDOG_CONFIG["max_memory_mb"]:
+            await self.recycle(logger, f"메모리 {memory:.0f}MB")
+
+    async def recycle(self, logger, reason: str):
+        """드라이버를 종료하고 새로 띄움"""
+        logger.info(f"[driver-{self.index}] 드라이버 재생성: {reason}")
+        await self.stop()
+        self.executor = self._new_executor()
+        self.crawler = self._new_crawler()
+        await self.start()
+        self.recycles += 1
+
+    async def replace_hung(self, logger):
+        """응답 없는 드라이버를 강제 종료하고 새 스레드/드라이버로 교체"""
+        self.hangs += 1
+        self.kill()
+        # 막힌 스레드는 버리고 새 스레드에서 드라이버를 다시 띄움 (이전 크롤러의 DB 연결/chromedriver도 정리)
+        self.crawler.release_resources()
+        self.executor.shutdown(wait=False)
+        self.executor = self._new_executor()
+        self.crawler = self._new_crawler()
+        await self.start()
+        self.restarts += 1
+        logger.warning(f"[driver-{self.index}] 멈춘 드라이버 교체 완료")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "navigations": self.total_navigations,
+            "recycles": self.recycles,
+            "restarts": self.restarts,
+            "hangs": self.hangs,
+            "memory_mb": self.last_memory_mb,
+            "peak_memory_mb": self.peak_memory_mb
+        }
+
+
+class AsyncUndetectedPool:
+    """여러 Undetected Chrome 드라이버를 비동기로 오케스트레이션하는 풀"""
+
+    def __init__(self, drivers: Optional[int] = None):
+        self.logger = setup_logging(LOGGING_CONFIG)
+        self.driver_count = drivers or SELENIUM_POOL_CONFIG["drivers"]
+        self.slots: List[DriverSlot] = []
+        self.proxy_pool: Optional[ProxyPool] = ProxyPool.from_config()
+        self.tracer = Tracer()
+        self.concurrency: Optional[AdaptiveConcurrency] = None
+        self._idle: Optional[asyncio.Queue] = None  # search()용 유휴 드라이버
+
+    async def __aenter__(self):
+        """비동기 컨텍스트 매니저 진입"""
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """비동기 컨텍스트 매니저 종료"""
+        await self.close()
+
+    async def start(self):
+        """드라이버 풀 초기화 (드라이버들을 병렬로 기동)"""
+        proxies = self.proxy_pool.proxies if self.proxy_pool else []
+        self.slots = [
+            DriverSlot(i, proxies[i % len(proxies)] if proxies else None)
+            for i in range(self.driver_count)
+        ]
+        results = await asyncio.gather(
+            *(slot.start() for slot in self.slots), return_exceptions=True
+        )
+
+        alive = []
+        for slot, result in zip(self.slots, results):
+            if isinstance(result, Exception):
+                self.logger.error(f"드라이버 {slot.index} 초기화 실패: {result}")
+                await slot.stop()
+            else:
+                alive.append(slot)
+        self.slots = alive
+
+        if not self.slots:
+            raise RuntimeError("사용 가능한 드라이버가 없습니다.")
+        # 동시에 검색하는 드라이버 수를 지연/오류/차단 지표로 조절 (상한은 살아 있는 드라이버 수)
+        self.concurrency = AdaptiveConcurrency(maximum=len(self.slots))
+        self._idle = asyncio.Queue()
+        for slot in self.slots:
+            self._idle.put_nowait(slot)
+        self.logger.info(f"드라이버 풀 초기화 완료: {len(self.slots)}개")
+
+    async def search_places(self, slot: DriverSlot, location: str, keyword: str) -> List[Dict[str, Any]]:
+        """드라이버 하나로 검색 (대기는 이벤트 루프에서 비동기로 수행)"""
+        if not validate_search_params(location, keyword):
+            self.logger.warning(f"잘못된 검색 파라미터: {location}, {keyword}")
+            return []
+
+        async with self.concurrency.slot():
+            return await self._search_with_slot(slot, location, keyword, self.concurrency)
+
+    async def search(self, location: str, keyword: str) -> List[Dict[str, Any]]:
+        """유휴 드라이버 하나를 빌려 검색 (스케줄러처럼 외부에서 동시 실행 수를 조절하는 경우)
+
+        풀의 동시성 슬롯을 잡지 않으므로 지연/오류 기록도 동시 실행 수를 조절하는 호출자가 한다.
+        crawl_iter()와 같은 풀에서 동시에 쓰지 않는다
+        """
+        if not validate_search_params(location, keyword):
+            self.logger.warning(f"잘못된 검색 파라미터: {location}, {keyword}")
+            return []
+
+        slot = await self._idle.get()
+        try:
+            return await self._search_with_slot(slot, location, keyword, None)
+        finally:
+            self._idle.put_nowait(slot)
+
+    async def _search_with_slot(self, slot: DriverSlot, location: str, keyword: str,
+                                concurrency: Optional[AdaptiveConcurrency]) -> List[Dict[str, Any]]:
+        """드라이버 하나로 검색하고 프록시 풀과 (슬롯을 쥔 경우) 동시성 제어기에 결과 반영"""
+        def record(latency: float, **outcome):
+            if proxy:
+                self.proxy_pool.record(proxy, latency, **outcome)
+            if concurrency:
+                concurrency.record(latency, **outcome)
+
+        proxy = None
+        if self.proxy_pool:
+            # Chrome 프록시는 프로세스 단위이므로 현재 프록시를 우선 쓰고, 바뀌면 드라이버 재생성
+            proxy = await self.proxy_pool.acquire(prefer=slot.proxy)
+            if proxy is not slot.proxy:
+                slot.proxy = proxy
+                await slot.recycle(self.logger, f"프록시 변경: {proxy.server}")
+
+        await slot.maybe_recycle(self.logger)
+        slot.navigations += 1
+        slot.total_navigations += 1
+
+        start = time.monotonic()
+        try:
+            places = await asyncio.wait_for(
+                self._search(slot, location, keyword), WATCHDOG_CONFIG["job_deadline"]
+            )
+        except asyncio.TimeoutError:
+            record(time.monotonic() - start, error=True)
+            await slot.replace_hung(self.logger)
+            raise RendererHungError(f"{WATCHDOG_CONFIG['job_deadline']}초 내에 완료되지 않음: {location} {keyword}")
+        except Exception:
+            record(time.monotonic() - start, error=True)
+            raise
+
+        latency = time.monotonic() - start
+        blocked = not places and await slot.call(slot.crawler.detect_block)
+        record(latency, blocked=blocked)
+
+        self.logger.info(f"[driver-{slot.index}] {location} {keyword} 검색 완료: {len(places)}개 결과")
+        return places
+
+    async def _search(self, slot: DriverSlot, location: str, keyword: str) -> List[Dict[str, Any]]:
+        trace = self.tracer.start(f"{location} {keyword}", location=location, keyword=keyword, driver=slot.index)
+        try:
+            await slot.call(start_selenium_metrics, slot.crawler.driver, trace)
+            with trace.span("navigate"):
+                await slot.call(slot.crawler.open_search_page, location, keyword)
+            with trace.span("wait"):
+                await random_delay(*SELENIUM_POOL_CONFIG["page_settle_range"])
+            with trace.span("archive"):
+                await slot.call(slot.crawler.archive_page, location, keyword)
+            places = await slot.call(slot.crawler.extract_place_data, location, keyword, trace)
+            await slot.call(collect_selenium_metrics, slot.crawler.driver, trace)
+            return places
+        finally:
+            trace_path = trace.save()
+            if trace_path:
+                self.logger.info(f"트레이스 저장: {trace_path}")
+
+    async def _worker(self, slot: DriverSlot, queue: asyncio.Queue, events: asyncio.Queue, progress: Dict[str, Any]):
+        """큐에서 작업을 꺼내 처리하고 결과/진행 이벤트를 events 큐로 보내는 드라이버별 워커"""
+        while True:
+            try:
+                index, location, keyword, hangs = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+
+            try:
+                places, error, requeued = [], None, False
+                for retry_count in range(1, MAX_RETRIES + 1):
+                    try:
+                        places, error = await self.search_places(slot, location, keyword), None
+                        break
+                    except RendererHungError as e:
+                        # 멈춘 작업은 다른 드라이버도 가져갈 수 있도록 큐에 다시 넣음
+                        if hangs + 1 < MAX_RETRIES:
+                            self.logger.warning(f"작업 재등록 - {e}")
+                            queue.put_nowait((index, location, keyword, hangs + 1))
+                            requeued = True
+                        else:
+                            self.logger.error(f"렌더러 응답 없음 반복, 작업 포기: {location} {keyword}")
+                            error = str(e)
+                        break
+                    except Exception as e:
+                        self.logger.warning(f"재시도 {retry_count}/{MAX_RETRIES} - {location} {keyword}: {e}")
+                        error = str(e)
+
+                        if retry_count < MAX_RETRIES:
+                            await random_delay(10, 15)  # 재시도 전 더 긴 대기
+                        else:
+                            self.logger.error(f"최대 재시도 횟수 초과: {location} {keyword}")
+
+                if not requeued:
+                    # events 큐가 가득 차 있으면 소비자가 가져갈 때까지 대기 (backpressure)
+                    for row in places:
+                        await events.put(RowEvent(index, location, keyword, row))
+                    progress["completed"] += 1
+                    await events.put(ProgressEvent(
+                        index, location, keyword, found=len(places), completed=progress["completed"],
+                        total=progress["total"], elapsed=time.monotonic() - progress["started"], error=error
+                    ))
+
+                # 요청 간 딜레이
+                await random_delay(*DELAY_RANGE)
+            finally:
+                queue.task_done()
+
+    async def crawl_iter(self, jobs: Optional[List[Tuple[str, str]]] = None,
+                         buffer: Optional[int] = None) -> AsyncIterator[Union[RowEvent, ProgressEvent]]:
+        """드라이버 풀로 크롤링하며 검색이 끝나는 순서대로 결과 행/진행 이벤트를 내보내는 비동기 제너레이터
+
+        이벤트 큐 크기(buffer)를 넘으면 워커가 소비자를 기다리며(backpressure),
+        aclose()나 소비 태스크 취소 시 진행 중인 워커를 모두 취소한다
+        """
+        jobs = list(jobs if jobs is not None else all_queries())
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, (location, keyword) in enumerate(jobs):
+            queue.put_nowait((index, location, keyword, 0))
+
+        events: asyncio.Queue = asyncio.Queue(maxsize=buffer or SELENIUM_POOL_CONFIG["stream_buffer"])
+        progress = {"completed": 0, "total": len(jobs), "started": time.monotonic()}
+        workers = [asyncio.create_task(self._worker(slot, queue, events, progress)) for slot in self.slots]
+
+        async def finish():
+            results = await asyncio.gather(*workers, return_exceptions=True)
+            for result in results:
+                if isinstance(result, Exception):
+                    self.logger.error(f"워커 비정상 종료: {result}")
+            await events.put(None)
+
+        finisher = asyncio.create_task(finish())
+        try:
+            while True:
+                event = await events.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            for task in workers + [finisher]:
+                task.cancel()
+            await asyncio.gather(*workers, finisher, return_exceptions=True)
+
+    async def crawl(self, jobs: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """(지역, 키워드) 작업 목록을 드라이버 풀로 크롤링하고 입력 순서대로 병합"""
+        results: Dict[int, List[Dict[str, Any]]] = {}
+        async for event in self.crawl_iter(jobs):
+            if isinstance(event, RowEvent):
+                results.setdefault(event.index, []).append(event.row)
+
+        all_data = []
+        for index in range(len(jobs)):
+            all_data.extend(results.get(index, []))
+        return all_data
+
+    async def crawl_all_locations(self, queries: Optional[List[Tuple[str, str]]] = None) -> List[Dict[str, Any]]:
+        """모든 지역과 키워드 조합(또는 주어진 쿼리 계획)으로 크롤링"""
+        return await self.crawl(queries if queries is not None else all_queries())
+
+    async def run(self) -> Optional[str]:
+        """크롤링 실행"""
+        try:
+            self.logger.info(f"Undetected 드라이버 풀 크롤링 시작 ({len(self.slots)}개 드라이버)")
+
+            # 출력 디렉토리 생성
+            create_output_directory(OUTPUT_DIR)
+
+            # 크롤링 실행
+            queries, plan = plan_queries(self.logger)
+            data = await self.crawl_all_locations(queries)
+            record_query_results(queries, data, plan, self.logger)
+
+            if not data:
+                raise ValueError("크롤링된 데이터가 없습니다.")
+
+            # 엑셀 파일로 저장 (DELTA_CONFIG 출력 모드에 따라 변경분만 저장)
+            filepath = save_crawl_output(data, self.logger)
+
+            self.logger.info(f"크롤링 완료. 총 {len(data)}개 데이터 저장: {filepath}")
+            self.logger.info(f"드라이버 통계: {self.stats()}")
+            self.logger.info(f"동시성 통계: {self.concurrency.report()}")
+            if self.proxy_pool:
+                self.logger.info(f"프록시 통계: {self.proxy_pool.stats()}")
+            return filepath
+
+        except Exception as e:
+            self.logger.error(f"크롤링 실행 실패: {e}")
+            raise
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """드라이버별 메모리 사용량 및 재시작 통계"""
+        return {f"driver-{slot.index}": slot.stats() for slot in self.slots}
+
+    async def close(self):
+        """모든 드라이버 정리"""
+        await asyncio.gather(*(slot.stop() for slot in self.slots), return_exceptions=True)
+        self.slots = []
+        self.logger.info("드라이버 풀 정리 완료")
+
+
+async def main():
+    """메인 실행 함수"""
+    async with AsyncUndetectedPool() as pool:
+        try:
+            result_file = await pool.run()
+            print(f"✅ 크롤링 완료! 결과 파일: {result_file}")
+        except Exception as e:
+            print(f"❌ 크롤링 실패: {e}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""
+주소 정규화/지오코딩 테스트 - 작은 참조 CSV로 인덱스를 만들어 조회
+"""
+import pytest
+
+from address import AddressIndex, build_index, parse_address
+
+REFERENCE = """시도,시군구,읍면동,리,도로명,건물본번,건물부번,지번본번,지번부번,산여부,법정동코드,도로명코드,우편번호,위도,경도
+경기도,용인시 처인구,김량장동,,금령로,20,,123,4,0,4146110100,1,17000,37.23,127.20
+경기도,용인시 기흥구,구갈동,,기흥로,58,1,400,,0,4146310100,2,17000,37.27,127.11
+서울특별시,중구,태평로1가,,세종대로,110,,31,,0,1114010300,3,04524,37.56,126.97
+대전광역시,중구,대흥동,,세종대로,110,,12,,0,3014010400,4,34000,36.32,127.42
+"""
+
+
+@pytest.fixture(scope="module")
+def index(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("address")
+    reference = directory / "reference.csv"
+    reference.write_text(REFERENCE, encoding="utf-8")
+    index_file = str(directory / "address_index.db")
+    build_index(str(reference), index_file)
+    with AddressIndex(index_file) as index:
+        yield index
+
+
+def test_parse_road_address():
+    parsed = parse_address("경기 용인시 처인구 금령로 20 2층")
+    assert (parsed.sido, parsed.sigungu, parsed.road, parsed.building_main) == ("경기도", "용인시 처인구", "금령로", 20)
+    assert parsed.detail == "2층"
+
+
+@pytest.mark.parametrize("address", [
+    "경기 용인시 처인구 금령로 20",
+    "용인시 처인구 금령로 20",
+    "경기도 처인구 금령로 20",
+    "처인구 금령로 20",  # 시 생략
+])
+def test_road_lookup_with_omitted_parts(index, address):
+    result = index.geocode(address)
+    assert result is not None
+    assert (result.match, result.sigungu, result.building_no) == ("road", "용인시 처인구", "20")
+
+
+def test_jibun_lookup_without_city(index):
+    result = index.geocode("기흥구 구갈동 400")
+    assert result is not None
+    assert (result.match, result.sigungu, result.jibun) == ("jibun", "용인시 기흥구", "400")
+
+
+def test_ambiguous_sigungu_needs_sido(index):
+    # '중구 세종대로 110'은 서울/대전 모두 해당하므로 시도 없이는 매칭하지 않음
+    assert index.geocode("중구 세종대로 110") is None
+    assert index.geocode("서울 중구 세종대로 110").zipcode == "04524"
+    assert index.geocode("대전 중구 세종대로 110").zipcode == "34000"
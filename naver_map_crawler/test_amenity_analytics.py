@@ -0,0 +1,208 @@
+"""
+편의시설 집계 테스트 - 증분 갱신(apply/update_from_rows) 결과가 전체 재계산과 같은지, 최근접 거리 계산
+"""
+import logging
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import amenity_analytics
+from address import GeocodeResult
+from amenity_analytics import AmenityAnalytics, haversine_m, update_from_rows
+from change_detection import CHANGE_NEW, CHANGE_CHANGED, CHANGE_CLOSED, CHANGE_UNCHANGED
+
+# 주소 -> (동, 위도, 경도). 목록에 없는 주소는 좌표 없이 동 단위로만 집계됨
+POINTS = {
+    "경기 용인시 처인구 김량장동 1": ("김량장동", 37.2340, 127.2010),
+    "경기 용인시 처인구 김량장동 2": ("김량장동", 37.2345, 127.2020),
+    "경기 용인시 처인구 역북동 3": ("역북동", 37.2400, 127.2100),
+    "경기 용인시 처인구 역북동 4": ("역북동", 37.2410, 127.2300),
+    "경기 용인시 기흥구 구갈동 5": ("구갈동", 37.2750, 127.1150),
+}
+
+
+class FakeGeocoder:
+    def __init__(self):
+        self.closed = False
+
+    def geocode(self, address):
+        if address not in POINTS:
+            return None
+        dong, lat, lng = POINTS[address]
+        sigungu = address.split()[2]
+        return GeocodeResult("exact", "경기도", f"용인시 {sigungu}", dong, None, None, None,
+                             lat, lng, None, None, None)
+
+    def close(self):
+        self.closed = True
+
+
+def place(name, address, category="카페", rating="4.2", kind=None):
+    row = {"가게명": name, "주소": address, "카테고리": category, "평점": rating}
+    if kind is not None:
+        row["변경_구분"] = kind
+    return row
+
+
+SNAPSHOT = [
+    place("하늘정원", "경기 용인시 처인구 김량장동 1"),
+    place("바다분식", "경기 용인시 처인구 김량장동 2", "분식", "3.8"),
+    place("역북약국", "경기 용인시 처인구 역북동 3", "약국", ""),
+    place("역북마트", "경기 용인시 처인구 역북동 4", "마트>대형마트", "4.6"),
+    place("구갈식당", "경기 용인시 기흥구 구갈동 5", "한식,육류", "4.0"),
+    place("좌표없는집", "경기 용인시 처인구 삼가동 9", "카페", "3.2"),
+]
+
+DELTA = [
+    place("새카페", "경기 용인시 처인구 역북동 3", "카페", "4.9", kind=CHANGE_NEW),
+    place("바다분식", "경기 용인시 처인구 김량장동 2", "분식", "4.4", kind=CHANGE_CHANGED),
+    place("역북마트", "경기 용인시 처인구 역북동 4", "마트>대형마트", "4.6", kind=CHANGE_CLOSED),
+    place("하늘정원", "경기 용인시 처인구 김량장동 1", kind=CHANGE_UNCHANGED),
+    place("좌표없는집", "경기 용인시 처인구 삼가동 9", "카페", "", kind=CHANGE_CHANGED),
+]
+
+
+def snapshot_after_delta():
+    """DELTA를 반영한 뒤의 전체 스냅샷"""
+    current = {row["가게명"]: row for row in SNAPSHOT}
+    for row in DELTA:
+        kind = row["변경_구분"]
+        if kind == CHANGE_CLOSED:
+            del current[row["가게명"]]
+        elif kind != CHANGE_UNCHANGED:
+            current[row["가게명"]] = {key: value for key, value in row.items() if key != "변경_구분"}
+    return list(current.values())
+
+
+def table(analytics):
+    frames = [analytics.aggregates(level).assign(level=level) for level in ("dong", "cell")]
+    data = pd.concat(frames, ignore_index=True)
+    data["rating_sum"] = data["rating_sum"].round(6)
+    return data.sort_values(["level", "area", "category", "rating_bin"]).reset_index(drop=True)
+
+
+def open_analytics(path):
+    return AmenityAnalytics(str(path), FakeGeocoder())
+
+
+def test_incremental_apply_matches_full_rebuild(tmp_path):
+    with open_analytics(tmp_path / "incremental.db") as analytics:
+        analytics.apply(pd.DataFrame(SNAPSHOT))
+        stats = analytics.apply(pd.DataFrame(DELTA))
+        incremental = table(analytics)
+        analytics.rebuild()
+        rebuilt = table(analytics)
+
+    # 유지 행은 건너뛰고 신규/변경 3건 반영, 폐업 1건 제거
+    assert (stats["upserted"], stats["new"], stats["removed"]) == (3, 1, 1)
+    pd.testing.assert_frame_equal(incremental, rebuilt)
+
+    # 처음부터 최종 스냅샷만 넣은 DB와도 같아야 함
+    with open_analytics(tmp_path / "fresh.db") as analytics:
+        analytics.apply(pd.DataFrame(snapshot_after_delta()))
+        pd.testing.assert_frame_equal(incremental, table(analytics))
+
+    counts = incremental[incremental["level"] == "dong"].groupby("area")["count"].sum()
+    assert counts.to_dict() == {"용인시 기흥구 구갈동": 1, "용인시 처인구 김량장동": 2,
+                               "용인시 처인구 삼가동": 1, "용인시 처인구 역북동": 2}
+    # 좌표 없는 장소는 격자 집계에서 빠짐
+    assert incremental[incremental["level"] == "cell"]["count"].sum() == 5
+
+
+def test_replace_snapshot_removes_missing_places(tmp_path):
+    final = snapshot_after_delta()
+    with open_analytics(tmp_path / "replace.db") as analytics:
+        analytics.apply(pd.DataFrame(SNAPSHOT))
+        # 같은 장소의 재등장(중복 행)은 마지막 관측만 반영
+        stats = analytics.apply(pd.DataFrame(final + final[:1]), replace=True)
+        replaced = table(analytics)
+        analytics.rebuild()
+        pd.testing.assert_frame_equal(replaced, table(analytics))
+
+    with open_analytics(tmp_path / "fresh.db") as analytics:
+        analytics.apply(pd.DataFrame(final))
+        pd.testing.assert_frame_equal(replaced, table(analytics))
+    assert stats["removed"] == 1 and stats["new"] == 1
+
+
+def test_update_from_rows_applies_delta(tmp_path, monkeypatch):
+    geocoder = FakeGeocoder()
+    monkeypatch.setattr(amenity_analytics, "open_geocoder", lambda: geocoder)
+    logger = logging.getLogger("test_amenity_analytics")
+    db_path = str(tmp_path / "update.db")
+
+    assert update_from_rows([], logger, db_path) is None
+    update_from_rows(SNAPSHOT, logger, db_path)
+    stats = update_from_rows(DELTA, logger, db_path)
+    assert stats["new"] == 1 and stats["removed"] == 1
+    assert geocoder.closed
+
+    with open_analytics(tmp_path / "update.db") as analytics:
+        incremental = table(analytics)
+        analytics.rebuild()
+        pd.testing.assert_frame_equal(incremental, table(analytics))
+
+
+@pytest.fixture
+def amenities(tmp_path):
+    with open_analytics(tmp_path / "nearest.db") as analytics:
+        analytics.apply(pd.DataFrame(SNAPSHOT))
+        yield analytics
+
+
+def brute_force_nearest(properties, places):
+    """모든 (매물, 장소) 쌍의 대원 거리로 계산한 최근접 이름/거리"""
+    names, distances = [], []
+    for lat, lng in properties[["lat", "lng"]].itertuples(index=False):
+        d = haversine_m(lat, lng, places["lat"].to_numpy(), places["lng"].to_numpy())
+        names.append(places["name"].iloc[int(np.argmin(d))])
+        distances.append(float(d.min()))
+    return names, distances
+
+
+def test_nearest_distances_counts_and_categories(amenities):
+    properties = pd.DataFrame({
+        "매물": ["김량장", "역북", "구갈", "좌표없음"],
+        "lat": [37.2341, 37.2402, 37.2740, np.nan],
+        "lng": [127.2012, 127.2098, 127.1150, np.nan],
+    })
+    result = amenities.nearest(properties, categories=["카페", "약국", "없는업종"], radius_m=200)
+
+    placed = amenities.load_places().dropna(subset=["lat", "lng"])
+    names, distances = brute_force_nearest(properties.iloc[:3], placed)
+    assert list(result["nearest_name"][:3]) == names == ["하늘정원", "역북약국", "구갈식당"]
+    assert list(result["nearest_category"][:3]) == ["카페", "약국", "한식"]
+    np.testing.assert_allclose(result["nearest_m"][:3], distances)
+    assert list(result["within_200m"]) == [2, 1, 1, 0]
+
+    # 좌표 없는 매물은 결과 없음
+    assert pd.isna(result["nearest_name"][3]) and np.isnan(result["nearest_m"][3])
+    # 업종별 최근접: 카페는 좌표 없는 '좌표없는집'을 제외하고 하늘정원만 후보
+    cafe = placed[placed["category"] == "카페"]
+    np.testing.assert_allclose(result["카페_nearest_m"][:3], brute_force_nearest(properties.iloc[:3], cafe)[1])
+    assert list(result["약국_within_200m"]) == [0, 1, 0, 0]
+    assert result["없는업종_nearest_m"].isna().all() and (result["없는업종_within_200m"] == 0).all()
+    assert list(result["매물"]) == list(properties["매물"])
+
+
+def test_nearest_blocked_matches_single_block(amenities):
+    rng = np.random.default_rng(1)
+    properties = pd.DataFrame({"lat": rng.uniform(37.22, 37.28, 50), "lng": rng.uniform(127.10, 127.24, 50)})
+    whole = amenities.nearest(properties, radius_m=1000)
+
+    # 한 번에 장소 수(5)만큼만 계산하도록 해서 매물 1개씩 블록 처리
+    amenities.config["block_elements"] = 1
+    blocked = amenities.nearest(properties, radius_m=1000)
+    pd.testing.assert_frame_equal(whole, blocked)
+
+    names, distances = brute_force_nearest(properties, amenities.load_places().dropna(subset=["lat", "lng"]))
+    assert list(whole["nearest_name"]) == names
+    np.testing.assert_allclose(whole["nearest_m"], distances)
+
+
+def test_nearest_without_amenities(tmp_path):
+    with open_analytics(tmp_path / "empty.db") as analytics:
+        result = analytics.nearest(pd.DataFrame({"lat": [37.23], "lng": [127.20]}), radius_m=500)
+    assert np.isnan(result["nearest_m"][0]) and result["within_500m"][0] == 0
+    assert pd.isna(result["nearest_name"][0])
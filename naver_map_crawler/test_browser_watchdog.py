@@ -0,0 +1,192 @@
+"""
+브라우저 감시 테스트 - 이동 횟수/RSS 상한 재생성, 마감 초과 시 렌더러 교체, 프로세스 트리 종료
+"""
+import asyncio
+import logging
+import os
+import subprocess
+import time
+
+import pytest
+
+from browser_watchdog import (
+    PageWatchdog, RendererHungError, browser_process_pid, kill_process_tree, process_tree_pids
+)
+
+CONFIG = {"max_navigations": 2, "max_memory_mb": 1_000_000, "job_deadline": 0.1, "close_timeout": 0.1}
+
+
+class FakeCDPSession:
+    def __init__(self, processes):
+        self.processes = processes
+
+    async def send(self, command):
+        assert command == "SystemInfo.getProcessInfo"
+        return {"processInfo": self.processes}
+
+    async def detach(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self, processes):
+        self.processes = processes
+
+    async def new_browser_cdp_session(self):
+        return FakeCDPSession(self.processes)
+
+
+class FakeContext:
+    def __init__(self, hang_on_close=False):
+        self.hang_on_close = hang_on_close
+        self.closed = False
+
+    async def close(self):
+        if self.hang_on_close:
+            await asyncio.sleep(10)
+        self.closed = True
+
+
+class FakePage:
+    def __init__(self, number):
+        self.number = number
+        self.context = FakeContext()
+
+
+class FakeCrawler:
+    """새 페이지 생성과 브라우저 재시작 횟수만 기록하는 크롤러"""
+
+    def __init__(self):
+        self.logger = logging.getLogger("test_browser_watchdog")
+        # RSS 측정 대상은 테스트 프로세스 자신
+        self.browser = FakeBrowser([{"id": os.getpid(), "type": "browser"}])
+        self.page = None
+        self.pages = 0
+        self.restarts = 0
+
+    async def new_page(self):
+        self.pages += 1
+        return FakePage(self.pages)
+
+    async def restart_browser(self):
+        self.restarts += 1
+
+
+def start_watchdog(**overrides):
+    crawler = FakeCrawler()
+    watchdog = PageWatchdog(crawler, config=dict(CONFIG, **overrides))
+    return crawler, watchdog
+
+
+async def search(*args):
+    return ["결과"]
+
+
+def test_recycle_after_max_navigations():
+    crawler, watchdog = start_watchdog()
+
+    async def scenario():
+        await watchdog.start()
+        first = crawler.page
+        for _ in range(3):
+            assert await watchdog.run(search, "처인구", "카페") == ["결과"]
+        return first
+    first = asyncio.run(scenario())
+
+    # 2회 이동 후 세 번째 검색 전에 재생성
+    assert first.context.closed and crawler.page is not first
+    assert watchdog.stats()["recycles"] == 1 and watchdog.stats()["navigations"] == 3
+    assert watchdog.navigations == 1 and crawler.pages == 2
+
+
+def test_recycle_when_rss_exceeds_cap():
+    crawler, watchdog = start_watchdog(max_memory_mb=1)
+
+    async def scenario():
+        await watchdog.start()
+        await watchdog.run(search)
+    asyncio.run(scenario())
+
+    stats = watchdog.stats()
+    assert stats["recycles"] == 1 and stats["memory_mb"] > 1
+    assert stats["peak_memory_mb"] == stats["memory_mb"]
+
+
+def test_no_recycle_under_limits():
+    crawler, watchdog = start_watchdog()
+
+    async def scenario():
+        await watchdog.start()
+        await watchdog.run(search)
+    asyncio.run(scenario())
+    assert watchdog.stats()["recycles"] == 0 and crawler.pages == 1
+
+
+def test_deadline_recycles_and_raises_hung_error():
+    crawler, watchdog = start_watchdog()
+
+    async def hung_search(*args):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        await watchdog.start()
+        first = crawler.page
+        with pytest.raises(RendererHungError):
+            await watchdog.run(hung_search, "처인구", "카페")
+        return first
+    first = asyncio.run(scenario())
+
+    assert first.context.closed and crawler.page is not first
+    assert watchdog.stats()["hangs"] == 1 and watchdog.stats()["recycles"] == 1
+    assert crawler.restarts == 0
+
+
+def test_hung_context_close_restarts_browser():
+    crawler, watchdog = start_watchdog()
+
+    async def scenario():
+        await watchdog.start()
+        crawler.page.context.hang_on_close = True
+        await watchdog.recycle("테스트")
+    asyncio.run(scenario())
+
+    assert crawler.restarts == 1 and watchdog.stats()["restarts"] == 1
+    assert crawler.page.number == 2
+
+
+def test_browser_process_pid_from_cdp():
+    browser = FakeBrowser([{"id": 11, "type": "renderer"}, {"id": 10, "type": "browser"}])
+    assert asyncio.run(browser_process_pid(browser)) == 10
+
+    class BrokenBrowser:
+        async def new_browser_cdp_session(self):
+            raise RuntimeError("브라우저 응답 없음")
+    assert asyncio.run(browser_process_pid(BrokenBrowser())) is None
+
+
+def alive(pid):
+    """프로세스가 살아 있는지 (종료 후 회수되지 않은 좀비는 죽은 것으로 봄)"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != "Z"
+    except OSError:
+        return False
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc'), reason="/proc 필요")
+def test_kill_process_tree_kills_children():
+    # 셸(브라우저 역할)과 그 자식 프로세스(렌더러 역할)
+    parent = subprocess.Popen(["sh", "-c", "sleep 30 & wait"])
+    assert wait_until(lambda: len(process_tree_pids(parent.pid)) == 2)
+    child = process_tree_pids(parent.pid)[1]
+
+    kill_process_tree(parent.pid)
+    parent.wait(timeout=5)
+    assert wait_until(lambda: not alive(child))
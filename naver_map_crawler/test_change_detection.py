@@ -0,0 +1,76 @@
+"""
+변경 감지(SnapshotStore) 테스트
+"""
+from change_detection import (
+    SnapshotStore, select_rows,
+    CHANGE_NEW, CHANGE_CHANGED, CHANGE_CLOSED, CHANGE_UNCHANGED
+)
+
+
+def place(name, address="경기 용인시 처인구 금령로 20", rating="4.5", keyword="카페"):
+    return {"지역": "용인시 처인구", "키워드": keyword, "가게명": name, "주소": address,
+            "평점": rating, "전화번호": "031-123-4567", "카테고리": "카페"}
+
+
+def names(rows):
+    return sorted(row["가게명"] for row in rows)
+
+
+def test_first_run_is_all_new(tmp_path):
+    with SnapshotStore(str(tmp_path / "state.db")) as store:
+        delta = store.diff([place("가"), place("나")])
+    assert names(delta[CHANGE_NEW]) == ["가", "나"]
+    assert not delta[CHANGE_CHANGED] and not delta[CHANGE_CLOSED] and not delta[CHANGE_UNCHANGED]
+
+
+def test_new_changed_closed_unchanged(tmp_path):
+    with SnapshotStore(str(tmp_path / "state.db")) as store:
+        first = [place("가"), place("나"), place("다")]
+        store.commit(first)
+
+        second = [place("가"), place("나", rating="4.8"), place("라")]
+        delta = store.diff(second)
+
+    assert names(delta[CHANGE_UNCHANGED]) == ["가"]
+    assert names(delta[CHANGE_CHANGED]) == ["나"]
+    assert names(delta[CHANGE_NEW]) == ["라"]
+    assert names(delta[CHANGE_CLOSED]) == ["다"]
+
+
+def test_closed_only_within_crawled_scope(tmp_path):
+    with SnapshotStore(str(tmp_path / "state.db")) as store:
+        store.commit([place("가", keyword="카페"), place("나", keyword="음식점")])
+        # 이번 실행은 카페만 크롤링했으므로 음식점 장소는 폐업으로 보지 않음
+        delta = store.diff([place("가", keyword="카페")])
+    assert delta[CHANGE_CLOSED] == []
+
+
+def test_reappearing_place_is_changed(tmp_path):
+    with SnapshotStore(str(tmp_path / "state.db")) as store:
+        store.commit([place("가"), place("나")])
+        delta = store.diff([place("가")])
+        store.commit([place("가")], closed=delta[CHANGE_CLOSED])
+
+        # 누락 후 같은 내용으로 다시 나타나면 변경으로 판정
+        delta = store.diff([place("가"), place("나")])
+    assert names(delta[CHANGE_CHANGED]) == ["나"]
+    assert names(delta[CHANGE_UNCHANGED]) == ["가"]
+
+
+def test_duplicate_place_across_keywords_counted_once(tmp_path):
+    with SnapshotStore(str(tmp_path / "state.db")) as store:
+        delta = store.diff([place("가", keyword="카페"), place("가", keyword="음식점")])
+    assert len(delta[CHANGE_NEW]) == 1
+
+
+def test_select_rows_delta_mode_labels_rows(tmp_path):
+    with SnapshotStore(str(tmp_path / "state.db")) as store:
+        store.commit([place("가"), place("나")])
+        data = [place("가", rating="3.0"), place("다")]
+        delta = store.diff(data)
+
+    rows = select_rows(delta, data, "delta")
+    assert sorted((row["가게명"], row["변경_구분"]) for row in rows) == [
+        ("가", CHANGE_CHANGED), ("나", CHANGE_CLOSED), ("다", CHANGE_NEW)
+    ]
+    assert select_rows(delta, data, "full") is data
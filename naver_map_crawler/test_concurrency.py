@@ -0,0 +1,122 @@
+"""
+적응형 동시성(AdaptiveConcurrency) 테스트 - AIMD 증가/감소
+"""
+import asyncio
+
+import pytest
+
+from concurrency import AdaptiveConcurrency
+
+CONFIG = {
+    "min": 1, "max": 8, "increase_step": 1, "decrease_factor": 0.5,
+    "latency_p95_target": 10.0, "max_error_rate": 0.2, "max_block_rate": 0.1,
+    "min_samples": 4, "increase_interval": 0,
+}
+
+
+def controller(initial=4, **overrides):
+    return AdaptiveConcurrency(initial=initial, config=dict(CONFIG, **overrides))
+
+
+async def run_searches(control, results):
+    """results 순서대로 검색을 동시에 시작하고 슬롯을 가진 채로 기록"""
+    async def search(latency, error, blocked):
+        async with control.slot():
+            await asyncio.sleep(0)
+            control.record(latency, error=error, blocked=blocked)
+    await asyncio.gather(*(search(*result) for result in results))
+
+
+def test_additive_increase_when_saturated_and_healthy():
+    control = controller(initial=2)
+
+    async def scenario():
+        for _ in range(3):
+            await run_searches(control, [(1.0, False, False)] * 4)
+    asyncio.run(scenario())
+
+    assert control.target == 5
+    assert [entry["reason"] for entry in control.history][1:] == ["증가"] * 3
+
+
+def test_no_increase_without_saturation():
+    control = controller(initial=4)
+    for _ in range(8):
+        # 한 번에 1건만 실행해 한도를 다 쓰지 않음
+        control.in_flight = 1
+        control.record(1.0)
+        control.in_flight = 0
+    assert control.target == 4
+
+
+def test_increase_capped_at_maximum():
+    control = controller(initial=7, max=8)
+
+    async def scenario():
+        for _ in range(4):
+            await run_searches(control, [(1.0, False, False)] * 8)
+    asyncio.run(scenario())
+    assert control.target == 8
+
+
+@pytest.mark.parametrize("result", [
+    (30.0, False, False),  # p95 지연 초과
+    (1.0, True, False),    # 오류율 초과
+])
+def test_multiplicative_decrease(result):
+    control = controller(initial=8)
+    control.in_flight = 1
+    for _ in range(4):
+        control.record(*result)
+    assert control.target == 4
+    assert control.history[-1]["reason"].startswith("감소")
+
+
+def test_block_decreases_immediately():
+    control = controller(initial=8)
+    control.in_flight = 1
+    control.record(1.0, blocked=True)
+    assert control.target == 4
+    assert control.target >= control.minimum
+
+
+def test_decrease_ignores_only_other_in_flight_results():
+    control = controller(initial=8)
+    # 8건 실행 중, 그중 하나가 차단을 기록해 감소
+    control.in_flight = 8
+    control.record(1.0, blocked=True)
+    assert control.target == 4
+    # 나머지 7건은 감소 전에 시작했으므로 새 창에 넣지 않음
+    assert control._stale == 7
+
+    for _ in range(7):
+        control.record(30.0, error=True)
+    assert control.target == 4 and control.metrics()["samples"] == 0
+
+    # 감소 이후 시작한 검색은 바로 표본이 됨
+    control.record(1.0)
+    assert control.metrics()["samples"] == 1
+
+
+def test_decrease_floor_is_minimum():
+    control = controller(initial=1)
+    control.in_flight = 1
+    control.record(1.0, blocked=True)
+    assert control.target == 1
+
+
+def test_acquire_waits_for_target():
+    control = controller(initial=2)
+    order = []
+
+    async def search(name, hold):
+        async with control.slot():
+            order.append(("start", name, control.in_flight))
+            await asyncio.sleep(hold)
+
+    async def scenario():
+        await asyncio.gather(search("a", 0.02), search("b", 0.02), search("c", 0))
+    asyncio.run(scenario())
+
+    assert max(in_flight for _, _, in_flight in order) == 2
+    assert order[-1][1] == "c"
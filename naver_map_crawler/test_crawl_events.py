@@ -0,0 +1,141 @@
+"""
+스트리밍 API 테스트 - crawl_iter 이벤트 순서/개수, 조기 종료 시 이후 검색 중단
+"""
+import asyncio
+
+import pytest
+
+from config import ARCHIVE_CONFIG
+from crawl_events import RowEvent, ProgressEvent, event_to_dict
+
+QUERIES = [("처인구", "카페"), ("기흥구", "카페"), ("수지구", "카페")]
+# 쿼리별 결과 행 수 (None이면 재시도까지 실패)
+RESULTS = {"처인구": 2, "기흥구": None, "수지구": 1}
+
+
+def stub_result(location, keyword):
+    count = RESULTS[location]
+    if count is None:
+        return [], "프록시 연결 실패"
+    return [{"지역": location, "키워드": keyword, "가게명": f"{location}-{n}"} for n in range(count)], None
+
+
+def summarize(events):
+    return [(event.kind, event.index) + ((event.found, event.completed, event.error)
+                                         if isinstance(event, ProgressEvent) else ())
+            for event in events]
+
+
+EXPECTED = [
+    ("row", 0), ("row", 0), ("progress", 0, 2, 1, None),
+    ("progress", 1, 0, 2, "프록시 연결 실패"),
+    ("row", 2), ("progress", 2, 1, 3, None),
+]
+
+
+@pytest.fixture(autouse=True)
+def no_archive(monkeypatch):
+    monkeypatch.setitem(ARCHIVE_CONFIG, "enabled", False)
+
+
+@pytest.fixture
+def playwright_crawler(monkeypatch):
+    pytest.importorskip("playwright")
+    import crawler
+
+    async def no_delay(*args):
+        pass
+    monkeypatch.setattr(crawler, "random_delay", no_delay)
+    instance = crawler.OptimizedNaverCrawler()
+    instance.searched = []
+
+    async def search_with_retries(location, keyword):
+        instance.searched.append(location)
+        await asyncio.sleep(0)
+        return stub_result(location, keyword)
+    instance.search_with_retries = search_with_retries
+    return instance
+
+
+@pytest.fixture
+def selenium_crawler(monkeypatch):
+    pytest.importorskip("undetected_chromedriver")
+    pytest.importorskip("selenium")
+    import crawler_selenium
+
+    instance = crawler_selenium.UndetectedNaverCrawler()
+    instance.searched = []
+    instance.random_delay = lambda *args: None
+
+    def search_with_retries(location, keyword):
+        instance.searched.append(location)
+        return stub_result(location, keyword)
+    instance.search_with_retries = search_with_retries
+    return instance
+
+
+def test_playwright_events_order_and_counts(playwright_crawler):
+    async def collect():
+        return [event async for event in playwright_crawler.crawl_iter(QUERIES)]
+    events = asyncio.run(collect())
+
+    assert summarize(events) == EXPECTED
+    assert all(event.total == 3 for event in events if isinstance(event, ProgressEvent))
+    assert [event.row["가게명"] for event in events if isinstance(event, RowEvent)] == ["처인구-0", "처인구-1", "수지구-0"]
+
+
+def test_playwright_early_close_stops_searches(playwright_crawler):
+    async def first_query():
+        stream = playwright_crawler.crawl_iter(QUERIES)
+        events = []
+        async for event in stream:
+            events.append(event)
+            if isinstance(event, ProgressEvent):
+                break
+        await stream.aclose()
+        await asyncio.sleep(0.01)
+        return events
+    events = asyncio.run(first_query())
+
+    assert summarize(events) == EXPECTED[:3]
+    assert playwright_crawler.searched == ["처인구"]
+
+
+def test_playwright_cancelled_consumer_stops_searches(playwright_crawler):
+    async def cancel_mid_stream():
+        consumed = []
+
+        async def consume():
+            async for event in playwright_crawler.crawl_iter(QUERIES):
+                consumed.append(event)
+                await asyncio.sleep(10)  # 느린 소비자
+
+        task = asyncio.create_task(consume())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return consumed
+    consumed = asyncio.run(cancel_mid_stream())
+
+    assert len(consumed) == 1
+    assert playwright_crawler.searched == ["처인구"]
+
+
+def test_selenium_events_order_and_counts(selenium_crawler):
+    assert summarize(selenium_crawler.crawl_iter(QUERIES)) == EXPECTED
+    assert len(selenium_crawler.crawl_all_locations(QUERIES)) == 3
+
+
+def test_selenium_early_close_stops_searches(selenium_crawler):
+    stream = selenium_crawler.crawl_iter(QUERIES)
+    assert next(stream).kind == "row"
+    stream.close()
+    assert selenium_crawler.searched == ["처인구"]
+
+
+def test_event_to_dict():
+    row = RowEvent(0, "처인구", "카페", {"가게명": "가"})
+    progress = ProgressEvent(0, "처인구", "카페", found=1, completed=1, total=3, elapsed=0.5)
+    assert event_to_dict(row) == {"type": "row", "index": 0, "location": "처인구", "keyword": "카페",
+                                  "row": {"가게명": "가"}}
+    assert event_to_dict(progress)["type"] == "progress" and event_to_dict(progress)["error"] is None
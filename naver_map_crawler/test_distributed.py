@@ -0,0 +1,149 @@
+"""
+분산 크롤링 테스트 - SQLiteBroker 임대 만료/재임대 및 워커 실패 보고
+"""
+import asyncio
+import time
+
+import pytest
+
+from distributed import SQLiteBroker, DistributedWorker, PENDING, LEASED, DONE, FAILED
+
+CONFIG = {"lease_seconds": 0.2, "heartbeat_interval": 0.05, "max_attempts": 2,
+          "requests_per_minute": 60000, "poll_interval": 0.01}
+
+
+@pytest.fixture
+def broker(tmp_path):
+    broker = SQLiteBroker(str(tmp_path / "broker.db"), config=CONFIG)
+    yield broker
+    broker.close()
+
+
+def status(broker, run_id="run"):
+    return {key: count for key, count in broker.progress(run_id).items() if count and key != "total"}
+
+
+def test_enqueue_is_idempotent(broker):
+    assert broker.enqueue("run", [("용인시 처인구", "카페", ""), ("용인시 처인구", "카페", "역북동")]) == 2
+    assert broker.enqueue("run", [("용인시 처인구", "카페", "")]) == 0
+    assert status(broker) == {PENDING: 2}
+
+
+def test_expired_lease_is_released_to_another_worker(broker):
+    broker.enqueue("run", [("용인시 처인구", "카페", "")])
+
+    first = broker.lease("w1", "run")
+    assert first.attempts == 1
+    assert broker.lease("w2", "run") is None  # 임대 중인 작업은 다른 워커가 가져가지 못함
+
+    time.sleep(CONFIG["lease_seconds"] + 0.05)
+    second = broker.lease("w2", "run")
+    assert second.job_id == first.job_id and second.attempts == 2
+
+    # 임대를 잃은 워커의 하트비트/결과는 거부
+    assert not broker.heartbeat(first, "w1")
+    assert not broker.complete(first, "w1", [{"가게명": "가"}])
+
+    assert broker.heartbeat(second, "w2")
+    assert broker.complete(second, "w2", [{"가게명": "나"}])
+    assert status(broker) == {DONE: 1}
+    assert broker.results("run") == [{"가게명": "나"}]
+
+
+def test_heartbeat_keeps_lease(broker):
+    broker.enqueue("run", [("용인시 처인구", "카페", "")])
+    job = broker.lease("w1", "run")
+    for _ in range(3):
+        time.sleep(CONFIG["lease_seconds"] / 2)
+        assert broker.heartbeat(job, "w1")
+    assert broker.lease("w2", "run") is None
+
+
+def test_lease_expiry_counts_toward_max_attempts(broker):
+    broker.enqueue("run", [("용인시 처인구", "카페", "")])
+    for worker in ("w1", "w2"):
+        assert broker.lease(worker, "run") is not None
+        time.sleep(CONFIG["lease_seconds"] + 0.05)
+
+    assert broker.lease("w3", "run") is None
+    assert status(broker) == {FAILED: 1}
+
+
+def test_fail_requeues_until_max_attempts(broker):
+    broker.enqueue("run", [("용인시 처인구", "카페", "")])
+    broker.fail(broker.lease("w1", "run"), "w1", "검색 실패")
+    assert status(broker) == {PENDING: 1}
+    broker.fail(broker.lease("w1", "run"), "w1", "검색 실패")
+    assert status(broker) == {FAILED: 1}
+
+
+def test_worker_reports_search_failures(broker):
+    broker.enqueue("run", [("용인시 처인구", "카페", ""), ("용인시 기흥구", "카페", "")])
+    calls = []
+
+    async def search(location, keyword):
+        calls.append(location)
+        if location == "용인시 처인구":
+            raise RuntimeError("프록시 연결 실패")
+        return [{"지역": location, "키워드": keyword, "가게명": "가", "주소": ""}]
+
+    worker = DistributedWorker(broker, search, worker_id="w1", run_id="run", config=CONFIG)
+    asyncio.run(worker.run(exit_when_idle=True))
+
+    # 실패한 작업은 빈 결과로 완료되지 않고 max_attempts까지 재시도 후 실패 처리
+    assert calls.count("용인시 처인구") == CONFIG["max_attempts"]
+    assert status(broker) == {DONE: 1, FAILED: 1}
+    assert worker.stats == {"completed": 1, "failed": 2, "lost_leases": 0}
+    assert broker.completed_queries("run") == [("용인시 기흥구", "카페")]
+
+
+def test_worker_heartbeat_extends_lease_during_slow_search(broker):
+    broker.enqueue("run", [("용인시 처인구", "카페", "")])
+
+    async def slow_search(location, keyword):
+        await asyncio.sleep(CONFIG["lease_seconds"] * 2)
+        return []
+
+    worker = DistributedWorker(broker, slow_search, worker_id="w1", run_id="run", config=CONFIG)
+    asyncio.run(worker.run(exit_when_idle=True))
+    assert status(broker) == {DONE: 1}
+    assert worker.stats["lost_leases"] == 0
+
+
+def test_coordinator_broker_calls_run_off_the_event_loop(broker, monkeypatch):
+    import logging
+    import threading
+
+    import distributed
+
+    queries = [("용인시 처인구", "카페")]
+    saved = {}
+    monkeypatch.setattr(distributed, "setup_logging", lambda config: logging.getLogger("test_distributed"))
+    monkeypatch.setattr(distributed, "create_output_directory", lambda path: None)
+    monkeypatch.setattr(distributed, "plan_queries", lambda logger: (queries, None))
+    monkeypatch.setattr(distributed, "record_query_results", lambda *args: saved.setdefault("recorded", args[0]))
+    monkeypatch.setattr(distributed, "save_crawl_output", lambda data, logger: saved.setdefault("data", data))
+
+    loop_thread = threading.get_ident()
+    threads = {}
+    for name in ("enqueue", "progress", "results", "completed_queries"):
+        method = getattr(broker, name)
+
+        def record(*args, _name=name, _method=method):
+            threads.setdefault(_name, set()).add(threading.get_ident())
+            return _method(*args)
+        monkeypatch.setattr(broker, name, record)
+
+    # 코디네이터와 별도로 워커가 작업을 처리
+    def work():
+        while (job := broker.lease("w1", "run")) is None:
+            time.sleep(0.01)
+        broker.complete(job, "w1", [{"지역": job.location, "키워드": job.keyword, "가게명": "가", "주소": ""}])
+    worker = threading.Thread(target=work)
+    worker.start()
+    asyncio.run(distributed.coordinate(broker, "run", report_interval=0.01))
+    worker.join()
+
+    assert set(threads) == {"enqueue", "progress", "results", "completed_queries"}
+    assert all(loop_thread not in idents for idents in threads.values())
+    assert saved["recorded"] == queries and [row["가게명"] for row in saved["data"]] == ["가"]
@@ -0,0 +1,146 @@
+"""
+엔티티 통합 테스트 - 재실행 시 ID 유지, 병합/분리, geohash 셀 경계, 빈 셀(NaN)
+"""
+import random
+from collections import namedtuple
+
+import pytest
+
+from entity_resolution import EntityResolver, geohash_encode, geohash_neighbors, geohash_cell_size
+
+ADDRESS = "경기 용인시 처인구 김량장동 {}"
+Located = namedtuple("Located", "lat lng")
+
+# r1, r2는 서로 다른 장소로 판단되지만 r3(r1과 주소, r2와 전화번호가 같음)가 둘을 잇는다
+R1 = {"지역": "처인구", "가게명": "하늘정원카페", "주소": ADDRESS.format("100-1"), "전화번호": "031-111-2222"}
+R2 = {"지역": "처인구", "가게명": "하늘정원", "주소": ADDRESS.format("200-3"), "전화번호": "031-333-4444"}
+R3 = {"지역": "처인구", "가게명": "하늘정원카페", "주소": ADDRESS.format("100-1"), "전화번호": "031-333-4444"}
+OTHER = {"지역": "처인구", "가게명": "바다분식", "주소": ADDRESS.format("300"), "전화번호": "031-555-6666"}
+
+
+class FakeGeocoder:
+    """주소 -> 좌표 고정 매핑"""
+
+    def __init__(self, points):
+        self.points = points
+
+    def geocode(self, address):
+        point = self.points.get(address)
+        return Located(*point) if point else None
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "entities.db")
+
+
+def resolve(db_path, rows, geocoder=None):
+    with EntityResolver(db_path, geocoder=geocoder) as resolver:
+        return resolver.resolve(rows)
+
+
+def test_entity_ids_stable_across_reruns(db_path):
+    variant = dict(R1, 가게명="하늘정원카페 본점", 전화번호="0311112222")
+    first = resolve(db_path, [R1, OTHER, variant])
+    assert first[0] == first[2] != first[1]
+
+    # 순서가 바뀌고 새 레코드가 추가되어도 기존 ID 유지
+    rows = [OTHER, variant, R1, {"가게명": "새로운식당", "주소": ADDRESS.format("400")}]
+    second = resolve(db_path, rows)
+    assert second[:3] == [first[1], first[0], first[0]]
+    assert second[3] not in first
+
+
+def test_merge_keeps_old_ids_as_aliases(db_path):
+    first = resolve(db_path, [R1, R2])
+    assert first[0] != first[1]
+
+    second = resolve(db_path, [R1, R2, R3])
+    assert len(set(second)) == 1
+    kept = second[0]
+    assert kept in first
+    merged = next(entity_id for entity_id in first if entity_id != kept)
+
+    with EntityResolver(db_path) as resolver:
+        assert resolver.resolve_alias(merged) == kept
+        assert resolver.resolve_alias(kept) == kept
+
+
+def test_split_gives_smaller_cluster_new_id(db_path):
+    merged = resolve(db_path, [R1, R2, R3])
+    assert len(set(merged)) == 1
+
+    # 잇는 레코드가 사라지면 큰 군집(R1 x2)이 기존 ID를 유지하고 R2는 새 ID
+    split = resolve(db_path, [R1, R1, R2])
+    assert split[0] == split[1] == merged[0]
+    assert split[2] != merged[0]
+
+    with EntityResolver(db_path) as resolver:
+        # 분리된 쪽은 별칭이 아니라 독립된 엔티티
+        assert resolver.resolve_alias(split[2]) == split[2]
+        count, = resolver.conn.execute("SELECT COUNT(*) FROM entities WHERE entity_id IN (?, ?)",
+                                       (split[0], split[2])).fetchone()
+        assert count == 2
+
+
+def cell_edges(lat, lng, precision):
+    """(lat, lng) 근처의 셀 경계 위도/경도"""
+    dlat, dlng = geohash_cell_size(precision)
+    return -90 + round((lat + 90) / dlat) * dlat, -180 + round((lng + 180) / dlng) * dlng
+
+
+@pytest.mark.parametrize("offset", [(0, 1), (1, 0), (1, 1)])  # 경도 경계, 위도 경계, 모서리(대각선)
+def test_geohash_neighbors_cover_cell_edges(offset):
+    precision = 6
+    edge_lat, edge_lng = cell_edges(37.2340, 127.2010, precision)
+    epsilon = 1e-6
+    inside = (edge_lat - epsilon * offset[0], edge_lng - epsilon * offset[1])
+    across = (edge_lat + epsilon * offset[0], edge_lng + epsilon * offset[1])
+
+    assert geohash_encode(*inside, precision) != geohash_encode(*across, precision)
+    neighbors = geohash_neighbors(*inside, precision)
+    assert len(neighbors) == 9
+    assert geohash_encode(*across, precision) in neighbors
+
+
+def test_records_across_geohash_edge_are_merged(db_path):
+    precision = 6
+    edge_lat, edge_lng = cell_edges(37.2340, 127.2010, precision)
+    # 셀 경계를 사이에 두고 몇 미터 떨어진 같은 가게 (주소 표기만 다름, 후보는 인접 셀 블록에서만 나옴)
+    west = {"가게명": "하늘정원카페", "주소": "경기 용인시 처인구 금령로 10"}
+    east = {"가게명": "하늘정원카페", "주소": "경기 용인시 처인구 김량장동 100-1"}
+    geocoder = FakeGeocoder({west["주소"]: (edge_lat + 1e-5, edge_lng - 2e-5),
+                             east["주소"]: (edge_lat + 1e-5, edge_lng + 2e-5)})
+    assert geohash_encode(*geocoder.points[west["주소"]], precision) != \
+        geohash_encode(*geocoder.points[east["주소"]], precision)
+
+    ids = resolve(db_path, [west, east], geocoder)
+    assert ids[0] == ids[1]
+
+
+def test_nan_fields_are_blank(db_path):
+    nan = float("nan")
+    rows = [
+        {"지역": "처인구", "가게명": "하늘정원카페", "주소": nan, "전화번호": nan, "카테고리": nan},
+        {"지역": "처인구", "가게명": "하늘정원카페", "주소": None, "전화번호": "", "카테고리": "카페"},
+        # 빈 전화번호/주소('nan')끼리 같은 값으로 묶이면 안 됨
+        {"지역": "처인구", "가게명": "바다분식", "주소": nan, "전화번호": nan, "카테고리": nan},
+    ]
+    ids = resolve(db_path, rows)
+    assert ids[0] == ids[1] != ids[2]
+
+    with EntityResolver(db_path) as resolver:
+        entities = {entity_id: fields for entity_id, *fields in
+                    resolver.conn.execute("SELECT entity_id, name, address, phone, category FROM entities")}
+    assert entities[ids[0]] == ["하늘정원카페", None, None, "카페"]
+    assert entities[ids[2]] == ["바다분식", None, None, None]
+
+
+def test_shuffled_input_gives_same_entities(db_path, tmp_path):
+    rows = [R1, R2, R3, OTHER, dict(OTHER, 전화번호="")]
+    ids = resolve(db_path, rows)
+
+    shuffled = list(range(len(rows)))
+    random.Random(1).shuffle(shuffled)
+    other_ids = resolve(str(tmp_path / "other.db"), [rows[i] for i in shuffled])
+    assert {i: other_ids[n] for n, i in enumerate(shuffled)} == dict(enumerate(ids))
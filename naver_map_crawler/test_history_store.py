@@ -0,0 +1,69 @@
+"""
+크롤링 이력 저장소 테스트 - 파티션 압축(compact)
+"""
+import os
+from datetime import datetime
+
+from history_store import HistoryStore
+
+
+def rows(names, location="용인시 처인구", keyword="카페", rating="4.5"):
+    return [{"지역": location, "키워드": keyword, "가게명": name, "주소": f"경기 {location} 금령로 {i}",
+             "평점": rating, "전화번호": "031-123-4567", "카테고리": "카페"} for i, name in enumerate(names)]
+
+
+def files_on_disk(root):
+    return sorted(
+        os.path.relpath(os.path.join(directory, name), root)
+        for directory, _, names in os.walk(root) for name in names if name.endswith(".parquet")
+    )
+
+
+def test_compact_merges_partition_files(tmp_path):
+    root = str(tmp_path / "history")
+    with HistoryStore(root) as store:
+        for day in (1, 2, 3):
+            store.append(rows(["가", "나"], rating=f"4.{day}"), crawled_at=datetime(2025, 9, day, 12))
+        store.append(rows(["다"], keyword="음식점"), crawled_at=datetime(2025, 9, 1, 12))
+        before = store.query().sort_values(["run_id", "place_id"]).reset_index(drop=True)
+        snapshot_before = store.snapshot(datetime(2025, 9, 2, 13))
+
+        assert store.compact(min_files=2) == {"partitions": 1, "merged_files": 3}
+
+        # 카페 파티션은 파일 1개, 음식점 파티션(파일 1개)은 그대로
+        files = files_on_disk(root)
+        assert len(files) == 2
+        assert sum("compacted-" in file for file in files) == 1
+        manifest_files = {file for file, in store.conn.execute("SELECT file FROM segments")}
+        assert manifest_files == set(files)
+
+        after = store.query().sort_values(["run_id", "place_id"]).reset_index(drop=True)
+        assert after.equals(before)
+        assert store.snapshot(datetime(2025, 9, 2, 13)).equals(snapshot_before)
+        assert store.compact(min_files=2) == {"partitions": 0, "merged_files": 0}
+
+
+def test_compact_keeps_runs_appended_during_merge(tmp_path):
+    root = str(tmp_path / "history")
+    with HistoryStore(root) as store:
+        for day in (1, 2):
+            store.append(rows(["가"]), crawled_at=datetime(2025, 9, day, 12))
+
+        # 병합 파일을 쓴 직후, 매니페스트 갱신 전에 같은 파티션으로 새 실행이 들어온 상황
+        write = store._write
+        late = {}
+
+        def write_then_append(table, relative):
+            write(table, relative)
+            if "compacted-" in relative and not late:
+                late["run_id"] = store.append(rows(["라"]), crawled_at=datetime(2025, 9, 3, 12))
+
+        store._write = write_then_append
+        store.compact(min_files=2)
+
+        late_file = store.conn.execute(
+            "SELECT file FROM segments WHERE run_id = ?", (late["run_id"],)
+        ).fetchone()[0]
+        assert "compacted-" not in late_file
+        assert os.path.exists(os.path.join(root, late_file))
+        assert sorted(store.query()["가게명"]) == ["가", "가", "라"]
@@ -0,0 +1,141 @@
+"""
+원본 페이지 아카이브 테스트 - 저장/조회/중복 제거, 정리(prune), 재추출
+"""
+import os
+
+import pytest
+
+import page_archive
+from config import EXTRACT_SELECTORS
+from page_archive import PageArchive
+
+
+def page(names):
+    items = "".join(
+        f'<li class="place_bluelink"><span class="TYaxT">{name}</span><span class="LDgIH">경기 용인시 {name}로 1</span>'
+        f'<div class="PXMot"><span class="place_score"><em class="average">4.{i}</em></span>'
+        f'<span class="h69bs">리뷰 1,2{i}4</span></div><span class="dry01">031-123-456{i}</span>'
+        f'<span class="KCMnt">카페</span></li>'
+        for i, name in enumerate(names)
+    )
+    return f"<html><body><ul>{items}</ul></body></html>"
+
+
+@pytest.fixture
+def archive(tmp_path):
+    with PageArchive(str(tmp_path / "archive")) as archive:
+        yield archive
+
+
+def set_fetched_at(archive, digest, fetched_at):
+    archive.conn.execute("UPDATE pages SET fetched_at = ? WHERE digest = ?", (fetched_at, digest))
+
+
+def test_put_get_and_dedup(archive):
+    html = page(["가", "나"])
+    first = archive.put(html, "처인구", "카페", "https://map.naver.com/a")
+    second = archive.put(html, "처인구", "카페", "https://map.naver.com/b")
+    other = archive.put(page(["다"]), "기흥구", "카페")
+
+    assert first == second != other
+    assert archive.get(first) == html
+    assert archive.stats()["pages"] == 3 and archive.stats()["objects"] == 2
+    assert archive.stats()["stored_bytes"] < archive.stats()["raw_bytes"]
+    assert [entry["url"] for entry in archive.query("처인구", "카페")] == ["https://map.naver.com/a",
+                                                                         "https://map.naver.com/b"]
+    assert [entry["location"] for entry in archive.query(keyword="카페")] == ["처인구", "처인구", "기흥구"]
+
+
+def test_prune_by_retention_keeps_referenced_objects(archive):
+    old = archive.put(page(["가"]), "처인구", "카페")
+    shared = archive.put(page(["나"]), "처인구", "카페")
+    set_fetched_at(archive, old, "2000-01-01 00:00:00")
+    set_fetched_at(archive, shared, "2000-01-01 00:00:00")
+    # 오래된 기록이 지워져도 최근에 다시 저장된 같은 내용의 객체는 남김
+    archive.put(page(["나"]), "처인구", "카페")
+
+    assert archive.prune(retention_days=30, max_size_mb=0) == 1
+    assert not os.path.exists(archive.object_path(old))
+    assert archive.get(shared) == page(["나"])
+    assert archive.stats()["pages"] == 1
+
+
+def test_prune_by_size_drops_oldest_objects(archive):
+    digests = [archive.put(page([f"장소{i}"] * 50), "처인구", "카페") for i in range(3)]
+    for i, digest in enumerate(digests):
+        set_fetched_at(archive, digest, f"2025-09-0{i + 1} 00:00:00")
+    stored = os.path.getsize(archive.object_path(digests[0]))
+
+    # 최신 객체 2개만 남을 용량
+    assert archive.prune(retention_days=0, max_size_mb=stored * 2.5 / (1024 * 1024)) == 1
+    assert [os.path.exists(archive.object_path(digest)) for digest in digests] == [False, True, True]
+
+
+def test_prune_deletes_objects_inside_index_transaction(archive, monkeypatch):
+    digest = archive.put(page(["가"]), "처인구", "카페")
+    set_fetched_at(archive, digest, "2000-01-01 00:00:00")
+
+    removed = []
+    remove = os.remove
+
+    def checked_remove(path):
+        # 쓰기 잠금을 쥔 채로 삭제해야 다른 프로세스의 put()과 엇갈리지 않음
+        assert archive.conn.in_transaction
+        removed.append(path)
+        remove(path)
+    monkeypatch.setattr(page_archive.os, "remove", checked_remove)
+
+    assert archive.prune(retention_days=30, max_size_mb=0) == 1
+    assert removed == [archive.object_path(digest)]
+    assert not archive.conn.in_transaction
+
+
+def test_concurrent_put_waits_for_prune(tmp_path):
+    root = str(tmp_path / "archive")
+    with PageArchive(root) as pruner, PageArchive(root) as writer:
+        digest = pruner.put(page(["가"]), "처인구", "카페")
+        set_fetched_at(pruner, digest, "2000-01-01 00:00:00")
+
+        writer.conn.execute("PRAGMA busy_timeout = 0")
+        with pruner._locked():
+            # 정리 트랜잭션 중에는 다른 연결이 같은 객체를 저장(참조 추가)할 수 없음
+            with pytest.raises(Exception, match="locked"):
+                writer.put(page(["가"]), "처인구", "카페")
+
+        pruner.prune(retention_days=30, max_size_mb=0)
+        writer.put(page(["가"]), "처인구", "카페")
+        assert writer.get(digest) == page(["가"])
+
+
+def test_close_does_not_prune(tmp_path, monkeypatch):
+    root = str(tmp_path / "archive")
+    monkeypatch.setitem(page_archive.ARCHIVE_CONFIG, "retention_days", 1)
+    with PageArchive(root) as archive:
+        digest = archive.put(page(["가"]), "처인구", "카페")
+        set_fetched_at(archive, digest, "2000-01-01 00:00:00")
+    assert os.path.exists(page_archive.object_path(root, digest))
+
+
+def test_reextract_uses_archived_pages(tmp_path):
+    pytest.importorskip("selectolax")
+    from reextract import extract_from_html, reextract
+
+    rows = extract_from_html(page(["가", "나"]), "처인구", "카페")
+    assert [(row["가게명"], row["평점"], row["리뷰수"], row["카테고리"]) for row in rows] == [
+        ("가", "4.0", 1204, "카페"), ("나", "4.1", 1214, "카페")]
+
+    # 셀렉터를 바꾸면 같은 HTML에서 다른 필드를 읽음
+    selectors = dict(EXTRACT_SELECTORS, name=".LDgIH")
+    assert extract_from_html(page(["가"]), "처인구", "카페", selectors)[0]["가게명"] == "경기 용인시 가로 1"
+
+    root = str(tmp_path / "archive")
+    with PageArchive(root) as archive:
+        archive.put(page(["가"]), "처인구", "카페")
+        archive.put(page(["다", "라"]), "기흥구", "카페")
+        fetched_at = archive.query()[0]["fetched_at"]
+
+    data = reextract(root, location="기흥구", workers=1)
+    assert [row["가게명"] for row in data] == ["다", "라"]
+    assert reextract(root, workers=2)[0]["크롤링_시간"] == fetched_at
+    assert reextract(root, location="수지구") == []
+
@@ -0,0 +1,61 @@
+"""
+장소 검색(query_places) 테스트 - 조인/EXISTS 실행 계획이 같은 결과를 내는지 확인
+"""
+import pytest
+
+from bench_place_index import populate
+from config import PLACE_QUERY_CONFIG
+from place_index import connect, build_indexes, query_places
+
+CITY_BBOX = (37.15, 127.05, 37.35, 127.30)
+
+
+@pytest.fixture(scope="module")
+def conn(tmp_path_factory):
+    db_path = str(tmp_path_factory.mktemp("places") / "places.db")
+    populate(db_path, 3000)
+    conn = connect(db_path)
+    build_indexes(conn)
+    yield conn
+    conn.close()
+
+
+def naive(conn, text=None, bbox=None, category=None):
+    """인덱스 없이 전체를 훑는 기준 결과"""
+    rows = conn.execute("SELECT * FROM places ORDER BY created_at DESC, id DESC").fetchall()
+    result = []
+    for row in rows:
+        if text and text not in row["name"] and text not in (row["address"] or ""):
+            continue
+        if bbox:
+            min_lat, min_lng, max_lat, max_lng = bbox
+            if not (min_lat <= row["lat"] <= max_lat and min_lng <= row["lng"] <= max_lng):
+                continue
+        if category and row["category"] != category:
+            continue
+        result.append(row["id"])
+    return result
+
+
+def all_pages(conn, **filters):
+    ids, cursor = [], None
+    while True:
+        page = query_places(conn, limit=100, cursor=cursor, **filters)
+        ids.extend(place["id"] for place in page["places"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return ids
+
+
+@pytest.mark.parametrize("probe_limit", [1, 10**9])
+@pytest.mark.parametrize("filters", [
+    {"text": "용인시 기흥구"},
+    {"text": "점 1234"},
+    {"bbox": CITY_BBOX},
+    {"bbox": (37.25, 127.15, 37.27, 127.17)},
+    {"text": "스타벅스", "bbox": (37.2, 127.1, 37.3, 127.2), "category": "카페"},
+])
+def test_plans_match_naive_scan(conn, monkeypatch, probe_limit, filters):
+    # probe_limit=1이면 항상 EXISTS, 아주 크면 항상 조인
+    monkeypatch.setitem(PLACE_QUERY_CONFIG, "probe_limit", probe_limit)
+    assert all_pages(conn, **filters) == naive(conn, **filters)
@@ -0,0 +1,81 @@
+"""
+프록시 풀 테스트 - 로컬 대체 프록시(LocalProxyServer)로 격리/해제 확인
+"""
+import asyncio
+import time
+
+from config import PROXY_CONFIG
+from proxy_pool import Proxy, ProxyPool, LocalProxyServer
+
+
+async def start_upstream() -> asyncio.AbstractServer:
+    """항상 200을 돌려주는 업스트림 HTTP 서버"""
+    async def handle(reader, writer):
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        writer.write(b"HTTP/1.0 200 OK\r\nContent-Length: 2\r\n\r\nok")
+        await writer.drain()
+        writer.close()
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+async def fetch_status(proxy: Proxy, port: int) -> int:
+    """프록시를 거쳐 업스트림에 GET 요청을 보내고 상태 코드 반환"""
+    host, proxy_port = proxy.server.rsplit("//", 1)[1].split(":")
+    reader, writer = await asyncio.open_connection(host, int(proxy_port))
+    writer.write(f"GET http://127.0.0.1:{port}/ HTTP/1.0\r\nHost: 127.0.0.1\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+    status_line = await reader.readline()
+    writer.close()
+    return int(status_line.split()[1])
+
+
+async def request(pool: ProxyPool, proxy: Proxy, port: int) -> int:
+    start = time.monotonic()
+    status = await fetch_status(proxy, port)
+    pool.record(proxy, time.monotonic() - start, error=status != 200)
+    return status
+
+
+def test_failing_proxy_is_quarantined_and_released(monkeypatch):
+    monkeypatch.setitem(PROXY_CONFIG, "min_samples", 3)
+    monkeypatch.setitem(PROXY_CONFIG, "quarantine_seconds", 0.2)
+
+    async def scenario():
+        upstream = await start_upstream()
+        port = upstream.sockets[0].getsockname()[1]
+        async with LocalProxyServer(failure_rate=1.0) as bad_server, LocalProxyServer() as good_server:
+            bad = Proxy(bad_server.url, requests_per_minute=6000)
+            good = Proxy(good_server.url, requests_per_minute=6000)
+            pool = ProxyPool([bad, good])
+
+            assert await request(pool, good, port) == 200
+            while not bad.is_quarantined():
+                assert await request(pool, bad, port) == 502
+            assert bad.requests >= PROXY_CONFIG["min_samples"]
+            assert bad_server.connections == bad.requests
+
+            # 격리 중에는 건강한 프록시만 배정
+            for _ in range(5):
+                assert await pool.acquire() is good
+
+            # 격리 해제 시 오류율은 절반만 유지하고 지연 평가는 초기화
+            bad.latency_ewma = 30.0
+            error_rate = bad.error_ewma
+            await asyncio.sleep(PROXY_CONFIG["quarantine_seconds"])
+            await pool.acquire()
+            assert not bad.is_quarantined()
+            assert bad.latency_ewma is None
+            assert bad.error_ewma == error_rate / 2
+            assert bad.stats()["quarantine_count"] == 1
+
+        upstream.close()
+        await upstream.wait_closed()
+
+    asyncio.run(scenario())
+
+
+def test_chrome_argument_without_port():
+    assert Proxy("http://127.0.0.1:8899").chrome_argument() == "--proxy-server=http://127.0.0.1:8899"
+    assert Proxy("socks5://proxy.example.com").chrome_argument() == "--proxy-server=socks5://proxy.example.com"
+    assert Proxy("http://user:pw@proxy.example.com").chrome_argument() == "--proxy-server=http://proxy.example.com"
@@ -0,0 +1,96 @@
+"""
+쿼리 계획기 테스트 - 탐욕적 커버리지 순서, 0건 쿼리 제외, 재확인 비율, 예산
+"""
+import pytest
+
+from config import PLANNER_CONFIG
+from change_detection import make_place_id
+from query_planner import QueryHistory, QueryPlanner
+
+A, B, C, Z, U = ("처인구", "카페"), ("처인구", "커피"), ("기흥구", "카페"), ("처인구", "찻집"), ("수지구", "카페")
+
+
+@pytest.fixture(autouse=True)
+def planner_config(monkeypatch):
+    monkeypatch.setitem(PLANNER_CONFIG, "min_marginal_yield", 1)
+    monkeypatch.setitem(PLANNER_CONFIG, "unknown_query_yield", 20)
+    monkeypatch.setitem(PLANNER_CONFIG, "explore_share", 0)
+    monkeypatch.setitem(PLANNER_CONFIG, "history_days", 90)
+
+
+@pytest.fixture
+def history(tmp_path):
+    with QueryHistory(str(tmp_path / "state.db")) as history:
+        yield history
+
+
+def rows(query, numbers):
+    return [{"지역": query[0], "키워드": query[1], "가게명": f"장소{n}", "주소": f"주소 {n}"} for n in numbers]
+
+
+def record_sample(history):
+    """A: 장소 1~10, B: 1~8 (A에 포함), C: 11~13, Z: 실행했지만 0건"""
+    history.record([A, B, C, Z], rows(A, range(1, 11)) + rows(B, range(1, 9)) + rows(C, range(11, 14)))
+
+
+def test_greedy_order_and_redundant_query_skipped(history):
+    record_sample(history)
+    plan = QueryPlanner(history, [B, C, A]).plan()
+
+    # A: 10 + 신규 10, C: 3 + 3, B는 A를 고른 뒤 남는 장소가 없음
+    assert plan.queries == [A, C]
+    assert plan.expected_new == {A: 20.0, C: 6.0}
+    assert plan.skipped == {B: "한계 수확 낮음"}
+    assert plan.known_places == 13 and plan.expected_coverage() == 1.0
+    assert [(first, second) for first, second, _ in plan.redundant_pairs] == [(B, A)]
+
+
+def test_zero_result_query_is_known_and_skipped(history, monkeypatch):
+    record_sample(history)
+    monkeypatch.setitem(PLANNER_CONFIG, "unknown_query_yield", 25)
+    plan = QueryPlanner(history, [Z, A, U]).plan()
+
+    # 이력이 없는 쿼리만 탐색 수확을 받고, 실행했지만 0건인 쿼리는 제외
+    assert plan.queries == [U, A]
+    assert plan.expected_new[U] == PLANNER_CONFIG["unknown_query_yield"]
+    assert plan.skipped == {Z: "한계 수확 낮음"}
+
+
+def test_budget_cutoff(history):
+    record_sample(history)
+    plan = QueryPlanner(history, [A, B, C]).plan(budget=1)
+    assert plan.queries == [A]
+    assert plan.skipped == {B: "예산 초과", C: "예산 초과"}
+
+
+def test_exploration_reruns_oldest_skipped_share(history, monkeypatch):
+    record_sample(history)
+    history.record([Z], [])  # Z의 마지막 실행이 B보다 최근
+    with history.conn:
+        history.conn.execute("UPDATE query_runs SET run_at = '2025-01-01 00:00:00' WHERE keyword = '커피'")
+
+    monkeypatch.setitem(PLANNER_CONFIG, "explore_share", 0.5)
+    plan = QueryPlanner(history, [A, B, C, Z]).plan()
+
+    assert plan.explored == [B]
+    assert plan.queries == [A, C, B]
+    assert plan.skipped == {Z: "한계 수확 낮음"}
+    assert plan.expected_new[B] == 0.0
+
+
+def test_actual_coverage_uses_plan_universe(history):
+    record_sample(history)
+    plan = QueryPlanner(history, [A, C]).plan()
+    found = {make_place_id(row) for row in rows(A, range(1, 11))}
+    # 후보 쿼리의 장소 13개 중 10개
+    assert plan.actual_coverage(found | {"다른 쿼리 장소"}) == pytest.approx(10 / 13)
+
+
+def test_prune_drops_stale_history(history):
+    record_sample(history)
+    with history.conn:
+        history.conn.execute("UPDATE query_places SET last_seen = '2000-01-01 00:00:00' WHERE keyword = '커피'")
+        history.conn.execute("UPDATE query_runs SET run_at = '2000-01-01 00:00:00' WHERE keyword = '커피'")
+    history.prune()
+    assert B not in history.place_sets() and B not in history.novelty()
+    assert A in history.place_sets()
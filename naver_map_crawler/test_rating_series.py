@@ -0,0 +1,144 @@
+"""
+평점/리뷰 수 시계열 테스트 - 컬럼 인코딩 왕복, 빈 셀 처리, 변경분 기록과 기간/시점 조회
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from change_detection import make_place_id
+from rating_series import (
+    encode_column, decode_column, observations, to_epoch, MISSING, RatingSeriesStore
+)
+
+
+@pytest.mark.parametrize("values", [
+    [],
+    [7],
+    [452, 452, 452, 460, 460, MISSING, 455],
+    list(range(0, 3000, 3)),                          # 일정한 간격 -> 런 1개
+    [1_700_000_000 + 86400 * i for i in range(500)],  # 시각 컬럼
+    [-(2 ** 40), 2 ** 40, 0, -1],                     # 큰 폭의 델타
+])
+def test_encode_decode_round_trip(values):
+    decoded = decode_column(encode_column(values))
+    assert decoded.dtype == np.int64
+    assert decoded.tolist() == values
+
+
+def test_encode_random_round_trip():
+    rng = np.random.default_rng(0)
+    values = np.cumsum(rng.integers(-3, 4, size=10_000) * rng.integers(0, 2, size=10_000))
+    assert np.array_equal(decode_column(encode_column(values)), values)
+
+
+def test_constant_steps_compress_to_single_run():
+    assert len(encode_column(range(0, 100_000, 5))) < 32
+
+
+def test_observations_treat_nan_as_missing():
+    observed_at = datetime(2025, 9, 1, 12)
+    rows = [
+        # 엑셀에서 읽은 빈 셀은 NaN
+        {"지역": "용인시 처인구", "가게명": "가", "주소": float("nan"), "평점": float("nan"),
+         "리뷰수": float("nan"), "크롤링_시간": float("nan"), "장소_ID": float("nan")},
+        {"지역": float("nan"), "가게명": "가", "주소": None, "평점": "4.5",
+         "리뷰수": 12.0, "크롤링_시간": "2025-09-01 10:00:00", "장소_ID": None},
+    ]
+    merged = observations(rows, observed_at)
+    place_id = make_place_id({"가게명": "가", "주소": ""})
+    assert list(merged) == [place_id]
+    assert merged[place_id] == ("", "가", "", to_epoch(observed_at), 450, 12)
+
+    # 크롤링_시간이 비어 있으면 실행 시각 사용
+    merged = observations(rows[:1])
+    assert merged[place_id][3] > to_epoch("2025-01-01")
+    assert merged[place_id][4:] == (MISSING, MISSING)
+
+
+def test_to_epoch_rejects_missing_time():
+    with pytest.raises(ValueError):
+        to_epoch(float("nan"))
+
+
+def row(name, rating, reviews, area="용인시 처인구", **extra):
+    return dict({"지역": area, "키워드": "카페", "가게명": name, "주소": f"경기 {area} {name}로 1",
+                 "평점": rating, "리뷰수": reviews}, **extra)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with RatingSeriesStore(str(tmp_path / "series.db"), config={"chunk_points": 2}) as store:
+        yield store
+
+
+def test_record_writes_only_changes(store):
+    day = lambda d: datetime(2025, 9, d, 12)
+    assert store.record([row("가", "4.5", "10"), row("나", "4.0", "5")], day(1)) == \
+        {"observed": 2, "new": 2, "changed": 0, "stale": 0}
+    assert store.record([row("가", "4.5", "10"), row("나", "4.0", "5")], day(2))["changed"] == 0
+    assert store.stats()["points"] == 2
+
+    # 리뷰 수만 바뀜, 평점이 빈 셀이면 이전 값 유지
+    assert store.record([row("가", "4.5", "12"), row("나", None, "5")], day(3))["changed"] == 1
+    # 더 오래된 관측은 무시
+    assert store.record([row("가", "3.0", "1")], day(2))["stale"] == 1
+
+    places = store.places().set_index("name")
+    assert places.loc["가", "changes"] == 2 and places.loc["가", "reviews"] == 12
+    assert places.loc["나", "rating"] == 4.0 and places.loc["나", "last_seen"] == pd.Timestamp(day(3))
+    assert store.stats()["points"] == 3
+
+
+def test_entity_id_column_does_not_change_series_key(store):
+    plain = row("가", "4.5", "10")
+    store.record([plain], datetime(2025, 9, 1))
+    store.record([dict(plain, 장소_ID="E0123456789abcde", 리뷰수="11")], datetime(2025, 9, 2))
+    assert store.places()["place_id"].tolist() == [make_place_id(plain)]
+    assert store.stats()["points"] == 2
+
+
+@pytest.fixture
+def history(store):
+    """가: 9/1 4.5(10) -> 9/5 4.6(11) -> 9/10 4.7(12) (청크 2개), 나: 9/1 4.0(5)"""
+    at = lambda d: datetime(2025, 9, d, 12)
+    store.record([row("가", "4.5", "10"), row("나", "4.0", "5")], at(1))
+    store.record([row("가", "4.6", "11"), row("나", "4.0", "5")], at(5))
+    store.record([row("가", "4.7", "12")], at(10))
+    store.record([row("다", "3.0", "1", area="용인시 기흥구")], at(1))
+    return store
+
+
+def test_place_history_windows(history):
+    def ratings(**window):
+        df = history.place_history("가", **window)
+        return list(zip(df["time"].dt.day, df["rating"]))
+
+    assert ratings() == [(1, 4.5), (5, 4.6), (10, 4.7)]
+    # 첫 행은 since 시점의 값
+    assert ratings(since="2025-09-03", until="2025-09-08") == [(1, 4.5), (5, 4.6)]
+    assert ratings(since="2025-09-06") == [(5, 4.6), (10, 4.7)]
+    # since에 바로 변경이 있으면 그 이전 값은 포함하지 않음
+    assert ratings(since="2025-09-05 12:00:00") == [(5, 4.6), (10, 4.7)]
+    assert ratings(until="2025-09-04") == [(1, 4.5)]
+    assert ratings(since="2025-08-01", until="2025-08-31") == []
+
+
+def test_values_at(history):
+    def values(as_of, area=None):
+        df = history.values_at(as_of, area)
+        return dict(zip(df["name"], df["rating"]))
+
+    assert values("2025-09-01 11:00:00") == {}
+    assert values("2025-09-05 12:00:00", "처인구") == {"가": 4.6, "나": 4.0}
+    assert values("2025-09-09") == {"가": 4.6, "나": 4.0, "다": 3.0}
+    assert values("2025-10-01", "처인구") == {"가": 4.7, "나": 4.0}
+
+
+def test_trend_periods(history):
+    trend = history.trend("처인구", since="2025-09-01", until="2025-09-15", freq="W")
+    assert [time.day for time in trend.index] == [7, 14, 15]
+    assert trend["mean_rating"].round(3).tolist() == [4.3, 4.35, 4.35]
+    assert trend["total_reviews"].tolist() == [16, 17, 17]
+    assert trend["changed_places"].tolist() == [2, 1, 0]
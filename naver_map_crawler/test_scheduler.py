@@ -0,0 +1,153 @@
+"""
+스케줄러 테스트 - 레인 우선순위(디스패치 시점), 점수/마감 순서, 마감 초과 폐기, 일괄 결과 유휴 시 저장
+"""
+import asyncio
+import logging
+import time
+
+import pytest
+
+import scheduler as scheduler_module
+from concurrency import AdaptiveConcurrency
+from rate_limiter import AsyncTokenBucket
+from scheduler import BATCH, INTERACTIVE, BatchSink, CrawlJob, CrawlScheduler
+
+
+class GatedRunner:
+    """작업 시작 순서를 기록하고, 열어 준 작업만 끝내는 실행기"""
+
+    def __init__(self, gated=()):
+        self.gated = {location: asyncio.Event() for location in gated}
+        self.started = []
+        self.finished = []
+        self.cancelled = []
+
+    async def __call__(self, job):
+        self.started.append(job.location)
+        try:
+            if job.location in self.gated:
+                await self.gated[job.location].wait()
+        except asyncio.CancelledError:
+            self.cancelled.append(job.location)
+            raise
+        self.finished.append(job.location)
+        return [{"지역": job.location, "키워드": job.keyword, "레인": job.lane}]
+
+    async def started_with(self, location):
+        while location not in self.started:
+            await asyncio.sleep(0.001)
+
+
+def make_scheduler(runner, workers=1, on_idle=None):
+    # 기본 워커 1개, 요청 예산은 사실상 무제한
+    return CrawlScheduler(runner, rate_limiter=AsyncTokenBucket(60_000, capacity=100),
+                          concurrency=AdaptiveConcurrency(initial=workers, maximum=workers),
+                          on_idle=on_idle)
+
+
+async def run_all(futures):
+    return await asyncio.wait_for(asyncio.gather(*futures, return_exceptions=True), 5)
+
+
+def test_interactive_lane_dispatched_before_queued_batch():
+    async def scenario():
+        runner = GatedRunner(gated=["일괄1"])
+        async with make_scheduler(runner) as scheduler:
+            futures = [scheduler.submit(CrawlJob("일괄1", "카페"))]
+            await runner.started_with("일괄1")
+            futures.append(scheduler.submit(CrawlJob("일괄2", "카페", priority=50)))
+            futures.append(scheduler.submit_interactive("즉시", "카페"))
+            await asyncio.sleep(0.05)
+            # 실행 중인 일괄 작업은 선점하지 않으므로 슬롯이 빌 때까지 아무것도 시작되지 않음
+            waiting = list(runner.started)
+            runner.gated["일괄1"].set()
+            await run_all(futures)
+            return runner, waiting, scheduler.report()
+    runner, waiting, report = asyncio.run(scenario())
+
+    assert waiting == ["일괄1"]
+    # 슬롯이 비면 우선순위가 높은 일괄 작업보다 대화형 작업이 먼저
+    assert runner.started == ["일괄1", "즉시", "일괄2"]
+    assert runner.cancelled == [] and runner.finished == runner.started
+    assert report[INTERACTIVE]["completed"] == 1 and report[BATCH]["completed"] == 2
+
+
+def test_score_then_deadline_ordering_within_lane():
+    now = time.time()
+
+    async def scenario():
+        runner = GatedRunner(gated=["선행"])
+        async with make_scheduler(runner) as scheduler:
+            futures = [scheduler.submit(CrawlJob("선행", "카페"))]
+            await runner.started_with("선행")
+            for job in [
+                CrawlJob("마감없음", "카페"),
+                CrawlJob("마감늦음", "카페", deadline=now + 200),
+                CrawlJob("마감이름", "카페", deadline=now + 100),
+                CrawlJob("우선순위", "카페", priority=1, deadline=now + 300),
+                CrawlJob("수확많음", "카페", last_yield=50, deadline=now + 300),
+                CrawlJob("최근크롤링", "카페", last_crawled=now, deadline=now + 50),
+            ]:
+                futures.append(scheduler.submit(job))
+            runner.gated["선행"].set()
+            await run_all(futures)
+            return runner
+    runner = asyncio.run(scenario())
+
+    # 점수(우선순위 > 수확량/오래됨) 내림차순, 같은 점수면 마감이 이른 순, 마감 없는 작업은 마지막
+    assert runner.started == ["선행", "우선순위", "수확많음", "마감이름", "마감늦음", "마감없음", "최근크롤링"]
+
+
+def test_expired_job_dropped_and_recurring_job_rescheduled():
+    async def scenario():
+        runner = GatedRunner(gated=["선행"])
+        async with make_scheduler(runner) as scheduler:
+            first = scheduler.submit(CrawlJob("선행", "카페"))
+            await runner.started_with("선행")
+            expired = scheduler.submit_interactive("만료", "카페", deadline=time.time() + 0.01)
+            recurring = CrawlJob("반복", "카페", recurrence=3600)
+            scheduler.submit(recurring, wait=False)
+            await asyncio.sleep(0.05)
+            runner.gated["선행"].set()
+            results = await run_all([first, expired])
+            while "반복" not in runner.finished:
+                await asyncio.sleep(0.001)
+            return runner, results, recurring, scheduler.report()
+    runner, results, recurring, report = asyncio.run(scenario())
+
+    assert isinstance(results[1], TimeoutError)
+    assert "만료" not in runner.started
+    assert report[INTERACTIVE]["expired"] == 1
+    # 반복 작업은 다음 주기로 지연 큐에 다시 등록
+    assert report["delayed"] == 1
+    assert recurring.not_before == pytest.approx(recurring.last_crawled + 3600)
+    assert recurring.last_yield == 1
+
+
+def test_batch_sink_flushes_when_batch_lane_idle(monkeypatch):
+    saved = []
+
+    def save_crawl_output(rows, logger):
+        saved.append([row["지역"] for row in rows])
+        return f"batch_{len(saved)}.xlsx"
+    monkeypatch.setattr(scheduler_module, "save_crawl_output", save_crawl_output)
+
+    async def scenario():
+        runner = GatedRunner()
+        sink = BatchSink(logging.getLogger("test_scheduler"))
+        async with make_scheduler(sink.wrap(runner), on_idle=sink.on_idle) as scheduler:
+            # 반복 작업이 지연 큐에 다시 들어가도 그 회차가 끝나면 저장
+            await run_all([scheduler.submit(CrawlJob(location, "카페", recurrence=3600))
+                           for location in ("처인구", "기흥구")] +
+                          [scheduler.submit_interactive("수지구", "카페")])
+            await asyncio.sleep(0.01)
+            first_round = list(saved)
+            await run_all([scheduler.submit(CrawlJob("수지구", "음식점"))])
+            await asyncio.sleep(0.01)
+            return first_round, sink
+    first_round, sink = asyncio.run(scenario())
+
+    # 대화형 결과는 저장하지 않고, 일괄 레인이 빌 때마다 한 번씩 저장
+    assert first_round == [["처인구", "기흥구"]]
+    assert saved == [["처인구", "기흥구"], ["수지구"]]
+    assert sink.rows == [] and sink.flush() is None
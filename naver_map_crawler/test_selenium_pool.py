@@ -0,0 +1,182 @@
+"""
+드라이버 풀 테스트 - 가짜 드라이버로 crawl_iter 순서/backpressure, 멈춘 드라이버 교체, 동시성 기록
+"""
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip("undetected_chromedriver")
+pytest.importorskip("selenium")
+
+import selenium_pool
+from config import SELENIUM_POOL_CONFIG, WATCHDOG_CONFIG
+from crawl_events import RowEvent, ProgressEvent
+from selenium_pool import AsyncUndetectedPool, DriverSlot
+
+
+class FakeBrowser:
+    """풀 전체의 가짜 드라이버가 공유하는 검색 결과/호출 기록"""
+
+    def __init__(self, rows_per_query=2, hang_once=()):
+        self.rows_per_query = rows_per_query
+        self.hang_once = set(hang_once)  # 처음 한 번만 멈추는 지역
+        self.release = threading.Event()
+        self.searched = []
+        self.crawlers = []
+
+
+class FakeCrawler:
+    """UndetectedNaverCrawler 대신 쓰는 동기식 가짜 크롤러 (드라이버 스레드에서 호출됨)"""
+
+    def __init__(self, browser):
+        self.browser = browser
+        self.driver = None
+        self.proxy = None
+        self.started = self.closed = self.released = False
+        browser.crawlers.append(self)
+
+    def initialize_driver(self):
+        self.started = True
+
+    def open_search_page(self, location, keyword):
+        self.browser.searched.append((location, keyword))
+        if location in self.browser.hang_once:
+            self.browser.hang_once.discard(location)
+            self.browser.release.wait(10)  # 렌더러가 멈춘 상황
+
+    def archive_page(self, location, keyword):
+        pass
+
+    def extract_place_data(self, location, keyword, trace):
+        return [{"지역": location, "키워드": keyword, "가게명": f"{location}-{n}"}
+                for n in range(self.browser.rows_per_query)]
+
+    def detect_block(self):
+        return False
+
+    def close(self):
+        self.closed = True
+
+    def release_resources(self):
+        self.released = True
+
+
+@pytest.fixture
+def browser(monkeypatch):
+    browser = FakeBrowser()
+
+    async def no_delay(*args):
+        pass
+    monkeypatch.setattr(selenium_pool, "random_delay", no_delay)
+    monkeypatch.setattr(DriverSlot, "_new_crawler", lambda slot: FakeCrawler(browser))
+    monkeypatch.setitem(SELENIUM_POOL_CONFIG, "page_settle_range", (0, 0))
+    monkeypatch.setitem(WATCHDOG_CONFIG, "job_deadline", 0.3)
+    monkeypatch.setitem(WATCHDOG_CONFIG, "close_timeout", 0.3)
+    monkeypatch.setitem(WATCHDOG_CONFIG, "max_navigations", 1000)
+    yield browser
+    browser.release.set()
+
+
+def run_pool(drivers, scenario):
+    async def main():
+        async with AsyncUndetectedPool(drivers=drivers) as pool:
+            return await scenario(pool)
+    return asyncio.run(main())
+
+
+JOBS = [("처인구", "카페"), ("기흥구", "카페"), ("수지구", "카페"), ("처인구", "음식점")]
+
+
+def test_crawl_iter_emits_rows_before_progress(browser):
+    async def scenario(pool):
+        return [event async for event in pool.crawl_iter(JOBS)]
+    events = run_pool(2, scenario)
+
+    rows = [event for event in events if isinstance(event, RowEvent)]
+    progress = [event for event in events if isinstance(event, ProgressEvent)]
+    assert len(rows) == len(JOBS) * browser.rows_per_query
+    assert [event.completed for event in progress] == [1, 2, 3, 4]
+    assert sorted(event.index for event in progress) == [0, 1, 2, 3]
+    for event in progress:
+        # 쿼리의 결과 행은 모두 그 쿼리의 진행 이벤트보다 먼저 옴
+        position = events.index(event)
+        assert sum(isinstance(e, RowEvent) and e.index == event.index for e in events[:position]) == event.found == 2
+        assert (event.location, event.keyword) == JOBS[event.index] and event.total == len(JOBS)
+
+
+def test_crawl_merges_in_input_order(browser):
+    async def scenario(pool):
+        return await pool.crawl(JOBS)
+    data = run_pool(2, scenario)
+    assert [(row["지역"], row["키워드"]) for row in data] == [job for job in JOBS for _ in range(2)]
+
+
+def test_bounded_event_queue_applies_backpressure(browser):
+    browser.rows_per_query = 3
+
+    async def scenario(pool):
+        stream = pool.crawl_iter(JOBS, buffer=1)
+        first = await stream.__anext__()
+        await asyncio.sleep(0.1)
+        # 소비자가 멈춰 있는 동안 워커는 첫 쿼리의 행을 넣지 못하고 대기
+        searched_while_paused = len(browser.searched)
+        rest = [event async for event in stream]
+        return first, searched_while_paused, rest
+
+    first, searched_while_paused, rest = run_pool(1, scenario)
+    assert isinstance(first, RowEvent) and first.index == 0
+    assert searched_while_paused == 1
+    assert len(browser.searched) == len(JOBS)
+    assert len(rest) == len(JOBS) * 4 - 1
+
+
+def test_hung_driver_is_replaced_and_job_requeued(browser):
+    browser.hang_once = {"처인구"}
+
+    async def scenario(pool):
+        events = [event async for event in pool.crawl_iter(JOBS[:2])]
+        return events, pool.slots[0]
+    events, slot = run_pool(1, scenario)
+
+    # 멈춘 드라이버는 강제 종료 후 새 크롤러로 교체, 멈춘 작업은 다시 처리됨
+    assert slot.hangs == 1 and slot.restarts == 1
+    assert len(browser.crawlers) == 2
+    assert browser.crawlers[0].released and browser.crawlers[1].started
+    assert slot.crawler is browser.crawlers[1]
+    assert browser.searched == [("처인구", "카페"), ("기흥구", "카페"), ("처인구", "카페")]
+
+    progress = {event.index: event for event in events if isinstance(event, ProgressEvent)}
+    assert progress[0].error is None and progress[0].found == 2
+    assert [event.completed for event in events if isinstance(event, ProgressEvent)] == [1, 2]
+
+
+def test_search_without_slot_leaves_recording_to_caller(browser):
+    async def scenario(pool):
+        places = await pool.search("처인구", "카페")
+        unrecorded = pool.concurrency.metrics()["samples"]
+        await pool.search_places(pool.slots[0], "기흥구", "카페")
+        return places, unrecorded, pool.concurrency.metrics()["samples"], pool.concurrency.in_flight
+    places, unrecorded, recorded, in_flight = run_pool(1, scenario)
+
+    assert len(places) == 2
+    # search()는 풀의 동시성 슬롯을 잡지 않으므로 기록하지 않음 (스케줄러가 기록)
+    assert unrecorded == 0
+    assert recorded == 1 and in_flight == 0
+
+
+def test_closing_stream_early_cancels_workers(browser):
+    async def scenario(pool):
+        stream = pool.crawl_iter(JOBS, buffer=1)
+        first = await stream.__anext__()
+        await stream.aclose()
+        await asyncio.sleep(0.1)
+        # 닫은 뒤에는 남은 작업을 검색하지 않고, 드라이버는 다시 쓸 수 있음
+        searched_after_close = list(browser.searched)
+        places = await pool.search("수지구", "카페")
+        return first, searched_after_close, places
+
+    first, searched_after_close, places = run_pool(1, scenario)
+    assert first.index == 0
+    assert searched_after_close == [JOBS[0]]
+    assert len(places) == 2
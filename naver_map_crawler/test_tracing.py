@@ -0,0 +1,158 @@
+"""
+쿼리 트레이스 테스트 - 이벤트 출력, 샘플링, NullTrace, CDP 성능 지표 수집 순서
+"""
+import asyncio
+import json
+
+import tracing
+from tracing import (
+    Tracer, QueryTrace, NULL_TRACE, BROWSER_TID,
+    enable_playwright_metrics, start_playwright_metrics, collect_playwright_metrics,
+    enable_selenium_metrics, start_selenium_metrics, collect_selenium_metrics,
+)
+
+
+def metrics(task=0.0, script=0.0, heap_mb=10):
+    return {"metrics": [
+        {"name": "TaskDuration", "value": task}, {"name": "ScriptDuration", "value": script},
+        {"name": "JSHeapUsedSize", "value": heap_mb * 1024 * 1024}, {"name": "Nodes", "value": 500},
+    ]}
+
+
+def counter(trace, name):
+    return next(event["args"] for event in trace.events if event["ph"] == "C" and event["name"] == name)
+
+
+class FakeDriver:
+    """execute_cdp_cmd 호출을 기록하고 enable 이후 누적 시간을 돌려주는 드라이버"""
+
+    def __init__(self):
+        self.commands = []
+        self.task = None  # enable 전에는 지표가 쌓이지 않음
+
+    def execute_cdp_cmd(self, command, params):
+        self.commands.append(command)
+        if command == "Performance.enable":
+            self.task = 0.0
+        elif command == "Performance.getMetrics":
+            if self.task is not None:
+                self.task += 0.25
+            return metrics(task=self.task or 0.0)
+
+    def execute_script(self, script):
+        return {"timeOrigin": 1_700_000_000_000.0, "resources": 3,
+                "navigation": {"requestStart": 10.0, "responseStart": 30.0, "responseEnd": 50.0}}
+
+
+class FakeCDPSession:
+    def __init__(self):
+        self.sent = []
+        self.detached = False
+
+    async def send(self, command):
+        self.sent.append(command)
+        if command == "Performance.getMetrics":
+            return metrics(task=0.1 * len(self.sent), script=0.05)
+
+    async def detach(self):
+        self.detached = True
+
+
+class FakePage:
+    def __init__(self):
+        self.session = FakeCDPSession()
+        self.context = self
+
+    async def new_cdp_session(self, page):
+        return self.session
+
+    async def evaluate(self, script):
+        return None
+
+
+def test_query_trace_events_written_as_chrome_trace(tmp_path):
+    trace = QueryTrace("처인구 카페", str(tmp_path), location="처인구")
+    with trace.span("navigate", url="https://map.naver.com"):
+        pass
+    trace.add_navigation_timing(FakeDriver().execute_script(""))
+    path = trace.save()
+
+    with open(path, encoding="utf-8") as f:
+        events = json.load(f)["traceEvents"]
+    assert path.endswith("처인구_카페.json")
+
+    spans = [event for event in events if event["ph"] == "X"]
+    assert [event["name"] for event in spans] == ["navigate", "request", "response", "query"]
+    assert spans[0]["args"] == {"url": "https://map.naver.com"} and spans[0]["dur"] >= 0
+    # 브라우저 타이밍은 browser 레인, timeOrigin(ms) 기준 마이크로초
+    assert spans[1]["tid"] == BROWSER_TID and spans[1]["dur"] == 20_000
+    assert spans[1]["ts"] == (1_700_000_000_000.0 + 10.0) * 1000
+    assert spans[-1]["args"] == {"query": "처인구 카페", "location": "처인구"}
+    assert {event["name"] for event in events if event["ph"] == "M"} == {"process_name", "thread_name"}
+
+
+def test_tracer_sampling(tmp_path, monkeypatch):
+    config = {"enabled": True, "sample_rate": 0.3, "output_dir": str(tmp_path)}
+    monkeypatch.setattr(tracing.random, "random", lambda: 0.29)
+    assert isinstance(Tracer(config).start("q"), QueryTrace)
+    monkeypatch.setattr(tracing.random, "random", lambda: 0.3)
+    assert Tracer(config).start("q") is NULL_TRACE
+
+    assert Tracer(dict(config, enabled=False)).start("q") is NULL_TRACE
+    assert not Tracer(dict(config, sample_rate=0)).enabled
+    assert Tracer(config).enabled
+
+
+def test_null_trace_records_nothing(tmp_path):
+    with NULL_TRACE.span("navigate"):
+        NULL_TRACE.add_cdp_metrics(metrics(task=1.0))
+        NULL_TRACE.set_metrics_baseline(metrics())
+    assert NULL_TRACE.save() is None
+    assert list(tmp_path.iterdir()) == []
+
+    # 샘플링되지 않은 쿼리는 CDP 호출도 하지 않음
+    driver = FakeDriver()
+    start_selenium_metrics(driver, NULL_TRACE)
+    collect_selenium_metrics(driver, NULL_TRACE)
+    assert driver.commands == []
+
+
+def test_cdp_duration_metrics_are_per_query(tmp_path):
+    trace = QueryTrace("q", str(tmp_path))
+    trace.set_metrics_baseline(metrics(task=2.0, script=1.0))
+    trace.add_cdp_metrics(metrics(task=2.5, script=1.2, heap_mb=30))
+
+    main_thread = counter(trace, "main_thread_ms")
+    assert round(main_thread["task"], 6) == 500 and round(main_thread["script"], 6) == 200
+    # 힙/노드 수는 누적값이 아니라 현재값
+    assert counter(trace, "js_heap")["used_mb"] == 30
+    assert counter(trace, "dom")["nodes"] == 500
+
+
+def test_selenium_metrics_enabled_at_driver_creation(tmp_path):
+    driver = FakeDriver()
+    enable_selenium_metrics(driver)
+
+    trace = QueryTrace("q", str(tmp_path))
+    start_selenium_metrics(driver, trace)
+    collect_selenium_metrics(driver, trace)
+
+    assert driver.commands == ["Performance.enable", "Performance.getMetrics", "Performance.getMetrics"]
+    assert counter(trace, "main_thread_ms")["task"] == 250
+
+
+def test_playwright_metrics_keep_enabled_session(tmp_path):
+    page = FakePage()
+    trace = QueryTrace("q", str(tmp_path))
+
+    async def scenario():
+        cdp = await enable_playwright_metrics(page)
+        await start_playwright_metrics(cdp, trace)
+        await collect_playwright_metrics(page, cdp, trace)
+        return cdp
+    cdp = asyncio.run(scenario())
+
+    # 같은 세션에서 enable 후 지표를 읽고, 수집 후에도 세션을 닫지 않음
+    assert cdp is page.session and not cdp.detached
+    assert cdp.sent == ["Performance.enable", "Performance.getMetrics", "Performance.getMetrics"]
+    assert round(counter(trace, "main_thread_ms")["task"], 6) == 100
@@ -0,0 +1,253 @@
+"""
+쿼리별 트레이스 타임라인
+navigate / wait / archive / extract / format 구간과 브라우저 성능 지표를 기록해
+Chrome trace-event JSON 파일로 저장 (chrome://tracing, ui.perfetto.dev 에서 열기)
+"""
+import json
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional
+
+from config import TRACE_CONFIG
+from utils import create_output_directory
+
+# 브라우저 내부 타이밍은 별도 스레드 레인으로 표시
+BROWSER_TID = 0
+
+# Navigation Timing 항목 -> 트레이스 구간
+NAVIGATION_PHASES = [
+    ("dns", "domainLookupStart", "domainLookupEnd"),
+    ("connect", "connectStart", "connectEnd"),
+    ("request", "requestStart", "responseStart"),
+    ("response", "responseStart", "responseEnd"),
+    ("dom_processing", "responseEnd", "domComplete"),
+    ("load_event", "loadEventStart", "loadEventEnd"),
+]
+
+NAVIGATION_TIMING_SCRIPT = """() => {
+    const entry = performance.getEntriesByType('navigation')[0];
+    return {
+        timeOrigin: performance.timeOrigin,
+        navigation: entry ? entry.toJSON() : null,
+        resources: performance.getEntriesByType('resource').length
+    };
+}"""
+
+
+# Performance.enable 이후 누적되는 메인 스레드 시간 지표 (초)
+DURATION_METRICS = ("ScriptDuration", "LayoutDuration", "RecalcStyleDuration", "TaskDuration")
+
+
+def metric_values(metrics: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    """Performance.getMetrics 응답 -> {지표 이름: 값}"""
+    if not metrics or "metrics" not in metrics:
+        return {}
+    return {m["name"]: m["value"] for m in metrics["metrics"]}
+
+
+def now_us() -> float:
+    """트레이스 시간축 (epoch 마이크로초, 브라우저 timeOrigin과 맞추기 위함)"""
+    return time.time() * 1_000_000
+
+
+class QueryTrace:
+    """쿼리 하나의 트레이스 이벤트 모음"""
+
+    def __init__(self, name: str, output_dir: str, **args):
+        self.name = name
+        self.output_dir = output_dir
+        self.pid = os.getpid()
+        self.tid = threading.get_ident() % 100000 or 1
+        self.started_at = now_us()
+        self.events: List[Dict[str, Any]] = [
+            {"ph": "M", "name": "process_name", "pid": self.pid, "args": {"name": "naver_map_crawler"}},
+            {"ph": "M", "name": "thread_name", "pid": self.pid, "tid": self.tid, "args": {"name": "crawler"}},
+            {"ph": "M", "name": "thread_name", "pid": self.pid, "tid": BROWSER_TID, "args": {"name": "browser"}},
+        ]
+        self.args = args
+        self.metrics_baseline: Dict[str, float] = {}
+
+    @contextmanager
+    def span(self, name: str, **args):
+        """구간 기록 (await를 감싸도 됨)"""
+        start = now_us()
+        try:
+            yield
+        finally:
+            self.complete(name, start, now_us() - start, **args)
+
+    def complete(self, name: str, ts: float, dur: float, tid: Optional[int] = None, **args):
+        self.events.append({
+            "ph": "X", "name": name, "cat": "crawl", "pid": self.pid,
+            "tid": self.tid if tid is None else tid, "ts": ts, "dur": max(dur, 0), "args": args
+        })
+
+    def counters(self, name: str, values: Dict[str, float]):
+        """카운터 이벤트 (브라우저 메모리, 노드 수 등)"""
+        self.events.append({"ph": "C", "name": name, "pid": self.pid, "ts": now_us(), "args": values})
+
+    def add_navigation_timing(self, timing: Optional[Dict[str, Any]]):
+        """Navigation Timing 결과를 browser 레인 구간으로 변환"""
+        if not timing or not timing.get("navigation"):
+            return
+        origin_us = timing["timeOrigin"] * 1000
+        entry = timing["navigation"]
+        for phase, start_key, end_key in NAVIGATION_PHASES:
+            start, end = entry.get(start_key), entry.get(end_key)
+            if start and end and end >= start:
+                self.complete(phase, origin_us + start * 1000, (end - start) * 1000, tid=BROWSER_TID)
+        self.counters("resources", {"count": timing.get("resources", 0)})
+
+    def set_metrics_baseline(self, metrics: Optional[Dict[str, Any]]):
+        """쿼리 시작 시점의 CDP 지표 (누적 시간 지표에서 빼서 이 쿼리 몫만 기록)"""
+        self.metrics_baseline = metric_values(metrics)
+
+    def add_cdp_metrics(self, metrics: Optional[Dict[str, Any]]):
+        """CDP Performance.getMetrics 결과 기록
+
+        *Duration 지표는 Performance.enable 이후 누적값이므로 시작 지점 값을 뺀다
+        """
+        values = metric_values(metrics)
+        if not values:
+            return
+        for name in DURATION_METRICS:
+            if name in values:
+                values[name] -= self.metrics_baseline.get(name, 0)
+        self.counters("js_heap", {
+            "used_mb": values.get("JSHeapUsedSize", 0) / (1024 * 1024),
+            "total_mb": values.get("JSHeapTotalSize", 0) / (1024 * 1024)
+        })
+        self.counters("dom", {"nodes": values.get("Nodes", 0), "documents": values.get("Documents", 0)})
+        self.counters("main_thread_ms", {
+            "script": values.get("ScriptDuration", 0) * 1000,
+            "layout": values.get("LayoutDuration", 0) * 1000,
+            "style": values.get("RecalcStyleDuration", 0) * 1000,
+            "task": values.get("TaskDuration", 0) * 1000
+        })
+
+    def save(self) -> str:
+        """트레이스 파일 저장 후 경로 반환"""
+        self.complete("query", self.started_at, now_us() - self.started_at, query=self.name, **self.args)
+        create_output_directory(self.output_dir)
+        slug = re.sub(r'[^\w가-힣]+', '_', self.name).strip('_')
+        filename = f"trace_{time.strftime('%Y%m%d_%H%M%S')}_{int(self.started_at) % 1_000_000:06d}_{slug}.json"
+        path = os.path.join(self.output_dir, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return path
+
+
+class NullTrace:
+    """샘플링되지 않은 쿼리용 (모든 기록을 무시)"""
+
+    @contextmanager
+    def span(self, name: str, **args):
+        yield
+
+    def complete(self, *args, **kwargs):
+        pass
+
+    def counters(self, *args, **kwargs):
+        pass
+
+    def add_navigation_timing(self, timing):
+        pass
+
+    def set_metrics_baseline(self, metrics):
+        pass
+
+    def add_cdp_metrics(self, metrics):
+        pass
+
+    def save(self) -> Optional[str]:
+        return None
+
+
+NULL_TRACE = NullTrace()
+
+
+class Tracer:
+    """샘플링 비율에 따라 쿼리 트레이스 생성"""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = dict(TRACE_CONFIG, **(config or {}))
+
+    @property
+    def enabled(self) -> bool:
+        """트레이스가 켜져 있는지 (브라우저 성능 지표 수집을 미리 켤지 판단)"""
+        return bool(self.config["enabled"]) and self.config["sample_rate"] > 0
+
+    def start(self, name: str, **args):
+        """트레이스 시작. 꺼져 있거나 샘플링되지 않으면 NULL_TRACE 반환"""
+        if not self.config["enabled"] or random.random() >= self.config["sample_rate"]:
+            return NULL_TRACE
+        return QueryTrace(name, self.config["output_dir"], **args)
+
+
+async def enable_playwright_metrics(page):
+    """페이지 생성 시 CDP 성능 지표 수집 시작
+
+    지표는 Performance.enable을 보낸 세션에서만 쌓이므로 세션을 돌려주고 페이지 수명 동안 유지한다.
+    실패하면 None (Navigation Timing만 기록)
+    """
+    try:
+        cdp = await page.context.new_cdp_session(page)
+        await cdp.send("Performance.enable")
+        return cdp
+    except Exception:
+        return None
+
+
+async def start_playwright_metrics(cdp, trace):
+    """쿼리 시작 시점의 누적 지표를 기준값으로 기록"""
+    if trace is NULL_TRACE or cdp is None:
+        return
+    try:
+        trace.set_metrics_baseline(await cdp.send("Performance.getMetrics"))
+    except Exception:
+        pass
+
+
+async def collect_playwright_metrics(page, cdp, trace):
+    """추출이 끝난 뒤 Playwright 페이지의 CDP 성능 지표와 Navigation Timing 수집"""
+    if trace is NULL_TRACE:
+        return
+    try:
+        if cdp is not None:
+            trace.add_cdp_metrics(await cdp.send("Performance.getMetrics"))
+        trace.add_navigation_timing(await page.evaluate(NAVIGATION_TIMING_SCRIPT))
+    except Exception:
+        pass
+
+
+def enable_selenium_metrics(driver):
+    """드라이버 생성 시 CDP 성능 지표 수집 시작 (chromedriver의 CDP 세션은 드라이버 수명 동안 유지)"""
+    try:
+        driver.execute_cdp_cmd("Performance.enable", {})
+    except Exception:
+        pass
+
+
+def start_selenium_metrics(driver, trace):
+    """쿼리 시작 시점의 누적 지표를 기준값으로 기록"""
+    if trace is NULL_TRACE:
+        return
+    try:
+        trace.set_metrics_baseline(driver.execute_cdp_cmd("Performance.getMetrics", {}))
+    except Exception:
+        pass
+
+
+def collect_selenium_metrics(driver, trace):
+    """추출이 끝난 뒤 Selenium(Chrome) 드라이버의 CDP 성능 지표와 Navigation Timing 수집"""
+    if trace is NULL_TRACE:
+        return
+    try:
+        trace.add_cdp_metrics(driver.execute_cdp_cmd("Performance.getMetrics", {}))
+        trace.add_navigation_timing(driver.execute_script(f"return ({NAVIGATION_TIMING_SCRIPT})();"))
+    except Exception:
+        pass
@@ -7,9 +7,12 @@ import logging
 import asyncio
 import random
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import pandas as pd
 
+# format_crawling_result 입력 필드 (config.EXTRACT_SELECTORS의 필드 키와 동일)
+PLACE_FIELDS = ("name", "address", "rating", "reviews", "phone", "category")
+
 def setup_logging(config: Dict[str, Any]) -> logging.Logger:
     """로깅 설정"""
     logging.basicConfig(
@@ -42,6 +45,13 @@ def clean_phone_number(phone: str) -> Optional[str]:
 
     return phone_digits if len(phone_digits) >= 8 else None
 
+def parse_review_count(text: str) -> Optional[int]:
+    """리뷰 수 텍스트("리뷰 1,234", "방문자리뷰 999+") -> 정수"""
+    if not text:
+        return None
+    match = re.search(r'\d[\d,]*', text)
+    return int(match.group().replace(',', '')) if match else None
+
 def create_output_directory(output_dir: str) -> str:
     """출력 디렉토리 생성"""
     if not os.path.exists(output_dir):
@@ -61,7 +71,7 @@ def save_to_excel(data: list, filename: str, output_dir: str) -> str:
     df = pd.DataFrame(data)
 
     # 컬럼 순서 정리
-    column_order = ['지역', '키워드', '가게명', '주소', '평점', '전화번호', '카테고리', '크롤링_시간']
+    column_order = ['지역', '키워드', '가게명', '주소', '평점', '리뷰수', '전화번호', '카테고리', '크롤링_시간', '변경_구분', '장소_ID']
     existing_columns = [col for col in column_order if col in df.columns]
     df = df[existing_columns]
 
@@ -71,6 +81,11 @@ def save_to_excel(data: list, filename: str, output_dir: str) -> str:
 
     return filepath
 
+def read_result_excel(path: str) -> pd.DataFrame:
+    """저장된 크롤링 결과 엑셀 읽기 (빈 셀은 NaN 대신 None)"""
+    df = pd.read_excel(path)
+    return df.astype(object).where(pd.notna(df), None)
+
 async def random_delay(min_seconds: int = 2, max_seconds: int = 3):
     """랜덤 딜레이"""
     delay = random.uniform(min_seconds, max_seconds)
@@ -101,7 +116,15 @@ def format_crawling_result(location: str, keyword: str, place_data: Dict[str, An
         "가게명": place_data.get("name", ""),
         "주소": place_data.get("address", ""),
         "평점": place_data.get("rating", ""),
+        "리뷰수": parse_review_count(place_data.get("reviews", "")),
         "전화번호": clean_phone_number(place_data.get("phone", "")),
         "카테고리": place_data.get("category", ""),
         "크롤링_시간": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    }
\ No newline at end of file
+    }
+
+def is_blocked_content(html: str, markers: List[str]) -> bool:
+    """캡차/접근 제한 페이지 여부"""
+    if not html:
+        return False
+    lowered = html.lower()
+    return any(marker.lower() in lowered for marker in markers)
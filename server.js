@@ -11,6 +11,8 @@ const __dirname = path.dirname(__filename);
 
 const app = express();
 const PORT = 3000;
+// 크롤링 스케줄러 서비스 (naver_map_crawler/scheduler.py). 실행 중이면 야간 일괄 작업과 같은 브라우저 풀을 사용
+const SCHEDULER_URL = process.env.SCHEDULER_URL || 'http://127.0.0.1:8765';
 
 // 크롤러 인스턴스
 let crawler = null;
@@ -164,6 +166,43 @@ app.delete('/api/places/:id', async (req, res) => {
   }
 });
 
+// 스케줄러 서비스의 대화형 레인으로 크롤링 (서비스가 없으면 null)
+async function crawlViaScheduler(query) {
+  let response;
+  try {
+    response = await fetch(`${SCHEDULER_URL}/crawl`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ query })
+    });
+  } catch (error) {
+    console.log(`스케줄러 서비스 연결 실패, 직접 크롤링: ${error.message}`);
+    return null;
+  }
+
+  const body = await response.json();
+  if (!response.ok) {
+    throw new Error(body.error || `스케줄러 오류 (${response.status})`);
+  }
+  return body.places.map(row => ({
+    name: row['가게명'],
+    address: row['주소'],
+    phone: row['전화번호'],
+    category: row['카테고리']
+  }));
+}
+
+// 스케줄러 서비스가 없을 때만 요청마다 브라우저를 띄움
+async function crawlDirect(query) {
+  const currentCrawler = new NaverMapCrawler();
+  await currentCrawler.init();
+  try {
+    return await currentCrawler.searchPlaces(query);
+  } finally {
+    await currentCrawler.close();
+  }
+}
+
 // 자동 크롤링 엔드포인트
 app.post('/api/crawl', async (req, res) => {
   try {
@@ -175,15 +214,7 @@ app.post('/api/crawl', async (req, res) => {
 
     console.log(`크롤링 요청: ${query}`);
 
-    // 매번 새로운 크롤러 인스턴스 생성
-    const currentCrawler = new NaverMapCrawler();
-    await currentCrawler.init();
-
-    // 크롤링 실행
-    const places = await currentCrawler.searchPlaces(query);
-
-    // 크롤러 정리
-    await currentCrawler.close();
+    const places = (await crawlViaScheduler(query)) ?? (await crawlDirect(query));
 
     if (places.length === 0) {
       return res.json({